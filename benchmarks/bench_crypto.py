@@ -0,0 +1,64 @@
+"""Per-request crypto cost of the gateway client.
+
+Compares the original per-request path (parse the DER key, generate a fresh
+AES key and RSA-encrypt it for every call) with the cached session key.
+
+Run from the repository root:
+
+    PYTHONPATH=$PWD python benchmarks/bench_crypto.py
+"""
+
+import base64
+import timeit
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from custom_components.suncloud_monitor.api import (
+    SuncloudCrypto,
+    generate_random_key,
+)
+
+ROUNDS = 200
+
+
+def make_rsa_key_b64() -> str:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=1024)
+    der = private_key.public_key().public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return base64.urlsafe_b64encode(der).decode()
+
+
+def per_request_us(func) -> float:
+    return timeit.timeit(func, number=ROUNDS) / ROUNDS * 1e6
+
+
+def main():
+    rsa_key = make_rsa_key_b64()
+
+    uncached = SuncloudCrypto(rsa_key, key_rotation=0)
+
+    def before():
+        # Original behaviour: every request re-parses the key and re-encrypts.
+        uncached._public_key = None
+        uncached.rsa_encrypt(generate_random_key())
+
+    parsed_once = SuncloudCrypto(rsa_key, key_rotation=0)
+    cached = SuncloudCrypto(rsa_key, key_rotation=3600)
+
+    results = [
+        ("parse + encrypt per request (before)", per_request_us(before)),
+        (
+            "parsed key, new secret per request",
+            per_request_us(parsed_once.session_key),
+        ),
+        ("cached session key (after)", per_request_us(cached.session_key)),
+    ]
+    for label, value in results:
+        print(f"{label:<40} {value:10.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
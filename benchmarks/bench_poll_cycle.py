@@ -0,0 +1,401 @@
+"""Benchmarks for the stages of one poll cycle.
+
+Covers the crypto primitives at realistic payload sizes, payload building,
+realtime reply parsing, the 999-point catalog in YAML (legacy file and
+pyscript app) and JSON (``.storage``), and a full poll against the local
+fake gateway. Each benchmark reports wall and CPU time per operation and
+the peak/retained memory traced while running it once. The fake gateway
+runs in the same process, so the poll benchmarks include its share of the
+crypto work.
+
+The reply decoding benchmarks compare the bytes pipeline of the client with
+the former text/hex pipeline on the realtime reply of a 20-plant fleet; the
+peak memory of one call is the allocation cost per realtime cycle.
+
+The event-loop lag section polls a large fleet with reply decryption kept
+on the loop and offloaded to an executor, and reports how late a 1 ms
+ticker on the same loop woke up. Its gateway runs on a thread of its own
+so only the client's work shows up as lag.
+
+Run from the repository root:
+
+    PYTHONPATH=$PWD python benchmarks/bench_poll_cycle.py --output bench.json
+
+and compare against an earlier run; the exit status is 1 when a CPU time or
+peak allocation grew by more than the tolerance:
+
+    PYTHONPATH=$PWD python benchmarks/bench_poll_cycle.py --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from unittest.mock import MagicMock
+
+import yaml
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+from homeassistant.helpers.json import json_bytes
+from homeassistant.util.json import json_loads
+
+from custom_components.suncloud_monitor.api import SuncloudCrypto, generate_random_key
+from custom_components.suncloud_monitor.const import DECRYPT_OFFLOAD_THRESHOLD
+from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+from tests.fake_gateway import FakeGateway
+
+CATALOG_POINTS = 999
+REALTIME_POINTS = 100
+LAG_PLANTS = 20
+LAG_POLLS = 5
+LAG_TICK = 0.001
+
+
+class DummyBus:
+    def async_listen_once(self, event, callback):
+        return None
+
+
+class DummyConfig:
+    components: set[str] = set()
+
+    @staticmethod
+    def path(name):
+        return name
+
+
+class DummyHass:
+    def __init__(self):
+        self.bus = DummyBus()
+        self.config = DummyConfig()
+        self.data = {}
+
+
+def make_coordinator(entry_data: dict, **options) -> SuncloudDataCoordinator:
+    entry = MagicMock()
+    entry.data = entry_data
+    entry.options = options
+    coordinator = SuncloudDataCoordinator(DummyHass(), entry)
+    coordinator.store.async_schedule_save = MagicMock()
+    return coordinator
+
+
+def measure(func: Callable[[], object], min_time: float, repeat: int) -> dict:
+    """Time ``func`` and trace the memory of a single call.
+
+    Each of the ``repeat`` timing runs calls ``func`` often enough to last
+    about ``min_time`` seconds.
+    """
+    start = time.perf_counter()
+    func()
+    rounds = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)))
+    wall, cpu = [], []
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        for _ in range(rounds):
+            func()
+        wall.append((time.perf_counter() - wall_start) / rounds)
+        cpu.append((time.process_time() - cpu_start) / rounds)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "rounds": rounds * repeat,
+        "wall_us": statistics.median(wall) * 1e6,
+        "cpu_us": statistics.median(cpu) * 1e6,
+        "cpu_min_us": min(cpu) * 1e6,
+        "peak_kib": (peak - before) / 1024,
+        "retained_kib": (after - before) / 1024,
+    }
+
+
+def crypto_benchmarks(gateway: FakeGateway) -> dict[str, Callable[[], object]]:
+    client = make_coordinator(gateway.entry_data()).api
+    crypto = client.crypto
+    key = generate_random_key()
+    rsa_key = gateway.public_key_b64
+
+    realtime_reply = json.dumps(
+        {
+            "result_code": "1",
+            "result_data": gateway._getDeviceRealTimeData(
+                {
+                    "point_id_list": [p["point_id"] for p in gateway.catalog],
+                    "ps_key_list": ["1000_11_0_0"],
+                }
+            ),
+        }
+    )
+    catalog_reply = json.dumps(
+        {"result_code": "1", "result_data": {"pageList": gateway.catalog}}
+    )
+    encrypted_realtime = crypto.aes_encrypt(realtime_reply, key)
+    encrypted_catalog = crypto.aes_encrypt(catalog_reply, key)
+    point_ids = [str(p["point_id"]) for p in gateway.catalog][:REALTIME_POINTS]
+
+    def build_payload():
+        payload = {
+            "device_type": 11,
+            "point_id_list": point_ids,
+            "ps_key_list": ["1000_11_0_0"],
+        }
+        return client.build_encrypted_payload(payload, "TOKEN", key)
+
+    device_point = json.loads(realtime_reply)["result_data"]["device_point_list"][0][
+        "device_point"
+    ]
+
+    return {
+        "rsa_encrypt": lambda: crypto.rsa_encrypt(key, rsa_key),
+        "aes_encrypt_realtime_reply": lambda: crypto.aes_encrypt(realtime_reply, key),
+        "aes_decrypt_realtime_reply": lambda: crypto.aes_decrypt(
+            encrypted_realtime, key
+        ),
+        "aes_decrypt_catalog_reply": lambda: crypto.aes_decrypt(encrypted_catalog, key),
+        "build_encrypted_payload": build_payload,
+        "parse_device_point": lambda: SuncloudDataCoordinator._parse_device_point(
+            device_point
+        ),
+    }
+
+
+def legacy_decode(raw: bytes, key: str) -> dict:
+    """The former reply pipeline: text, hex, decrypt, unpad, decode, parse."""
+    cipher = Cipher(algorithms.AES(key.encode()), modes.ECB())
+    decryptor = cipher.decryptor()
+    decrypted = decryptor.update(bytes.fromhex(raw.decode())) + decryptor.finalize()
+    unpadder = PKCS7(128).unpadder()
+    unpadded = unpadder.update(decrypted) + unpadder.finalize()
+    return json.loads(unpadded.decode())
+
+
+def reply_benchmarks(gateway: FakeGateway) -> dict[str, Callable[[], object]]:
+    key = generate_random_key()
+    reply = {
+        "result_code": "1",
+        "result_data": gateway._getDeviceRealTimeData(
+            {
+                "point_id_list": [p["point_id"] for p in gateway.catalog],
+                "ps_key_list": [gateway.ps_key(s["ps_id"]) for s in gateway.stations],
+            }
+        ),
+    }
+    raw = SuncloudCrypto.aes_encrypt(json.dumps(reply), key).encode()
+    return {
+        "fleet_reply_decode_legacy": lambda: legacy_decode(raw, key),
+        "fleet_reply_decode_bytes": lambda: SuncloudCrypto.aes_decrypt(raw, key),
+    }
+
+
+def catalog_benchmarks(catalog: list[dict]) -> dict[str, Callable[[], object]]:
+    stored = {
+        "ps_key": "1000_11_0_0",
+        "points": {str(point["point_id"]): point for point in catalog},
+    }
+    as_yaml = yaml.safe_dump(stored, allow_unicode=True)
+    as_json = json_bytes(stored)
+    return {
+        "catalog_yaml_load": lambda: yaml.safe_load(as_yaml),
+        "catalog_yaml_save": lambda: yaml.safe_dump(stored, allow_unicode=True),
+        "catalog_json_load": lambda: json_loads(as_json),
+        "catalog_json_save": lambda: json_bytes(stored),
+    }
+
+
+def poll_benchmark(
+    loop: asyncio.AbstractEventLoop, gateway: FakeGateway, **options
+) -> tuple[Callable[[], object], SuncloudDataCoordinator]:
+    coordinator = make_coordinator(gateway.entry_data(), **options)
+    # Log in and discover once; the benchmark covers the steady state.
+    coordinator.data = loop.run_until_complete(coordinator._async_update_data())
+
+    def poll():
+        coordinator.data = loop.run_until_complete(coordinator._async_update_data())
+        return coordinator.data
+
+    return poll, coordinator
+
+
+class GatewayThread:
+    """Serves a FakeGateway from its own thread and event loop."""
+
+    def __init__(self, gateway: FakeGateway) -> None:
+        self.gateway = gateway
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self) -> FakeGateway:
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.gateway.start(), self.loop).result()
+        return self.gateway
+
+    def __exit__(self, *exc) -> None:
+        asyncio.run_coroutine_threadsafe(self.gateway.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+async def measure_loop_lag(coordinator: SuncloudDataCoordinator, polls: int) -> dict:
+    """Poll ``polls`` times while a ticker records how late the loop runs it."""
+    loop = asyncio.get_running_loop()
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(LAG_TICK)
+            lags.append(loop.time() - start - LAG_TICK)
+
+    ticking = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    for _ in range(polls):
+        coordinator.data = await coordinator._async_update_data()
+    wall = (time.perf_counter() - start) / polls
+    done.set()
+    await ticking
+    lags.sort()
+    return {
+        "polls": polls,
+        "poll_ms": wall * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+        "lag_p95_ms": lags[int(len(lags) * 0.95)] * 1000,
+        "lag_mean_ms": statistics.fmean(lags) * 1000,
+    }
+
+
+def loop_lag(polls: int) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    gateway = FakeGateway(plants=LAG_PLANTS, points=CATALOG_POINTS, seed=1)
+    with GatewayThread(gateway):
+        for name, threshold in (
+            ("inline", float("inf")),
+            ("offload", DECRYPT_OFFLOAD_THRESHOLD),
+        ):
+            loop = asyncio.new_event_loop()
+            coordinator = make_coordinator(
+                gateway.entry_data(),
+                fleet_mode=True,
+                point_chunk_size=CATALOG_POINTS,
+            )
+            coordinator.api.offload_threshold = threshold
+            try:
+                coordinator.data = loop.run_until_complete(
+                    coordinator._async_update_data()
+                )
+                results[name] = loop.run_until_complete(
+                    measure_loop_lag(coordinator, polls)
+                )
+            finally:
+                loop.run_until_complete(coordinator.async_close())
+                loop.close()
+    return results
+
+
+def run(min_time: float, repeat: int) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    loop = asyncio.new_event_loop()
+    gateway = FakeGateway(points=REALTIME_POINTS, seed=1)
+    fleet_gateway = FakeGateway(plants=20, points=REALTIME_POINTS, seed=1)
+    catalog = FakeGateway(points=CATALOG_POINTS, key_size=512).catalog
+    coordinators = []
+    try:
+        loop.run_until_complete(gateway.start())
+        loop.run_until_complete(fleet_gateway.start())
+
+        benchmarks = {
+            **crypto_benchmarks(gateway),
+            **reply_benchmarks(fleet_gateway),
+            **catalog_benchmarks(catalog),
+        }
+        for name, func in benchmarks.items():
+            results[name] = measure(func, min_time, repeat)
+
+        poll, coordinator = poll_benchmark(loop, gateway)
+        coordinators.append(coordinator)
+        results["poll_cycle"] = measure(poll, min_time, repeat)
+        poll, coordinator = poll_benchmark(loop, fleet_gateway, fleet_mode=True)
+        coordinators.append(coordinator)
+        results["poll_cycle_fleet_20"] = measure(poll, min_time, repeat)
+    finally:
+        for coordinator in coordinators:
+            loop.run_until_complete(coordinator.async_close())
+        loop.run_until_complete(gateway.stop())
+        loop.run_until_complete(fleet_gateway.stop())
+        loop.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, base in baseline.get("benchmarks", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        for metric in ("cpu_us", "peak_kib"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {base[metric]:.1f} -> {current[metric]:.1f}"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per timing run"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--lag-polls", type=int, default=LAG_POLLS, help="polls per loop-lag run"
+    )
+    args = parser.parse_args()
+
+    results = run(args.min_time, args.repeat)
+    lag = loop_lag(args.lag_polls)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": results,
+        "loop_lag": lag,
+    }
+    for name, result in results.items():
+        print(
+            f"{name:<28} {result['cpu_us']:12.1f} us cpu"
+            f" {result['wall_us']:12.1f} us wall {result['peak_kib']:10.1f} KiB peak"
+        )
+    for name, result in lag.items():
+        print(
+            f"loop_lag_{name:<19} {result['lag_max_ms']:12.1f} ms max"
+            f" {result['lag_p95_ms']:9.1f} ms p95 {result['poll_ms']:10.1f} ms/poll"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
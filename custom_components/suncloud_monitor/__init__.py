@@ -1,10 +1,13 @@
 """The Suncloud Monitor integration."""
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_change
 
-from .const import DOMAIN
+from .const import BACKFILL_IMPORT_MINUTE, CONF_BACKFILL, DEFAULT_BACKFILL, DOMAIN
 from .coordinator import SuncloudDataCoordinator
+from .storage import SuncloudStore
 
 PLATFORMS: list[str] = ["sensor"]
 
@@ -13,14 +16,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Suncloud Monitor from a config entry."""
     coordinator = SuncloudDataCoordinator(hass, entry)
     await coordinator._load_config_storage()  # ✅ nombre correcto del método
-    await coordinator.async_config_entry_first_refresh()
+    # Flush the store and close the session when Home Assistant stops.
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, coordinator._on_shutdown)
+    )
+    if coordinator.data is None:
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # Restored last values keep the sensors up while the gateway is down.
+        await coordinator.async_refresh()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    if entry.options.get(CONF_BACKFILL, DEFAULT_BACKFILL):
+        # Keep the long-term statistics current, one closed hour at a time.
+        entry.async_on_unload(
+            async_track_time_change(
+                hass,
+                coordinator.async_import_closed_hours,
+                minute=BACKFILL_IMPORT_MINUTE,
+                second=0,
+            )
+        )
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     coordinator: SuncloudDataCoordinator = hass.data[DOMAIN][entry.entry_id]
@@ -29,3 +56,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the entry's stored token, discovery cache and points."""
+    await SuncloudStore(hass, entry.entry_id).async_remove()
@@ -0,0 +1,556 @@
+"""Async client for the iSolarCloud OpenAPI gateway.
+
+Kept free of Home Assistant imports so the pyscript app can use it as well.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import random
+import string
+import time
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+import aiohttp
+import orjson
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import padding as rsa_padding
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+from .breaker import STATE_CLOSED, CircuitBreaker
+from .const import (
+    API_BASE_URL,
+    CONNECTOR_DNS_TTL,
+    CONNECTOR_KEEPALIVE,
+    CONNECTOR_LIMIT,
+    DECRYPT_OFFLOAD_THRESHOLD,
+    DEFAULT_KEY_ROTATION,
+    ENDPOINT_TIMEOUTS,
+    HISTORY_TIME_FORMAT,
+    REQUEST_RETRIES,
+    REQUEST_RETRY_DELAY,
+    REQUEST_RETRY_MAX_DELAY,
+    REQUEST_TIMEOUT,
+    TOKEN_EXPIRED_CODES,
+    TOKEN_EXPIRED_MESSAGES,
+    TOKEN_MAX_AGE,
+)
+from .metrics import ApiMetrics
+from .tracing import PayloadTracer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bytes per AES block, and so the largest PKCS7 padding.
+AES_BLOCK_SIZE = 16
+
+
+def generate_random_key(length: int = 16) -> str:
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def generate_nonce(length: int = 32) -> str:
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Return a session whose connections and DNS lookups outlive a request."""
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTOR_LIMIT,
+        keepalive_timeout=CONNECTOR_KEEPALIVE,
+        ttl_dns_cache=CONNECTOR_DNS_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+class SuncloudApiError(Exception):
+    """The gateway could not be reached or sent an unreadable reply."""
+
+
+class SuncloudCircuitOpenError(SuncloudApiError):
+    """The endpoint's circuit breaker is open; no request was made."""
+
+
+class SuncloudAuthError(SuncloudApiError):
+    """Login failed, or the token was rejected again after logging in."""
+
+
+class SuncloudCrypto:
+    """RSA + AES codec of the gateway protocol.
+
+    Every request is AES-ECB encrypted with a random session key that travels
+    RSA-encrypted in a header. The parsed RSA key is kept, and the session
+    key and its header are reused for ``key_rotation`` seconds. Pass another
+    implementation to ``SuncloudClient`` to swap the primitives.
+    """
+
+    def __init__(self, rsa_key: str, key_rotation: float = DEFAULT_KEY_ROTATION):
+        self.rsa_key = rsa_key
+        self.key_rotation = key_rotation
+        self._public_key: RSAPublicKey | None = None
+        self._public_key_b64: str | None = None
+        self._session_key: str | None = None
+        self._session_key_header = ""
+        self._session_key_expires = 0.0
+
+    def load_public_key(self, pubkey_b64: str) -> RSAPublicKey:
+        if self._public_key is None or self._public_key_b64 != pubkey_b64:
+            pubkey_bytes = base64.urlsafe_b64decode(pubkey_b64.strip())
+            pubkey = serialization.load_der_public_key(
+                pubkey_bytes, backend=default_backend()
+            )
+            if not isinstance(pubkey, RSAPublicKey):
+                raise TypeError("Public key is not an RSA public key")
+            self._public_key = pubkey
+            self._public_key_b64 = pubkey_b64
+        return self._public_key
+
+    def rsa_encrypt(self, secret: str, pubkey_b64: str | None = None) -> str:
+        try:
+            pubkey = self.load_public_key(pubkey_b64 or self.rsa_key)
+            encrypted = pubkey.encrypt(secret.encode(), rsa_padding.PKCS1v15())
+            return base64.urlsafe_b64encode(encrypted).decode()
+        except Exception as e:
+            _LOGGER.error("[RSA] ❌ %s", e)
+            return ""
+
+    def session_key(self) -> tuple[str, str]:
+        """Return the AES session key and its RSA-encrypted header value."""
+        now = time.monotonic()
+        if self._session_key is None or now >= self._session_key_expires:
+            unenc_key = generate_random_key()
+            encrypted_key = self.rsa_encrypt(unenc_key)
+            if not encrypted_key:
+                return unenc_key, encrypted_key
+            self._session_key = unenc_key
+            self._session_key_header = encrypted_key
+            self._session_key_expires = now + self.key_rotation
+        return self._session_key, self._session_key_header
+
+    def invalidate(self):
+        self._session_key = None
+        self._session_key_header = ""
+        self._session_key_expires = 0.0
+
+    @staticmethod
+    def aes_encrypt(content: str, password: str) -> str:
+        try:
+            key = password.encode().ljust(16)[:16]
+            cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
+            padder = PKCS7(128).padder()
+            padded = padder.update(content.encode()) + padder.finalize()
+            encryptor = cipher.encryptor()
+            encrypted = encryptor.update(padded) + encryptor.finalize()
+            return encrypted.hex().upper()
+        except Exception as e:
+            _LOGGER.error("[AES] ❌ %s", e)
+            return ""
+
+    @staticmethod
+    def aes_decrypt(content: str | bytes, password: str):
+        """Decrypt a hex-encoded reply and decode its JSON."""
+        return SuncloudCrypto.aes_decrypt_sized(content, password)[0]
+
+    @staticmethod
+    def aes_decrypt_sized(content: str | bytes, password: str) -> tuple[Any, int]:
+        """Decrypt and decode a reply; also return its plaintext size in bytes.
+
+        The ciphertext is decrypted into one preallocated buffer, unpadded
+        by slicing a memoryview and parsed from there, so the unhexlified
+        ciphertext is the only other copy of the reply.
+        """
+        try:
+            key = password.encode().ljust(16)[:16]
+            cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
+            decryptor = cipher.decryptor()
+            encrypted = binascii.unhexlify(content)
+            decrypted = bytearray(len(encrypted) + AES_BLOCK_SIZE - 1)
+            size = decryptor.update_into(encrypted, decrypted)
+            decryptor.finalize()
+            pad = decrypted[size - 1] if size else 0
+            if not 0 < pad <= AES_BLOCK_SIZE or (
+                decrypted.count(pad, size - pad, size) != pad
+            ):
+                raise ValueError("Invalid padding bytes.")
+            with memoryview(decrypted) as view:
+                return orjson.loads(view[: size - pad]), size - pad
+        except Exception as e:
+            _LOGGER.error("[AES] ❌ %s", e)
+            return None, 0
+
+
+class SuncloudClient:
+    """One account on the iSolarCloud OpenAPI gateway.
+
+    Requests share one pooled session and go through ``request``, which
+    applies the timeout, retries transport errors and HTTP 5xx replies with
+    backoff, and logs in again once when the token is rejected. The token is
+    reported through ``on_token`` so the caller can persist it, and every
+    HTTP request sent (retries included) through ``on_request``.
+    """
+
+    def __init__(
+        self,
+        *,
+        appkey: str,
+        access_key: str,
+        username: str,
+        password: str,
+        crypto: SuncloudCrypto,
+        base_url: str = API_BASE_URL,
+        session: aiohttp.ClientSession | None = None,
+        timeout: float = REQUEST_TIMEOUT,
+        timeouts: dict[str, float] | None = None,
+        retries: int = REQUEST_RETRIES,
+        retry_delay: float = REQUEST_RETRY_DELAY,
+        on_token: Callable[[str, float], None] | None = None,
+        on_request: Callable[[str], None] | None = None,
+        metrics: ApiMetrics | None = None,
+        tracer: PayloadTracer | None = None,
+        offload_threshold: float = DECRYPT_OFFLOAD_THRESHOLD,
+    ) -> None:
+        self.appkey = appkey
+        self.access_key = access_key
+        self.username = username
+        self.password = password
+        self.crypto = crypto
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.timeouts = ENDPOINT_TIMEOUTS if timeouts is None else timeouts
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.on_token = on_token
+        self.on_request = on_request
+        self.metrics = metrics or ApiMetrics()
+        self.tracer = tracer or PayloadTracer(_LOGGER)
+        self.offload_threshold = offload_threshold
+        self.token: str | None = None
+        self.token_issued_at = 0.0
+        self._session = session
+        self._owns_session = session is None
+        self._auth_lock = asyncio.Lock()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if not self._session or self._session.closed:
+            self._session = create_session()
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        if self._owns_session and self._session and not self._session.closed:
+            await self._session.close()
+
+    def token_too_old(self) -> bool:
+        return time.time() - self.token_issued_at > TOKEN_MAX_AGE
+
+    @staticmethod
+    def is_token_expired(decrypted: dict) -> bool:
+        return (
+            decrypted.get("result_code") in TOKEN_EXPIRED_CODES
+            or decrypted.get("result_msg") in TOKEN_EXPIRED_MESSAGES
+        )
+
+    async def ensure_token(self):
+        """Log in when there is no token yet or it is due for renewal."""
+        if not self.token or self.token_too_old():
+            await self.refresh_token(self.token)
+
+    async def refresh_token(self, stale_token: str | None):
+        """Log in again unless another request already replaced ``stale_token``."""
+        async with self._auth_lock:
+            if self.token == stale_token:
+                await self.login()
+
+    def build_headers(self, encrypted_key: str, token: str | None = None) -> dict:
+        headers = {
+            "Content-Type": "application/json;charset=UTF-8",
+            "sys_code": "901",
+            "x-access-key": self.access_key,
+            "x-random-secret-key": encrypted_key,
+        }
+        if token:
+            headers["token"] = token
+        return headers
+
+    def build_encrypted_payload(
+        self, payload: dict, token: str | None, unenc_key: str
+    ) -> str:
+        payload = {
+            **payload,
+            "appkey": self.appkey,
+            "token": token,
+            "lang": "_en_US",
+            "api_key_param": {
+                "nonce": generate_nonce(),
+                "timestamp": str(int(time.time() * 1000)),
+            },
+        }
+        return self.crypto.aes_encrypt(json.dumps(payload), unenc_key)
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker()
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry ``attempt``: half fixed, half random."""
+        delay = min(self.retry_delay * 2 ** (attempt - 1), REQUEST_RETRY_MAX_DELAY)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _send(
+        self, endpoint: str, headers: dict, body: str, tag: str, timeout: float
+    ) -> bytes:
+        """Post ``body`` and return the raw reply, retrying transient errors."""
+        url = f"{self.base_url}/{endpoint}"
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff(attempt))
+            if self.on_request:
+                self.on_request(endpoint)
+            try:
+                async with self.session.post(
+                    url, headers=headers, data=body, timeout=client_timeout
+                ) as response:
+                    raw = await response.read()
+                    status = response.status
+            except (aiohttp.ClientError, TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if status < 500:
+                    return raw
+                error = f"HTTP {status}"
+            _LOGGER.warning(
+                "[%s] ⚠️ %s (attempt %d of %d)",
+                tag,
+                error,
+                attempt + 1,
+                self.retries + 1,
+            )
+        raise SuncloudApiError(f"[{tag}] ❌ {error}")
+
+    async def _exchange(
+        self,
+        endpoint: str,
+        headers: dict,
+        body: str,
+        unenc_key: str,
+        tag: str,
+        crypto_time: float = 0.0,
+        traced: bool = False,
+    ) -> dict:
+        """Post ``body`` to ``endpoint`` and return the decrypted reply.
+
+        ``crypto_time`` is the time already spent building the request; it
+        is recorded in the endpoint metrics with the reply's decryption.
+        The reply is logged when ``traced`` (see ``PayloadTracer``).
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise SuncloudCircuitOpenError(
+                f"[{tag}] ❌ {endpoint} paused after {breaker.failures} failures,"
+                f" retrying in {breaker.retry_in():.0f}s"
+            )
+        metrics = self.metrics.endpoint(endpoint)
+        started = time.perf_counter()
+        try:
+            raw = await self._send(
+                endpoint,
+                headers,
+                body,
+                tag,
+                self.timeouts.get(endpoint, self.timeout),
+            )
+        except SuncloudApiError:
+            metrics.record_error(time.perf_counter() - started, crypto_time, "error")
+            breaker.record_failure()
+            if breaker.state != STATE_CLOSED:
+                _LOGGER.warning(
+                    "[%s] ⚠️ %s paused for %ds", tag, endpoint, breaker.cooldown
+                )
+            raise
+        except BaseException:
+            breaker.abandon()
+            raise
+        breaker.record_success()
+        latency = time.perf_counter() - started
+        if traced:
+            self.tracer.trace(tag, "🔐", raw)
+
+        started = time.perf_counter()
+        decrypted, plaintext_size = await self._decrypt(raw, unenc_key)
+        crypto_time += time.perf_counter() - started
+        if traced:
+            self.tracer.trace(tag, "🔓", decrypted)
+        if not decrypted or not isinstance(decrypted, dict):
+            metrics.record_error(latency, crypto_time, "undecryptable")
+            self.crypto.invalidate()
+            raise SuncloudApiError(f"[{tag}] ❌ Decryption failed")
+        metrics.record(
+            latency,
+            crypto_time,
+            len(body),
+            len(raw),
+            str(decrypted.get("result_code")),
+            decrypted=plaintext_size,
+        )
+        return decrypted
+
+    async def _decrypt(self, raw: bytes, unenc_key: str) -> tuple[Any, int]:
+        """Decrypt and decode a reply, off the event loop when it is large."""
+        if len(raw) < self.offload_threshold:
+            return self.crypto.aes_decrypt_sized(raw, unenc_key)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.crypto.aes_decrypt_sized, raw, unenc_key
+        )
+
+    async def login(self) -> str:
+        started = time.perf_counter()
+        unenc_key, encrypted_key = self.crypto.session_key()
+        payload = {
+            "api_key_param": {
+                "nonce": generate_nonce(),
+                "timestamp": str(int(time.time() * 1000)),
+            },
+            "appkey": self.appkey,
+            "login_type": "1",
+            "user_account": self.username,
+            "user_password": self.password,
+        }
+        body = self.crypto.aes_encrypt(json.dumps(payload), unenc_key)
+        crypto_time = time.perf_counter() - started
+        if traced := self.tracer.start():
+            self.tracer.trace("LOGIN", "🔓", payload)
+        decrypted = await self._exchange(
+            "login",
+            self.build_headers(encrypted_key),
+            body,
+            unenc_key,
+            "LOGIN",
+            crypto_time,
+            traced,
+        )
+        token = (decrypted.get("result_data") or {}).get("token")
+        if not token:
+            raise SuncloudAuthError("[AUTH] ❌ Missing token")
+        self.token = token
+        self.token_issued_at = time.time()
+        if self.on_token:
+            self.on_token(self.token, self.token_issued_at)
+        return token
+
+    async def request(
+        self, endpoint: str, payload: dict, tag: str, retry_auth: bool = True
+    ) -> dict:
+        """Encrypt ``payload``, post it to ``endpoint`` and return the reply.
+
+        When the gateway reports an expired or invalid token, log in again
+        once and replay the request with the new token.
+        """
+        token = self.token
+        started = time.perf_counter()
+        unenc_key, encrypted_key = self.crypto.session_key()
+        body = self.build_encrypted_payload(payload, token, unenc_key)
+        crypto_time = time.perf_counter() - started
+        if traced := self.tracer.start():
+            self.tracer.trace(tag, "🔓", payload)
+            self.tracer.trace(tag, "🔐", body)
+        decrypted = await self._exchange(
+            endpoint,
+            self.build_headers(encrypted_key, token),
+            body,
+            unenc_key,
+            tag,
+            crypto_time,
+            traced,
+        )
+        if self.is_token_expired(decrypted):
+            if not retry_auth:
+                raise SuncloudAuthError(f"[{tag}] ❌ Token rejected after re-login")
+            _LOGGER.info("[%s] 🔑 Token expired, logging in again", tag)
+            await self.refresh_token(token)
+            return await self.request(endpoint, payload, tag, retry_auth=False)
+        return decrypted
+
+    async def power_stations(self, page: int = 1, size: int = 10) -> dict[str, Any]:
+        """Return one page of power stations (``pageList`` and ``rowCount``)."""
+        decrypted = await self.request(
+            "getPowerStationList", {"curPage": page, "size": size}, "PS_ID"
+        )
+        return decrypted.get("result_data") or {}
+
+    async def device_list(self, ps_id, page: int = 1, size: int = 50) -> list[dict]:
+        decrypted = await self.request(
+            "getDeviceList", {"curPage": page, "size": size, "ps_id": ps_id}, "SN"
+        )
+        return (decrypted.get("result_data") or {}).get("pageList", [])
+
+    async def power_station_detail(self, sn: str) -> dict[str, Any]:
+        decrypted = await self.request(
+            "getPowerStationDetail", {"sn": sn, "is_get_ps_remarks": "1"}, "PS_KEY"
+        )
+        return decrypted.get("result_data") or {}
+
+    async def point_info(self, device_type: int = 11, size: int = 999) -> list[dict]:
+        """Return the point catalog of ``device_type`` devices."""
+        decrypted = await self.request(
+            "getOpenPointInfo",
+            {"device_type": device_type, "type": 2, "curPage": 1, "size": size},
+            "POINTS",
+        )
+        result_data = decrypted.get("result_data")
+        if isinstance(result_data, dict):
+            return result_data.get("pageList", [])
+        if isinstance(result_data, list):
+            return result_data
+        return []
+
+    async def realtime(
+        self, ps_keys: list, point_ids: list, device_type: int = 11
+    ) -> list[dict]:
+        """Return the ``device_point_list`` of the current point values."""
+        decrypted = await self.request(
+            "getDeviceRealTimeData",
+            {
+                "device_type": device_type,
+                "point_id_list": point_ids,
+                "ps_key_list": ps_keys,
+            },
+            "REALTIME",
+        )
+        result_data = decrypted.get("result_data")
+        if not result_data:
+            raise SuncloudApiError("[REALTIME] ❌ Missing result_data")
+        return result_data.get("device_point_list", [])
+
+    async def minute_data(
+        self,
+        ps_keys: list,
+        point_ids: list,
+        start: datetime,
+        end: datetime,
+        minute_interval: int = 5,
+    ) -> dict[str, list[dict]]:
+        """Return historical point rows per ps_key between ``start`` and ``end``."""
+        decrypted = await self.request(
+            "getDevicePointMinuteDataList",
+            {
+                "ps_key_list": ps_keys,
+                "points": ",".join(f"p{point_id}" for point_id in point_ids),
+                "start_time_stamp": start.strftime(HISTORY_TIME_FORMAT),
+                "end_time_stamp": end.strftime(HISTORY_TIME_FORMAT),
+                "minute_interval": minute_interval,
+                "is_get_data_acquisition_time": "1",
+            },
+            "HISTORY",
+        )
+        return decrypted.get("result_data") or {}
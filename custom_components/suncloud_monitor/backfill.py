@@ -0,0 +1,287 @@
+"""Backfill of missed history into long-term statistics."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_FIRST_RUN_AGE,
+    BACKFILL_MAX_AGE,
+    BACKFILL_WINDOW,
+    DOMAIN,
+    HISTORY_TIME_FORMAT,
+    QUOTA_BACKFILL_RESERVE,
+)
+from .tiers import TIER_FAST, TIER_NORMAL, TIER_SLOW, point_tier
+
+if TYPE_CHECKING:
+    from .coordinator import SuncloudDataCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def statistic_id(point_id: str, ps_key: str | None = None) -> str:
+    suffix = f"{ps_key}_{point_id}" if ps_key else point_id
+    return f"{DOMAIN}:point_{suffix}".lower()
+
+
+def parse_history_row(row: dict[str, Any]) -> tuple[datetime, dict[str, float]]:
+    """Return the local timestamp and numeric point values of a history row."""
+    when = datetime.strptime(row["time_stamp"], HISTORY_TIME_FORMAT)
+    values = {}
+    for key, val in row.items():
+        if not (key.startswith("p") and key[1:].isdigit()):
+            continue
+        try:
+            values[key[1:]] = float(val)
+        except (TypeError, ValueError):
+            continue
+    return when.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE), values
+
+
+class PointStatistics:
+    """Hourly statistics of one point, built from a stream of samples.
+
+    Power-like points get mean/min/max per hour. Energy and hour counters
+    get state/sum; a drop in the counter is taken as a reset to zero, which
+    covers both lifetime and daily counters.
+    """
+
+    def __init__(self, metadata: dict[str, Any]) -> None:
+        self.metadata = metadata
+        self.after: datetime | None = None
+        self._sum = 0.0
+        self._state: float | None = None
+        self._hour: datetime | None = None
+        self._count = 0
+        self._total = 0.0
+        self._min = 0.0
+        self._max = 0.0
+
+    @property
+    def has_sum(self) -> bool:
+        return self.metadata["has_sum"]
+
+    def resume(self, last: dict[str, Any] | None, earliest: datetime) -> None:
+        """Continue after the last imported hour, or from ``earliest``."""
+        if not last:
+            self.after = earliest
+            return
+        after = dt_util.utc_from_timestamp(last["start"]) + timedelta(hours=1)
+        self._sum = last.get("sum") or 0.0
+        if after < earliest:
+            # The hours in between are lost; start a new baseline rather
+            # than put the counter's whole change into the first hour.
+            self.after = earliest
+            return
+        self.after = after
+        self._state = last.get("state")
+
+    def add(self, when: datetime, value: float) -> dict[str, Any] | None:
+        """Add a sample; return the previous hour once it is complete."""
+        if self.after is not None and when < self.after:
+            return None
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        row = None
+        if hour != self._hour:
+            row = self.finish()
+            self._hour = hour
+            self._min = self._max = value
+        self._count += 1
+        self._total += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+        if self.has_sum:
+            if self._state is not None:
+                delta = value - self._state
+                self._sum += value if delta < 0 else delta
+            self._state = value
+        return row
+
+    def finish(self) -> dict[str, Any] | None:
+        """Return the hour being built, if any, and start over."""
+        if not self._count:
+            return None
+        if self.has_sum:
+            row = {"start": self._hour, "state": self._state, "sum": self._sum}
+        else:
+            row = {
+                "start": self._hour,
+                "mean": self._total / self._count,
+                "min": self._min,
+                "max": self._max,
+            }
+        self._hour = None
+        self._count = 0
+        self._total = 0.0
+        return row
+
+
+class SuncloudBackfill:
+    """Fill gaps in the long-term statistics of the coordinator's points.
+
+    History is paged from the gateway one window at a time and consumed as
+    a stream, so only the current page and at most ``BACKFILL_BATCH_SIZE``
+    finished hours per point are held in memory, however long the outage.
+
+    Each window first asks the API call budget; while less than
+    ``QUOTA_BACKFILL_RESERVE`` is left the run stops, ``deferred`` is set,
+    and a later run resumes after the last imported hour.
+    """
+
+    def __init__(self, coordinator: SuncloudDataCoordinator) -> None:
+        self.coordinator = coordinator
+        self.hass = coordinator.hass
+        self.deferred = False
+
+    def _series(self) -> dict[tuple[str, str], PointStatistics]:
+        coordinator = self.coordinator
+        if coordinator.fleet_mode:
+            plants = {
+                ps_key: plant.get("ps_name") or ps_key
+                for ps_key, plant in coordinator.plants.items()
+            }
+        elif coordinator.ps_key:
+            plants = {coordinator.ps_key: None}
+        else:
+            plants = {}
+
+        series = {}
+        for point_id, config in coordinator.points.items():
+            tier = point_tier(config)
+            if tier not in (TIER_FAST, TIER_NORMAL, TIER_SLOW):
+                continue
+            name = config.get("point_name") or config.get("name") or point_id
+            for ps_key, plant_name in plants.items():
+                series[(ps_key, point_id)] = PointStatistics(
+                    {
+                        "has_mean": tier != TIER_SLOW,
+                        "has_sum": tier == TIER_SLOW,
+                        "name": f"{plant_name or 'Sungrow'} {point_id} - {name}",
+                        "source": DOMAIN,
+                        "statistic_id": statistic_id(
+                            point_id, ps_key if coordinator.fleet_mode else None
+                        ),
+                        "unit_of_measurement": config.get("unit")
+                        or config.get("storage_unit"),
+                    }
+                )
+        return series
+
+    async def async_run(self) -> int:
+        """Import every missing complete hour; return the rows imported."""
+        self.deferred = False
+        series = self._series()
+        if not series:
+            return 0
+        end = dt_util.now().replace(minute=0, second=0, microsecond=0)
+        earliest = end - timedelta(seconds=BACKFILL_MAX_AGE)
+        # Points without statistics yet (a fresh install) only get the last
+        # day rather than the whole BACKFILL_MAX_AGE.
+        first_run = end - timedelta(
+            seconds=min(BACKFILL_MAX_AGE, BACKFILL_FIRST_RUN_AGE)
+        )
+        last = await self._async_last_statistics(
+            [stats.metadata["statistic_id"] for stats in series.values()]
+        )
+        for stats in series.values():
+            previous = last.get(stats.metadata["statistic_id"])
+            stats.resume(previous, earliest if previous else first_run)
+        start = min(stats.after for stats in series.values())
+        if start >= end:
+            return 0
+
+        ps_keys = sorted({ps_key for ps_key, _ in series})
+        point_ids = sorted({point_id for _, point_id in series})
+        windows = -(-(end - start) // timedelta(seconds=BACKFILL_WINDOW))
+        _LOGGER.info(
+            "[BACKFILL] Importing history from %s to %s in %d requests",
+            start,
+            end,
+            windows * self.coordinator.history_requests(ps_keys, point_ids),
+        )
+        pending: dict[tuple[str, str], list[dict]] = {key: [] for key in series}
+        imported = 0
+        try:
+            async for ps_key, when, values in self._iter_history(
+                ps_keys, point_ids, start, end
+            ):
+                for point_id, value in values.items():
+                    key = (ps_key, point_id)
+                    if key not in series:
+                        continue
+                    row = series[key].add(when, value)
+                    if row is None:
+                        continue
+                    pending[key].append(row)
+                    if len(pending[key]) >= BACKFILL_BATCH_SIZE:
+                        imported += self._import(series[key], pending[key])
+                        pending[key] = []
+            for key, stats in series.items():
+                row = stats.finish()
+                if row is not None:
+                    pending[key].append(row)
+        finally:
+            # Hours finished so far are complete and safe to keep; the next
+            # run resumes after the last one imported.
+            for key, rows in pending.items():
+                imported += self._import(series[key], rows)
+        return imported
+
+    async def _iter_history(
+        self, ps_keys: list, point_ids: list, start: datetime, end: datetime
+    ) -> AsyncIterator[tuple[str, datetime, dict[str, float]]]:
+        """Yield ``(ps_key, time, values)`` rows from ``start`` until ``end``."""
+        window = timedelta(seconds=BACKFILL_WINDOW)
+        window_start = start
+        while window_start < end:
+            if not self.coordinator.budget.allows(QUOTA_BACKFILL_RESERVE):
+                self.deferred = True
+                _LOGGER.info(
+                    "[BACKFILL] Deferred at %s, API call budget is low", window_start
+                )
+                return
+            window_end = min(window_start + window, end)
+            async for ps_key, row in self.coordinator._iter_history(
+                ps_keys, point_ids, window_start, window_end
+            ):
+                when, values = parse_history_row(row)
+                if window_start <= when < window_end:
+                    yield ps_key, when, values
+            window_start = window_end
+
+    async def _async_last_statistics(
+        self, statistic_ids: list[str]
+    ) -> dict[str, dict[str, Any]]:
+        """Return the last imported row of each statistic that has one."""
+        # The recorder is only an after-dependency; import it on first use.
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import get_last_statistics
+
+        def read_last() -> dict[str, dict[str, Any]]:
+            last = {}
+            for statistic_id in statistic_ids:
+                rows = get_last_statistics(
+                    self.hass, 1, statistic_id, False, {"state", "sum"}
+                ).get(statistic_id)
+                if rows:
+                    last[statistic_id] = rows[0]
+            return last
+
+        return await get_instance(self.hass).async_add_executor_job(read_last)
+
+    def _import(self, stats: PointStatistics, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        async_add_external_statistics(self.hass, stats.metadata, rows)
+        return len(rows)
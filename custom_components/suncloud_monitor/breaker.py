@@ -0,0 +1,76 @@
+"""Circuit breaker for gateway endpoints."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from .const import BREAKER_COOLDOWN, BREAKER_THRESHOLD
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint that keeps failing.
+
+    After ``threshold`` consecutive failed requests (each already retried)
+    the circuit opens and calls are refused for ``cooldown`` seconds. Then
+    one trial call is let through: success closes the circuit, failure opens
+    it for another cooldown.
+    """
+
+    def __init__(
+        self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return STATE_CLOSED
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    def retry_in(self) -> float:
+        """Seconds until the next trial call is allowed."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    def abandon(self) -> None:
+        """Forget a trial call that ended without an outcome (cancelled)."""
+        self._trial = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in": round(self.retry_in(), 1),
+        }
@@ -1,11 +1,8 @@
 """Config flow for Suncloud Monitor integration."""
 
-import voluptuous as vol
-import yaml  # type: ignore
-import aiofiles  # type: ignore
-from pathlib import Path
 from typing import Any
 
+import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.helpers.selector import (
@@ -15,40 +12,83 @@ from homeassistant.helpers.selector import (
     TextSelectorConfig,
 )
 
-from .const import DOMAIN, CONF_POINTS
-
-
-async def load_points_from_yaml(hass) -> dict[str, Any]:
-    path = Path(
-        hass.config.path("custom_components/suncloud_monitor/config_storage.yaml")
-    )
-    if path.exists():
-        async with aiofiles.open(path, "r") as f:
-            raw = await f.read()
-        try:
-            data = yaml.safe_load(raw)
-            return data.get("points", {}) if isinstance(data, dict) else {}
-        except Exception:
-            return {}
-    return {}
-
-
-async def save_points_to_yaml(hass, selected_points: dict[str, Any]) -> None:
-    """Save the filtered points list to config_storage.yaml, preserving other fields."""
-    path = Path(
-        hass.config.path("custom_components/suncloud_monitor/config_storage.yaml")
-    )
-    data = {}
-    if path.exists():
-        async with aiofiles.open(path, "r") as f:
-            raw = await f.read()
-            try:
-                data = yaml.safe_load(raw)
-            except Exception:
-                data = {}
-    data["points"] = selected_points
-    async with aiofiles.open(path, "w") as f:
-        await f.write(yaml.dump(data))
+from .const import (
+    API_BASE_URL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_BACKFILL,
+    CONF_DAILY_CALL_LIMIT,
+    CONF_FLEET_MODE,
+    CONF_GATEWAY_URL,
+    CONF_KEY_ROTATION,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_NIGHT_POLL_INTERVAL,
+    CONF_POINT_CHUNK_SIZE,
+    CONF_POINTS,
+    CONF_TIER_NORMAL_INTERVAL,
+    CONF_TIER_SLOW_INTERVAL,
+    CONF_TIER_STATIC_INTERVAL,
+    CONF_TRACE_SAMPLE_EVERY,
+    DEFAULT_BACKFILL,
+    DEFAULT_DAILY_CALL_LIMIT,
+    DEFAULT_KEY_ROTATION,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_NIGHT_POLL_INTERVAL,
+    DEFAULT_POINT_CHUNK_SIZE,
+    DEFAULT_TIER_NORMAL_INTERVAL,
+    DEFAULT_TIER_SLOW_INTERVAL,
+    DEFAULT_TIER_STATIC_INTERVAL,
+    DOMAIN,
+    TRACE_SAMPLE_EVERY,
+)
+from .storage import SuncloudStore
+
+# Scalar options shown in the options flow, with their defaults. The type of
+# each default is also the voluptuous validator for the field.
+OPTION_DEFAULTS: dict[str, Any] = {
+    "poll_interval": 300,
+    CONF_KEY_ROTATION: DEFAULT_KEY_ROTATION,
+    CONF_FLEET_MODE: False,
+    CONF_POINT_CHUNK_SIZE: DEFAULT_POINT_CHUNK_SIZE,
+    CONF_MAX_CONCURRENCY: DEFAULT_MAX_CONCURRENCY,
+    CONF_ADAPTIVE_POLLING: False,
+    CONF_MAX_POLL_INTERVAL: DEFAULT_MAX_POLL_INTERVAL,
+    CONF_NIGHT_POLL_INTERVAL: DEFAULT_NIGHT_POLL_INTERVAL,
+    CONF_TIER_NORMAL_INTERVAL: DEFAULT_TIER_NORMAL_INTERVAL,
+    CONF_TIER_SLOW_INTERVAL: DEFAULT_TIER_SLOW_INTERVAL,
+    CONF_TIER_STATIC_INTERVAL: DEFAULT_TIER_STATIC_INTERVAL,
+    CONF_BACKFILL: DEFAULT_BACKFILL,
+    CONF_TRACE_SAMPLE_EVERY: TRACE_SAMPLE_EVERY,
+    CONF_DAILY_CALL_LIMIT: DEFAULT_DAILY_CALL_LIMIT,
+    CONF_MAX_STALENESS: DEFAULT_MAX_STALENESS,
+}
+
+# Lower bounds of numeric options: a zero chunk size, concurrency or
+# interval would stall or break polling. Other options only get the type
+# check of their default.
+OPTION_MINIMUMS: dict[str, int] = {
+    "poll_interval": 1,
+    CONF_KEY_ROTATION: 0,
+    CONF_POINT_CHUNK_SIZE: 1,
+    CONF_MAX_CONCURRENCY: 1,
+    CONF_MAX_POLL_INTERVAL: 1,
+    CONF_NIGHT_POLL_INTERVAL: 1,
+    CONF_TIER_NORMAL_INTERVAL: 1,
+    CONF_TIER_SLOW_INTERVAL: 1,
+    CONF_TIER_STATIC_INTERVAL: 1,
+    CONF_TRACE_SAMPLE_EVERY: 1,
+    CONF_DAILY_CALL_LIMIT: 0,
+    CONF_MAX_STALENESS: 0,
+}
+
+
+def option_validator(key: str, default: Any):
+    if key in OPTION_MINIMUMS:
+        return vol.All(type(default), vol.Range(min=OPTION_MINIMUMS[key]))
+    return type(default)
 
 
 class SuncloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -84,6 +124,7 @@ class SuncloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                             mode="password",
                         )
                     ),
+                    vol.Optional(CONF_GATEWAY_URL, default=API_BASE_URL): str,
                 }
             ),
         )
@@ -100,7 +141,14 @@ class SuncloudOptionsFlow(config_entries.OptionsFlow):
         self._entry = entry
 
     async def async_step_init(self, user_input=None):
-        points = await load_points_from_yaml(self.hass)
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+        if coordinator is not None:
+            points = coordinator.points
+        else:
+            # The entry is not loaded (e.g. its first setup failed): edit the
+            # stored catalog and selection instead.
+            store = SuncloudStore(self.hass, self._entry.entry_id)
+            points = (await store.async_load()).get(CONF_POINTS, {})
         all_point_ids = sorted(points.keys())
 
         options = [
@@ -127,10 +175,20 @@ class SuncloudOptionsFlow(config_entries.OptionsFlow):
             selected_points = {
                 pid: points[pid] for pid in user_input[CONF_POINTS] if pid in points
             }
-            await save_points_to_yaml(self.hass, selected_points)
-            await self.hass.config_entries.async_reload(self._entry.entry_id)
+            if coordinator is not None:
+                await coordinator.async_set_points(selected_points)
+            else:
+                store.data[CONF_POINTS] = selected_points
+                await store.async_save()
             return self.async_create_entry(
-                title="", data={CONF_POINTS: user_input[CONF_POINTS]}
+                title="",
+                data={
+                    CONF_POINTS: user_input[CONF_POINTS],
+                    **{
+                        key: user_input.get(key, default)
+                        for key, default in OPTION_DEFAULTS.items()
+                    },
+                },
             )
         return self.async_show_form(
             step_id="init",
@@ -143,17 +201,21 @@ class SuncloudOptionsFlow(config_entries.OptionsFlow):
                             translation_key="point_selector",
                         )
                     ),
-                    vol.Optional(
-                        "poll_interval",
-                        default=self._entry.options.get("poll_interval", 300),
-                    ): int,
+                    **{
+                        vol.Optional(
+                            key, default=self._entry.options.get(key, default)
+                        ): option_validator(key, default)
+                        for key, default in OPTION_DEFAULTS.items()
+                    },
                     vol.Optional("repopulate", default=False): bool,
                 }
             ),
         )
 
     async def async_step_repopulate(self, user_input=None):
-        coordinator = self.hass.data[DOMAIN][self._entry.entry_id]
-        await coordinator._fetch_points()
+        coordinator = self.hass.data.get(DOMAIN, {}).get(self._entry.entry_id)
+        if coordinator is None:
+            return self.async_abort(reason="not_loaded")
+        await coordinator.async_refresh_points()
         await self.hass.config_entries.async_reload(self._entry.entry_id)
         return await self.async_step_init()
@@ -4,9 +4,137 @@ DOMAIN = "suncloud_monitor"
 PLATFORMS = ["sensor"]
 CONFIG_STORAGE_FILE = "custom_components/suncloud_monitor/config_storage.yaml"
 CONF_POINTS = "points"
+API_BASE_URL = "https://gateway.isolarcloud.eu/openapi"
+# Regional gateway (or a local stand-in) used instead of API_BASE_URL.
+CONF_GATEWAY_URL = "gateway_url"
 
 CONF_APPKEY = "appkey"
 CONF_ACCESS_KEY = "access_key"
 CONF_RSA_KEY = "rsa_key"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
+
+# Gateway requests time out after REQUEST_TIMEOUT seconds, or the endpoint's
+# own timeout; transport errors and HTTP 5xx replies are retried
+# REQUEST_RETRIES times with jittered exponential backoff starting at
+# REQUEST_RETRY_DELAY seconds and capped at REQUEST_RETRY_MAX_DELAY.
+REQUEST_TIMEOUT = 30
+ENDPOINT_TIMEOUTS = {
+    "login": 15,
+    "getDeviceRealTimeData": 20,
+    "getOpenPointInfo": 60,
+    "getDevicePointMinuteDataList": 60,
+}
+REQUEST_RETRIES = 2
+REQUEST_RETRY_DELAY = 1.0
+REQUEST_RETRY_MAX_DELAY = 30.0
+
+# An endpoint failing BREAKER_THRESHOLD requests in a row (after retries) is
+# not called again for BREAKER_COOLDOWN seconds (see breaker.py).
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 300
+
+# Connection pool of the gateway session: keep-alive connections and DNS
+# lookups are reused across polls instead of a new TCP+TLS handshake each.
+CONNECTOR_LIMIT = 10
+CONNECTOR_KEEPALIVE = 60
+CONNECTOR_DNS_TTL = 300
+
+# Gateway endpoints with per-endpoint metrics (see metrics.py), and the upper
+# bounds in seconds of the latency histogram buckets.
+API_ENDPOINTS = (
+    "login",
+    "getPowerStationList",
+    "getDeviceList",
+    "getPowerStationDetail",
+    "getOpenPointInfo",
+    "getDeviceRealTimeData",
+    "getDevicePointMinuteDataList",
+)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# With debug logging on, payloads of every TRACE_SAMPLE_EVERY-th request are
+# logged, cut to TRACE_MAX_CHARS characters (see tracing.py).
+CONF_TRACE_SAMPLE_EVERY = "trace_sample_every"
+TRACE_SAMPLE_EVERY = 1
+TRACE_MAX_CHARS = 2000
+
+# Replies of at least this many (hex) characters are decrypted and decoded in
+# an executor thread instead of on the event loop; smaller ones stay inline,
+# where the thread handoff would cost more than it saves.
+DECRYPT_OFFLOAD_THRESHOLD = 64 * 1024
+
+# Daily call limit of an access key, shared by every entry using it (0: not
+# known, calls are only counted). Poll intervals stretch up to
+# QUOTA_MAX_STRETCH times while calls run ahead of an even spread over the
+# day, and a tier is skipped once the remaining share of the budget drops
+# below its reserve (see quota.py); fast points go last. History backfill
+# and discovery revalidation wait while less than their reserve is left.
+CONF_DAILY_CALL_LIMIT = "daily_call_limit"
+DEFAULT_DAILY_CALL_LIMIT = 0
+QUOTA_MAX_STRETCH = 8
+QUOTA_TIER_RESERVES = {"static": 0.3, "normal": 0.2, "slow": 0.1}
+QUOTA_BACKFILL_RESERVE = 0.5
+QUOTA_REVALIDATE_RESERVE = 0.3
+
+CONF_KEY_ROTATION = "key_rotation"
+DEFAULT_KEY_ROTATION = 3600
+
+CONF_FLEET_MODE = "fleet_mode"
+FLEET_PAGE_SIZE = 100
+FLEET_CONCURRENCY = 8
+REALTIME_MAX_PS_KEYS = 50
+
+CONF_POINT_CHUNK_SIZE = "point_chunk_size"
+CONF_MAX_CONCURRENCY = "max_concurrency"
+DEFAULT_POINT_CHUNK_SIZE = 100
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Tokens are refreshed proactively after this many seconds, and reactively
+# whenever the gateway answers with one of these result codes or messages.
+TOKEN_MAX_AGE = 3 * 24 * 3600
+TOKEN_EXPIRED_CODES = {"E00003"}
+TOKEN_EXPIRED_MESSAGES = {"er_token_login_invalid"}
+
+# Cached ps_id/sn/ps_key/plants and point catalog are used straight away on
+# startup and revalidated in the background once older than the TTL.
+DISCOVERY_CACHE_VERSION = 1
+DISCOVERY_CACHE_TTL = 7 * 24 * 3600
+
+# The last values are stored with the time each tier was fetched and restored
+# on startup. While the gateway fails they stay available for up to
+# max_staleness seconds after the last update that fetched values.
+CONF_MAX_STALENESS = "max_staleness"
+DEFAULT_MAX_STALENESS = 3600
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+CONF_NIGHT_POLL_INTERVAL = "night_poll_interval"
+DEFAULT_MAX_POLL_INTERVAL = 1800
+DEFAULT_NIGHT_POLL_INTERVAL = 3600
+
+# Refresh interval per point tier (see tiers.py); fast points are fetched on
+# every poll.
+CONF_TIER_NORMAL_INTERVAL = "tier_normal_interval"
+CONF_TIER_SLOW_INTERVAL = "tier_slow_interval"
+CONF_TIER_STATIC_INTERVAL = "tier_static_interval"
+DEFAULT_TIER_NORMAL_INTERVAL = 600
+DEFAULT_TIER_SLOW_INTERVAL = 900
+DEFAULT_TIER_STATIC_INTERVAL = 24 * 3600
+
+# Missed history is read back from the minute-data endpoint one window at a
+# time, at most BACKFILL_MAX_AGE into the past (BACKFILL_FIRST_RUN_AGE for
+# points without statistics yet), and imported into long-term statistics in
+# batches of BACKFILL_BATCH_SIZE hours per point. Off unless enabled, as
+# every window costs one request per point chunk and plant batch. Once
+# enabled, each closed hour is imported at minute BACKFILL_IMPORT_MINUTE of
+# the next, so only outages leave gaps to fill.
+CONF_BACKFILL = "backfill"
+DEFAULT_BACKFILL = False
+BACKFILL_IMPORT_MINUTE = 10
+BACKFILL_WINDOW = 3 * 3600
+BACKFILL_MAX_AGE = 7 * 24 * 3600
+BACKFILL_FIRST_RUN_AGE = 24 * 3600
+BACKFILL_MINUTE_INTERVAL = 5
+BACKFILL_BATCH_SIZE = 24
+HISTORY_TIME_FORMAT = "%Y%m%d%H%M%S"
@@ -1,49 +1,86 @@
+import asyncio
 import logging
-import base64
-import json
-import random
-import string
 import time
-from pathlib import Path
-from datetime import timedelta
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
 from typing import Any
 
-import aiohttp
-import yaml  # type: ignore
-import aiofiles  # type: ignore
-
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import padding as rsa_padding
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives.padding import PKCS7
-from cryptography.hazmat.backends import default_backend
-
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import SUN_EVENT_SUNRISE
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.sun import get_astral_event_next, is_up
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
+from .api import SuncloudClient, SuncloudCrypto
+from .backfill import SuncloudBackfill
 from .const import (
-    CONFIG_STORAGE_FILE,
+    API_BASE_URL,
+    BACKFILL_MINUTE_INTERVAL,
     CONF_ACCESS_KEY,
+    CONF_ADAPTIVE_POLLING,
     CONF_APPKEY,
-    CONF_USERNAME,
+    CONF_BACKFILL,
+    CONF_DAILY_CALL_LIMIT,
+    CONF_FLEET_MODE,
+    CONF_GATEWAY_URL,
+    CONF_KEY_ROTATION,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_NIGHT_POLL_INTERVAL,
     CONF_PASSWORD,
+    CONF_POINT_CHUNK_SIZE,
     CONF_RSA_KEY,
+    CONF_TIER_NORMAL_INTERVAL,
+    CONF_TIER_SLOW_INTERVAL,
+    CONF_TIER_STATIC_INTERVAL,
+    CONF_TRACE_SAMPLE_EVERY,
+    CONF_USERNAME,
+    DEFAULT_BACKFILL,
+    DEFAULT_DAILY_CALL_LIMIT,
+    DEFAULT_KEY_ROTATION,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_NIGHT_POLL_INTERVAL,
+    DEFAULT_POINT_CHUNK_SIZE,
+    DEFAULT_TIER_NORMAL_INTERVAL,
+    DEFAULT_TIER_SLOW_INTERVAL,
+    DEFAULT_TIER_STATIC_INTERVAL,
+    DISCOVERY_CACHE_TTL,
+    DISCOVERY_CACHE_VERSION,
+    FLEET_CONCURRENCY,
+    FLEET_PAGE_SIZE,
+    QUOTA_BACKFILL_RESERVE,
+    QUOTA_REVALIDATE_RESERVE,
+    REALTIME_MAX_PS_KEYS,
+    TRACE_SAMPLE_EVERY,
 )
+from .quota import get_budget
+from .scheduler import AdaptivePollScheduler
+from .singleflight import SingleFlight
+from .storage import SuncloudStore
+from .tiers import (
+    TIER_FAST,
+    TIER_NORMAL,
+    TIER_SLOW,
+    TIER_STATIC,
+    TierSchedule,
+    point_tier,
+)
+from .tracing import PayloadTracer
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def generate_random_key(length: int = 16) -> str:
-    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
-
-
-def generate_nonce(length: int = 32) -> str:
-    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+def chunked(items: list, size: int) -> list[list]:
+    starts = range(0, len(items), size)
+    ends = range(size, len(items) + size, size)
+    return [items[start:end] for start, end in zip(starts, ends)]
 
 
 class SuncloudDataCoordinator(DataUpdateCoordinator):
@@ -52,14 +89,94 @@ class SuncloudDataCoordinator(DataUpdateCoordinator):
         self.config_entry = config_entry
         self.config = config_entry.data
         self._points: dict[str, dict[str, Any]] = {}
-        self.token = None
         self.ps_id = None
         self.sn = None
         self.ps_key = None
-        self._session = None
-        self.storage_path = Path(hass.config.path(CONFIG_STORAGE_FILE))
+        self.fleet_mode = config_entry.options.get(CONF_FLEET_MODE, False)
+        self.plants: dict[str, dict[str, Any]] = {}
+        self.discovered_at = 0.0
+        self._revalidate_task: asyncio.Task | None = None
+        # Discovery results and the catalog are written by refreshes, the
+        # background revalidation and the options flow; one at a time.
+        # Identical catalog and realtime requests share one gateway call.
+        self._discovery_lock = asyncio.Lock()
+        self._flights = SingleFlight()
+        # Data keys changed by the last update (None = notify every listener)
+        # and running totals of entity writes done/avoided because of it.
+        self._changed: set | None = None
+        self._notified_success = True
+        self.update_stats = {"written": 0, "skipped": 0}
+        # Wall-clock time of the last update that fetched values, persisted
+        # with them so they survive restarts. _live tells whether the data came
+        # from the gateway since startup.
+        self.synced_at = 0.0
+        self._live = False
+        self._max_staleness = config_entry.options.get(
+            CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS
+        )
+        self._point_chunk_size = config_entry.options.get(
+            CONF_POINT_CHUNK_SIZE, DEFAULT_POINT_CHUNK_SIZE
+        )
+        self._request_semaphore = asyncio.Semaphore(
+            config_entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)
+        )
+        self.store = SuncloudStore(hass, config_entry.entry_id)
+        # Calls of every entry sharing the access key count against one budget.
+        self.budget = get_budget(hass.data, self.config.get(CONF_ACCESS_KEY, ""))
+        self.budget.register(
+            config_entry.entry_id,
+            config_entry.options.get(CONF_DAILY_CALL_LIMIT, DEFAULT_DAILY_CALL_LIMIT),
+        )
+        self.api = SuncloudClient(
+            appkey=self.config.get(CONF_APPKEY, ""),
+            access_key=self.config.get(CONF_ACCESS_KEY, ""),
+            username=self.config.get(CONF_USERNAME, ""),
+            password=self.config.get(CONF_PASSWORD, ""),
+            crypto=SuncloudCrypto(
+                self.config.get(CONF_RSA_KEY, ""),
+                config_entry.options.get(CONF_KEY_ROTATION, DEFAULT_KEY_ROTATION),
+            ),
+            base_url=self.config.get(CONF_GATEWAY_URL, API_BASE_URL),
+            on_token=self._store_token,
+            on_request=self.budget.record,
+            tracer=PayloadTracer(
+                _LOGGER,
+                config_entry.options.get(CONF_TRACE_SAMPLE_EVERY, TRACE_SAMPLE_EVERY),
+            ),
+        )
 
         poll_seconds = config_entry.options.get("poll_interval", 300)
+        self._poll_interval = timedelta(seconds=poll_seconds)
+        self._tiers = TierSchedule(
+            {
+                TIER_FAST: 0,
+                TIER_NORMAL: config_entry.options.get(
+                    CONF_TIER_NORMAL_INTERVAL, DEFAULT_TIER_NORMAL_INTERVAL
+                ),
+                TIER_SLOW: config_entry.options.get(
+                    CONF_TIER_SLOW_INTERVAL, DEFAULT_TIER_SLOW_INTERVAL
+                ),
+                TIER_STATIC: config_entry.options.get(
+                    CONF_TIER_STATIC_INTERVAL, DEFAULT_TIER_STATIC_INTERVAL
+                ),
+            }
+        )
+        self._scheduler: AdaptivePollScheduler | None = None
+        if config_entry.options.get(CONF_ADAPTIVE_POLLING, False):
+            self._scheduler = AdaptivePollScheduler(
+                poll_seconds,
+                config_entry.options.get(
+                    CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                ),
+                config_entry.options.get(
+                    CONF_NIGHT_POLL_INTERVAL, DEFAULT_NIGHT_POLL_INTERVAL
+                ),
+            )
+
+        self._backfill: SuncloudBackfill | None = None
+        self._backfill_task: asyncio.Task | None = None
+        if config_entry.options.get(CONF_BACKFILL, DEFAULT_BACKFILL):
+            self._backfill = SuncloudBackfill(self)
 
         super().__init__(
             hass,
@@ -67,14 +184,23 @@ class SuncloudDataCoordinator(DataUpdateCoordinator):
             name="SunCloud Monitor",
             update_interval=timedelta(seconds=poll_seconds),
         )
+        self.config_entry = config_entry
+
+    @property
+    def token(self) -> str | None:
+        return self.api.token
 
-        hass.bus.async_listen_once("homeassistant_stop", self._on_shutdown)
+    @token.setter
+    def token(self, token: str | None):
+        self.api.token = token
 
     @property
-    def session(self):
-        if not self._session or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        return self._session
+    def token_issued_at(self) -> float:
+        return self.api.token_issued_at
+
+    @token_issued_at.setter
+    def token_issued_at(self, issued_at: float):
+        self.api.token_issued_at = issued_at
 
     @property
     def points(self) -> dict[str, dict[str, Any]]:
@@ -85,295 +211,517 @@ class SuncloudDataCoordinator(DataUpdateCoordinator):
 
     async def _load_config_storage(self):
         try:
-            if self.storage_path.exists():
-                async with aiofiles.open(self.storage_path, "r") as f:
-                    raw = await f.read()
-                data = yaml.safe_load(raw) or {}
-                self._points = data.get("points", {})
-                self.ps_key = data.get("ps_key")
-                self.sn = data.get("sn")
+            data = await self.store.async_load()
         except Exception as e:
             _LOGGER.error("[CONFIG] ❌ Failed to load config: %s", e)
+            return
+        self.token = data.get("token")
+        self.token_issued_at = data.get("token_issued_at", 0.0)
+        version = data.get("discovery_version", DISCOVERY_CACHE_VERSION)
+        if version != DISCOVERY_CACHE_VERSION:
+            _LOGGER.info("[CONFIG] Discarding discovery cache v%s", version)
+            return
+        self._points = data.get("points", {})
+        self.ps_id = data.get("ps_id")
+        self.ps_key = data.get("ps_key")
+        self.sn = data.get("sn")
+        self.plants = data.get("plants", {})
+        self.discovered_at = data.get("discovered_at", 0.0)
+        self._restore_last_values(data.get("last_values") or {})
+
+    def _restore_last_values(self, last_values: dict[str, Any]):
+        synced_at = last_values.get("synced_at", 0.0)
+        if time.time() - synced_at > self._max_staleness:
+            return
+        data: dict[Any, Any] = {}
+        for key, val in last_values.get("values", []):
+            # JSON turns the (ps_key, point_id) keys of fleet mode into lists.
+            data[tuple(key) if isinstance(key, list) else key] = val
+        self.data = data
+        self.synced_at = synced_at
+        self._tiers.restore(last_values.get("fetched_at", {}))
+        _LOGGER.info("[CONFIG] %d last values restored", len(data))
+
+    def _save_last_values(self, data: dict):
+        self.store.data["last_values"] = {
+            "synced_at": self.synced_at,
+            "fetched_at": self._tiers.as_dict(),
+            "values": [[key, val] for key, val in data.items()],
+        }
+        self.store.async_schedule_save()
 
-    async def _save_config_storage(self, selected_points=None):
-        try:
-            dump = yaml.dump(
-                {
-                    "points": selected_points or self._points,
-                    "ps_key": self.ps_key,
-                    "sn": self.sn,
-                }
-            )
-            async with aiofiles.open(self.storage_path, "w") as f:
-                await f.write(dump)
-        except Exception as e:
-            _LOGGER.error("[CONFIG] ❌ Save failed: %s", e)
-
-    def _rsa_encrypt(self, secret: str, pubkey_b64: str) -> str:
-        try:
-            pubkey_bytes = base64.urlsafe_b64decode(pubkey_b64.strip())
-            pubkey = serialization.load_der_public_key(
-                pubkey_bytes, backend=default_backend()
-            )
-            if not isinstance(pubkey, RSAPublicKey):
-                raise TypeError("Public key is not an RSA public key")
-            encrypted = pubkey.encrypt(secret.encode(), rsa_padding.PKCS1v15())
-            return base64.urlsafe_b64encode(encrypted).decode()
-        except Exception as e:
-            _LOGGER.error("[RSA] ❌ %s", e)
-            return ""
+    def fetched_at(self, point_id: str) -> float | None:
+        """Wall-clock time the tier of ``point_id`` was last fetched.
 
-    def _aes_encrypt(self, content: str, password: str) -> str:
-        try:
-            key = password.encode().ljust(16)[:16]
-            cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
-            padder = PKCS7(128).padder()
-            padded = padder.update(content.encode()) + padder.finalize()
-            encryptor = cipher.encryptor()
-            encrypted = encryptor.update(padded) + encryptor.finalize()
-            return encrypted.hex().upper()
-        except Exception as e:
-            _LOGGER.error("[AES] ❌ %s", e)
-            return ""
-
-    def _aes_decrypt(self, content: str, password: str):
-        try:
-            key = password.encode().ljust(16)[:16]
-            cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
-            decryptor = cipher.decryptor()
-            decrypted = decryptor.update(bytes.fromhex(content)) + decryptor.finalize()
-            unpadder = PKCS7(128).unpadder()
-            unpadded = unpadder.update(decrypted) + unpadder.finalize()
-            return json.loads(unpadded.decode())
-        except Exception as e:
-            _LOGGER.error("[AES] ❌ %s", e)
+        None for tiers fetched on every poll; those values are as fresh as
+        ``synced_at``.
+        """
+        tier = point_tier(self.get_point_config(point_id))
+        if not self._tiers.intervals.get(tier):
             return None
+        return self._tiers.fetched_at(tier)
 
-    def _build_headers(self, encrypted_key, token=None):
-        headers = {
-            "Content-Type": "application/json;charset=UTF-8",
-            "sys_code": "901",
-            "x-access-key": self.config[CONF_ACCESS_KEY],
-            "x-random-secret-key": encrypted_key,
-        }
-        if token:
-            headers["token"] = token
-        return headers
+    def value_available(self, key) -> bool:
+        """Whether data key ``key`` has a value that may still be shown.
+
+        While updates fail, the last values are served until max_staleness
+        seconds have passed since the last successful update.
+        """
+        if self.data is None or key not in self.data:
+            return False
+        if self.last_update_success:
+            return True
+        return time.time() - self.synced_at <= self._max_staleness
 
-    def _build_encrypted_payload(self, payload: dict, token: str, unenc_key: str):
-        payload.update(
+    async def _save_config_storage(self, selected_points=None):
+        self.store.data.update(
             {
-                "appkey": self.config[CONF_APPKEY],
-                "token": token,
-                "lang": "_en_US",
-                "api_key_param": {
-                    "nonce": generate_nonce(),
-                    "timestamp": str(int(time.time() * 1000)),
-                },
+                "points": selected_points or self._points,
+                "ps_id": self.ps_id,
+                "ps_key": self.ps_key,
+                "sn": self.sn,
+                "plants": self.plants,
+                "discovered_at": self.discovered_at,
+                "discovery_version": DISCOVERY_CACHE_VERSION,
             }
         )
-        _LOGGER.debug("[PAYLOAD] 🔓 %s", json.dumps(payload))
-        encrypted = self._aes_encrypt(json.dumps(payload), unenc_key)
-        _LOGGER.debug("[PAYLOAD] 🔐 %s...", encrypted[:200])
-        return encrypted
-
-    async def _authenticate(self):
-        await self._load_config_storage()
-        url = "https://gateway.isolarcloud.eu/openapi/login"
-        unenc_key = generate_random_key()
-        encrypted_key = self._rsa_encrypt(unenc_key, self.config[CONF_RSA_KEY])
-        payload = {
-            "api_key_param": {
-                "nonce": generate_nonce(),
-                "timestamp": str(int(time.time() * 1000)),
-            },
-            "appkey": self.config[CONF_APPKEY],
-            "login_type": "1",
-            "user_account": self.config[CONF_USERNAME],
-            "user_password": self.config[CONF_PASSWORD],
-        }
-        _LOGGER.debug("[LOGIN] 🔓 %s", json.dumps(payload))
-        encrypted_body = self._aes_encrypt(json.dumps(payload), unenc_key)
-        async with self.session.post(
-            url, headers=self._build_headers(encrypted_key), data=encrypted_body
-        ) as response:
-            raw = await response.text()
-            _LOGGER.debug("[LOGIN] 🔐 %s", raw[:500])
-            decrypted = self._aes_decrypt(raw, unenc_key)
-            _LOGGER.debug("[LOGIN] 🔓 %s", json.dumps(decrypted, indent=2))
-            if not decrypted or not isinstance(decrypted, dict):
-                raise UpdateFailed("[AUTH] ❌ Decryption failed")
-            self.token = decrypted.get("result_data", {}).get("token")
-            if not self.token:
-                raise UpdateFailed("[AUTH] ❌ Missing token")
+        self.store.async_schedule_save()
+
+    async def async_set_points(self, selected_points: dict[str, dict[str, Any]]):
+        """Store the user's point selection and write it out immediately."""
+        self._points = selected_points
+        await self._save_config_storage()
+        await self.store.async_save()
+
+    def _store_token(self, token: str, issued_at: float):
+        self.store.data.update({"token": token, "token_issued_at": issued_at})
+        self.store.async_schedule_save()
 
     async def _ensure_ready(self):
-        if not self.token:
-            await self._authenticate()
-        if not self.ps_id:
-            await self._fetch_ps_id()
-        if not self.sn:
-            await self._fetch_sn()
-        if not self.ps_key:
-            await self._fetch_ps_key()
+        await self.api.ensure_token()
+        if self._discovery_cached():
+            if (
+                self._discovery_stale()
+                and not self._revalidate_task
+                and self.budget.allows(QUOTA_REVALIDATE_RESERVE)
+            ):
+                self._revalidate_task = self.hass.async_create_background_task(
+                    self._async_revalidate_discovery(),
+                    "suncloud_monitor discovery revalidation",
+                )
+            return
+        async with self._discovery_lock:
+            # Another caller may have finished discovery while we waited.
+            if self._discovery_cached():
+                return
+            if self.fleet_mode:
+                if not self.plants:
+                    await self._fetch_fleet()
+            else:
+                if not self.ps_id:
+                    await self._fetch_ps_id()
+                if not self.sn:
+                    await self._fetch_sn()
+                if not self.ps_key:
+                    await self._fetch_ps_key()
+            if not self._points:
+                await self._fetch_points()
+            self.discovered_at = time.time()
+            await self._save_config_storage()
+
+    def _discovery_cached(self) -> bool:
         if not self._points:
-            await self._fetch_points()
+            return False
+        if self.fleet_mode:
+            return bool(self.plants)
+        return bool(self.ps_id and self.sn and self.ps_key)
+
+    def _discovery_stale(self) -> bool:
+        return time.time() - self.discovered_at > DISCOVERY_CACHE_TTL
+
+    async def _async_revalidate_discovery(self):
+        """Refresh the cached discovery results without blocking updates."""
+        try:
+            if self.fleet_mode:
+                plants = await self._query_fleet()
+            else:
+                result_data = await self._query_power_stations(1, 1)
+                ps_id = result_data.get("pageList", [{}])[0].get("ps_id")
+                sn = await self._query_sn(ps_id)
+                ps_key = await self._query_ps_key(sn)
+            catalog = await self._flights.run("points", self._query_points)
+        except Exception as e:
+            _LOGGER.warning("[DISCOVERY] ⚠️ Revalidation failed: %s", e)
+            return
+        finally:
+            self._revalidate_task = None
+        async with self._discovery_lock:
+            if self.fleet_mode:
+                self.plants = plants
+            elif ps_key:
+                self.ps_id, self.sn, self.ps_key = ps_id, sn, ps_key
+            # Refresh metadata of the stored points but keep the selection.
+            self._points = {
+                point_id: catalog.get(point_id, config)
+                for point_id, config in self._points.items()
+            }
+            self.discovered_at = time.time()
+            await self._save_config_storage()
+        _LOGGER.info("[DISCOVERY] ✅ Discovery cache revalidated")
+
+    async def _query_power_stations(self, page: int, size: int) -> dict:
+        return await self.api.power_stations(page, size)
+
+    async def _query_sn(self, ps_id) -> str | None:
+        comm_sn = None
+        for device in await self.api.device_list(ps_id):
+            comm_sn = device.get("communication_dev_sn")
+            type_name = device.get("type_name", "").lower()
+            if comm_sn and type_name == "communication module":
+                break
+        return comm_sn
+
+    async def _query_ps_key(self, sn) -> str | None:
+        return (await self.api.power_station_detail(sn)).get("ps_key")
 
     async def _fetch_ps_id(self):
-        url = "https://gateway.isolarcloud.eu/openapi/getPowerStationList"
-        unenc_key = generate_random_key()
-        encrypted_key = self._rsa_encrypt(unenc_key, self.config[CONF_RSA_KEY])
-        payload = {"curPage": 1, "size": 1}
-        encrypted_payload = self._build_encrypted_payload(
-            payload,
-            self.token,
-            unenc_key,
-        )
-        async with self.session.post(
-            url,
-            headers=self._build_headers(encrypted_key, self.token),
-            data=encrypted_payload,
-        ) as response:
-            raw = await response.text()
-            _LOGGER.debug("[PS_ID] 🔐 %s", raw[:500])
-            decrypted = self._aes_decrypt(raw, unenc_key)
-            _LOGGER.debug("[PS_ID] 🔓 %s", json.dumps(decrypted, indent=2))
-            result_data = decrypted.get("result_data")
-            self.ps_id = result_data.get("pageList", [{}])[0].get("ps_id")
+        result_data = await self._query_power_stations(1, 1)
+        self.ps_id = result_data.get("pageList", [{}])[0].get("ps_id")
 
     async def _fetch_sn(self):
-        url = "https://gateway.isolarcloud.eu/openapi/getDeviceList"
-        unenc_key = generate_random_key()
-        encrypted_key = self._rsa_encrypt(unenc_key, self.config[CONF_RSA_KEY])
-        payload = {"curPage": 1, "size": 50, "ps_id": self.ps_id}
-        encrypted_payload = self._build_encrypted_payload(
-            payload,
-            self.token,
-            unenc_key,
-        )
-        async with self.session.post(
-            url,
-            headers=self._build_headers(encrypted_key, self.token),
-            data=encrypted_payload,
-        ) as response:
-            raw = await response.text()
-            _LOGGER.debug("[SN] 🔐 %s", raw[:500])
-            decrypted = self._aes_decrypt(raw, unenc_key)
-            _LOGGER.debug("[SN] 🔓 %s", json.dumps(decrypted, indent=2))
-            result_data = decrypted.get("result_data")
-            page_list = result_data.get("pageList", [])
-            comm_sn = None
-            for device in page_list:
-                comm_sn = device.get("communication_dev_sn")
-                type_name = device.get("type_name", "").lower()
-                if comm_sn and type_name == "communication module":
-                    break
-            self.sn = comm_sn
+        self.sn = await self._query_sn(self.ps_id)
 
     async def _fetch_ps_key(self):
-        url = "https://gateway.isolarcloud.eu/openapi/getPowerStationDetail"
-        unenc_key = generate_random_key()
-        encrypted_key = self._rsa_encrypt(unenc_key, self.config[CONF_RSA_KEY])
-        payload = {"sn": self.sn, "is_get_ps_remarks": "1"}
-        encrypted_payload = self._build_encrypted_payload(
-            payload,
-            self.token,
-            unenc_key,
-        )
-        async with self.session.post(
-            url,
-            headers=self._build_headers(encrypted_key, self.token),
-            data=encrypted_payload,
-        ) as response:
-            raw = await response.text()
-            _LOGGER.debug("[PS_KEY] 🔐 %s", raw[:500])
-            decrypted = self._aes_decrypt(raw, unenc_key)
-            _LOGGER.debug("[PS_KEY] 🔓 %s", json.dumps(decrypted, indent=2))
-            result_data = decrypted.get("result_data")
-            self.ps_key = result_data.get("ps_key")
+        self.ps_key = await self._query_ps_key(self.sn)
+
+    async def _fetch_fleet(self):
+        self.plants = await self._query_fleet()
+
+    async def _query_fleet(self) -> dict[str, dict[str, Any]]:
+        """Discover every power station on the account and resolve its ps_key."""
+        semaphore = asyncio.Semaphore(FLEET_CONCURRENCY)
+
+        async def fetch_page(page: int) -> list[dict]:
+            async with semaphore:
+                result_data = await self._query_power_stations(page, FLEET_PAGE_SIZE)
+            return result_data.get("pageList", [])
+
+        async def resolve(station: dict) -> tuple[str | None, dict]:
+            ps_id = station.get("ps_id")
+            async with semaphore:
+                sn = await self._query_sn(ps_id)
+                ps_key = await self._query_ps_key(sn) if sn else None
+            plant = {"ps_id": ps_id, "ps_name": station.get("ps_name"), "sn": sn}
+            return ps_key, plant
+
+        first = await self._query_power_stations(1, FLEET_PAGE_SIZE)
+        stations = list(first.get("pageList", []))
+        pages = -(-int(first.get("rowCount") or 0) // FLEET_PAGE_SIZE)
+        for page_list in await asyncio.gather(
+            *(fetch_page(page) for page in range(2, pages + 1))
+        ):
+            stations.extend(page_list)
+
+        resolved = await asyncio.gather(*(resolve(station) for station in stations))
+        plants = {ps_key: plant for ps_key, plant in resolved if ps_key}
+        _LOGGER.info("[FLEET] ✅ %d of %d plants resolved", len(plants), len(stations))
+        return plants
 
     async def _fetch_points(self):
-        url = "https://gateway.isolarcloud.eu/openapi/getOpenPointInfo"
-        unenc_key = generate_random_key()
-        encrypted_key = self._rsa_encrypt(unenc_key, self.config[CONF_RSA_KEY])
-        payload = {"device_type": 11, "type": 2, "curPage": 1, "size": 999}
-        encrypted_payload = self._build_encrypted_payload(
-            payload,
-            self.token,
-            unenc_key,
-        )
-        async with self.session.post(
-            url,
-            headers=self._build_headers(encrypted_key, self.token),
-            data=encrypted_payload,
-        ) as response:
-            raw = await response.text()
-            _LOGGER.debug("[POINTS] 🔐 %s", raw[:500])
-            decrypted = self._aes_decrypt(raw, unenc_key)
-            _LOGGER.debug("[POINTS] 🔓 %s", json.dumps(decrypted, indent=2))
-            result_data = decrypted.get("result_data")
-            if isinstance(result_data, dict):
-                points_list = result_data.get("pageList", [])
-            elif isinstance(result_data, list):
-                points_list = result_data
-            else:
-                points_list = []
-            self._points = {
-                str(point.get("id", point.get("point_id"))): point
-                for point in points_list
-            }
+        self._points = await self._flights.run("points", self._query_points)
+        await self._save_config_storage()
+
+    async def async_refresh_points(self):
+        """Download the point catalog again and store it."""
+        await self.api.ensure_token()
+        points = await self._flights.run("points", self._query_points)
+        async with self._discovery_lock:
+            self._points = points
             await self._save_config_storage()
 
+    async def _query_points(self) -> dict[str, dict[str, Any]]:
+        return {
+            str(point.get("id", point.get("point_id"))): point
+            for point in await self.api.point_info()
+        }
+
+    async def _fetch_realtime(self, ps_keys: list, point_ids: list) -> list[dict]:
+        return await self._flights.run(
+            ("realtime", tuple(ps_keys), tuple(point_ids)),
+            lambda: self.api.realtime(ps_keys, point_ids),
+        )
+
+    @staticmethod
+    def _parse_device_point(device_data: dict) -> dict[str, Any]:
+        return {
+            key[1:]: val
+            for key, val in device_data.items()
+            if key.startswith("p") and key[1:].isdigit()
+        }
+
+    async def _fetch_realtime_chunked(
+        self, ps_keys: list, point_ids: list
+    ) -> list[dict]:
+        """Fetch realtime data in ps_key x point_id chunks, concurrently.
+
+        Returns the ``device_point`` dicts of every chunk that succeeded. A
+        failed chunk only leaves its own points missing; the update fails
+        when no chunk succeeds.
+        """
+        semaphore = self._request_semaphore
+
+        async def fetch(ps_key_chunk: list, point_chunk: list) -> list[dict]:
+            async with semaphore:
+                return await self._fetch_realtime(ps_key_chunk, point_chunk)
+
+        jobs = [
+            (ps_key_chunk, point_chunk)
+            for ps_key_chunk in chunked(ps_keys, REALTIME_MAX_PS_KEYS)
+            for point_chunk in chunked(point_ids, self._point_chunk_size)
+        ]
+        results = await asyncio.gather(
+            *(fetch(*job) for job in jobs), return_exceptions=True
+        )
+        device_points: list[dict] = []
+        errors: list[BaseException] = []
+        for (ps_key_chunk, point_chunk), result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                _LOGGER.warning(
+                    "[REALTIME] ⚠️ Chunk of %d points for %d plants failed: %s",
+                    len(point_chunk),
+                    len(ps_key_chunk),
+                    result,
+                )
+                continue
+            device_points.extend(device.get("device_point", {}) for device in result)
+        if errors and len(errors) == len(jobs):
+            raise errors[0]
+        return device_points
+
+    def history_requests(self, ps_keys: list, point_ids: list) -> int:
+        """Number of requests ``_iter_history`` makes for one time window."""
+        return len(chunked(ps_keys, REALTIME_MAX_PS_KEYS)) * len(
+            chunked(point_ids, self._point_chunk_size)
+        )
+
+    async def _iter_history(
+        self, ps_keys: list, point_ids: list, start: datetime, end: datetime
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """Yield ``(ps_key, row)`` minute-data rows between ``start`` and ``end``.
+
+        Requests go out one ps_key x point chunk at a time, so only a single
+        reply is held in memory while the rows are consumed.
+        """
+        for ps_key_chunk in chunked(ps_keys, REALTIME_MAX_PS_KEYS):
+            for point_chunk in chunked(point_ids, self._point_chunk_size):
+                async with self._request_semaphore:
+                    result_data = await self.api.minute_data(
+                        ps_key_chunk,
+                        point_chunk,
+                        start,
+                        end,
+                        BACKFILL_MINUTE_INTERVAL,
+                    )
+                for ps_key, rows in result_data.items():
+                    for row in rows or []:
+                        yield ps_key, row
+
+    async def _async_update_fleet(self, point_ids: list) -> dict[tuple, Any]:
+        ps_keys = list(self.plants)
+        parsed: dict[tuple, Any] = {}
+        for device_data in await self._fetch_realtime_chunked(ps_keys, point_ids):
+            ps_key = device_data.get("ps_key")
+            for point_id, val in self._parse_device_point(device_data).items():
+                parsed[(ps_key, point_id)] = val
+        _LOGGER.info(
+            "[REALTIME] ✅ %d points updated across %d plants",
+            len(parsed),
+            len(ps_keys),
+        )
+        return parsed
+
     async def _async_update_data(self):
+        self._changed = None
         try:
             await self._ensure_ready()
-            point_ids = list(self._points.keys())
-            url = "https://gateway.isolarcloud.eu/openapi/getDeviceRealTimeData"
-            unenc_key = generate_random_key()
-            encrypted_key = self._rsa_encrypt(unenc_key, self.config[CONF_RSA_KEY])
-            payload = {
-                "device_type": 11,
-                "point_id_list": point_ids,
-                "ps_key_list": [self.ps_key],
-            }
-            encrypted_payload = self._build_encrypted_payload(
-                payload,
-                self.token,
-                unenc_key,
+            now = time.time()
+            slack = (
+                self.update_interval.total_seconds() / 2 if self.update_interval else 0
             )
-            async with self.session.post(
-                url,
-                headers=self._build_headers(encrypted_key, self.token),
-                data=encrypted_payload,
-            ) as response:
-                raw = await response.text()
-                _LOGGER.debug("[REALTIME] 🔐 %s", raw[:500])
-                decrypted = self._aes_decrypt(raw, unenc_key)
-                _LOGGER.debug("[REALTIME] 🔓 %s", json.dumps(decrypted, indent=2))
-                if not decrypted or not isinstance(decrypted, dict):
-                    raise UpdateFailed("[REALTIME] ❌ Decryption failed")
-                result_data = decrypted.get("result_data")
-                if not result_data:
-                    raise UpdateFailed("[REALTIME] ❌ Missing result_data")
-                device_list = result_data.get("device_point_list", [])
-                device_data = (
-                    device_list[0].get("device_point", {}) if device_list else {}
+            due_tiers = self._tiers.due(now, slack)
+            allowed_tiers = self.budget.allowed_tiers(due_tiers)
+            if allowed_tiers != due_tiers:
+                _LOGGER.warning(
+                    "[QUOTA] ⚠️ %d%% of the daily budget left, skipping tiers: %s",
+                    self.budget.remaining_share() * 100,
+                    ", ".join(sorted(due_tiers - allowed_tiers)),
+                )
+                due_tiers = allowed_tiers
+            point_ids = [
+                point_id
+                for point_id, config in self._points.items()
+                if point_tier(config) in due_tiers
+            ]
+            fetched: dict = {}
+            if point_ids and self.fleet_mode:
+                fetched = await self._async_update_fleet(point_ids)
+            elif point_ids:
+                for device_data in await self._fetch_realtime_chunked(
+                    [self.ps_key], point_ids
+                ):
+                    fetched.update(self._parse_device_point(device_data))
+                _LOGGER.info(
+                    "[REALTIME] ✅ %d points updated (tiers: %s)",
+                    len(fetched),
+                    ", ".join(sorted(due_tiers)),
                 )
-                parsed = {
-                    key[1:]: val
-                    for key, val in device_data.items()
-                    if key.startswith("p")
-                }
-                _LOGGER.info("[REALTIME] ✅ %d points updated", len(parsed))
-                return parsed
         except Exception as e:
+            if not self.last_update_success:
+                # The coordinator only notifies on the first failure; later
+                # ones still have to drop values past max_staleness.
+                self.async_update_listeners()
             raise UpdateFailed(f"[REALTIME] ❌ Exception: {e}")
+        if (
+            not self._live
+            or not self.last_update_success
+            or (self._backfill and self._backfill.deferred)
+        ):
+            # First update since startup, recovery after failures, or a
+            # backfill cut short by the call budget.
+            self._schedule_backfill()
+        self._live = True
+        self._tiers.mark_fetched(due_tiers, now)
+        parsed = self._carry_forward(fetched, set(point_ids))
+        self._changed = self._diff(self.data, parsed)
+        if self._changed is not None:
+            # Their fetched_at attribute moved even if the value did not.
+            self._changed.update(
+                key
+                for key in fetched
+                if self.fetched_at(key[1] if isinstance(key, tuple) else key)
+            )
+        if fetched:
+            # Nothing fetched (no tier due, or none left in the call budget)
+            # leaves the values exactly as old as before.
+            self.synced_at = time.time()
+        if self._scheduler:
+            changed = len(parsed) if self._changed is None else len(self._changed)
+            self._adapt_update_interval(changed)
+        self.update_interval = self.budget.next_interval(
+            self.config_entry.entry_id,
+            self.update_interval if self._scheduler else self._poll_interval,
+        )
+        self._save_last_values(parsed)
+        return parsed
 
-    async def async_close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
+    @callback
+    def async_import_closed_hours(self, _now=None):
+        """Import the hours closed since the last run into the statistics."""
+        # While updates fail, the recovery run imports the gap instead.
+        if self.last_update_success:
+            self._schedule_backfill()
+
+    def _schedule_backfill(self):
+        if (
+            self._backfill is None
+            or self._backfill_task
+            or "recorder" not in self.hass.config.components
+        ):
+            return
+        if not self.budget.allows(QUOTA_BACKFILL_RESERVE):
+            # Tried again on later updates, once the budget allows it.
+            self._backfill.deferred = True
+            return
+        self._backfill_task = self.hass.async_create_background_task(
+            self._async_backfill(), "suncloud_monitor history backfill"
+        )
+
+    async def _async_backfill(self):
+        """Import the history since the last imported hour."""
+        try:
+            imported = await self._backfill.async_run()
+        except Exception as e:
+            _LOGGER.warning("[BACKFILL] ⚠️ Backfill failed: %s", e)
+            return
+        finally:
+            self._backfill_task = None
+        if imported:
+            _LOGGER.info("[BACKFILL] ✅ %d hourly statistics imported", imported)
+
+    def _adapt_update_interval(self, changed: int):
+        now = dt_util.utcnow()
+        self.update_interval = self._scheduler.next_interval(
+            changed=changed,
+            sun_up=is_up(self.hass, now),
+            now=now,
+            next_sunrise=get_astral_event_next(self.hass, SUN_EVENT_SUNRISE, now),
+        )
+        _LOGGER.debug(
+            "[SCHEDULER] %d points changed, next poll in %s",
+            changed,
+            self.update_interval,
+        )
+
+    def _carry_forward(self, fetched: dict, due_points: set) -> dict:
+        """Merge fresh values with the last values of points not due yet."""
+        if not self.data:
+            return fetched
+        merged = {
+            key: val
+            for key, val in self.data.items()
+            if (key[1] if isinstance(key, tuple) else key) not in due_points
+        }
+        merged.update(fetched)
+        return merged
+
+    @staticmethod
+    def _diff(previous: dict | None, current: dict) -> set | None:
+        """Return the data keys whose value changed, or None for "all"."""
+        if previous is None:
+            return None
+        changed = {
+            key
+            for key, val in current.items()
+            if key not in previous or previous[key] != val
+        }
+        changed.update(previous.keys() - current.keys())
+        return changed
 
     @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the listeners whose data key changed value.
+
+        Listeners registered without a context, and every listener after a
+        failed/recovered update, are always notified.
+        """
+        changed = self._changed
+        self._changed = None
+        if self.last_update_success != self._notified_success:
+            changed = None
+        self._notified_success = self.last_update_success
+        written = skipped = 0
+        for update_callback, context in list(self._listeners.values()):
+            if changed is None or context is None or context in changed:
+                written += 1
+                update_callback()
+            else:
+                skipped += 1
+        self.update_stats["written"] += written
+        self.update_stats["skipped"] += skipped
+        _LOGGER.debug(
+            "[REALTIME] %d entities written, %d unchanged skipped", written, skipped
+        )
+
+    async def async_close(self):
+        if self._revalidate_task:
+            self._revalidate_task.cancel()
+        if self._backfill_task:
+            self._backfill_task.cancel()
+        self.budget.unregister(self.config_entry.entry_id)
+        await self.store.async_flush()
+        await self.api.close()
+
     async def _on_shutdown(self, _event):
         await self.async_close()
 
@@ -0,0 +1,48 @@
+"""Diagnostics support for Suncloud Monitor."""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_ACCESS_KEY,
+    CONF_APPKEY,
+    CONF_PASSWORD,
+    CONF_RSA_KEY,
+    CONF_USERNAME,
+    DOMAIN,
+)
+from .coordinator import SuncloudDataCoordinator
+
+TO_REDACT = {CONF_ACCESS_KEY, CONF_APPKEY, CONF_PASSWORD, CONF_RSA_KEY, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the entry setup, discovery state and per-endpoint metrics."""
+    coordinator: SuncloudDataCoordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "fleet_mode": coordinator.fleet_mode,
+            "plants": len(coordinator.plants),
+            "points": len(coordinator.points),
+            "discovered_at": coordinator.discovered_at,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "last_update_success": coordinator.last_update_success,
+            "synced_at": coordinator.synced_at,
+            "update_stats": dict(coordinator.update_stats),
+        },
+        "endpoints": coordinator.api.metrics.as_dict(),
+        "quota": coordinator.budget.as_dict(),
+        "circuit_breakers": {
+            endpoint: breaker.as_dict()
+            for endpoint, breaker in coordinator.api.breakers.items()
+        },
+    }
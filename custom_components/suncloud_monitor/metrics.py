@@ -0,0 +1,112 @@
+"""Per-endpoint request metrics of the gateway client."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+from .const import LATENCY_BUCKETS
+
+
+class EndpointMetrics:
+    """Running totals of the requests made to one gateway endpoint.
+
+    Latency is the time spent waiting for the gateway, retries included;
+    crypto time is the time spent building, encrypting and decrypting the
+    bodies (for replies decrypted in an executor, including the handoff).
+    Decrypted bytes are the plaintext size of the replies, padding excluded.
+    """
+
+    __slots__ = (
+        "bytes_received",
+        "bytes_sent",
+        "crypto_time",
+        "decrypted_bytes",
+        "errors",
+        "latency_buckets",
+        "latency_last",
+        "latency_max",
+        "latency_total",
+        "requests",
+        "result_codes",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+        # One count per LATENCY_BUCKETS upper bound, plus one for slower.
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.crypto_time = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.decrypted_bytes = 0
+        self.result_codes: Counter[str] = Counter()
+
+    @property
+    def latency_mean(self) -> float | None:
+        return self.latency_total / self.requests if self.requests else None
+
+    def record(
+        self,
+        latency: float,
+        crypto_time: float,
+        sent: int,
+        received: int,
+        result_code: str,
+        decrypted: int = 0,
+    ) -> None:
+        self.requests += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_last = latency
+        self.latency_buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.crypto_time += crypto_time
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.decrypted_bytes += decrypted
+        self.result_codes[result_code] += 1
+
+    def record_error(self, latency: float, crypto_time: float, error: str) -> None:
+        """Count a request that never got a usable reply."""
+        self.record(latency, crypto_time, 0, 0, error)
+        self.errors += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        buckets = {f"le_{bound:g}s": 0 for bound in LATENCY_BUCKETS}
+        buckets["slower"] = 0
+        for bucket, count in zip(buckets, self.latency_buckets):
+            buckets[bucket] = count
+        mean = self.latency_mean
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_mean_ms": None if mean is None else round(mean * 1000, 1),
+            "latency_max_ms": round(self.latency_max * 1000, 1),
+            "latency_last_ms": round(self.latency_last * 1000, 1),
+            "latency_histogram": buckets,
+            "crypto_ms": round(self.crypto_time * 1000, 1),
+            "encrypted_bytes_sent": self.bytes_sent,
+            "encrypted_bytes_received": self.bytes_received,
+            "decrypted_bytes": self.decrypted_bytes,
+            "result_codes": dict(self.result_codes),
+        }
+
+
+class ApiMetrics:
+    """Metrics of every endpoint one client has called, by endpoint name."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics()
+        return metrics
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        return {name: metrics.as_dict() for name, metrics in self.endpoints.items()}
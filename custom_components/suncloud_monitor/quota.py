@@ -0,0 +1,138 @@
+"""Daily API call budget shared by every entry using the same access key."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from .const import DOMAIN, QUOTA_MAX_STRETCH, QUOTA_TIER_RESERVES
+from .tiers import TIER_FAST
+
+DATA_BUDGETS = f"{DOMAIN}_budgets"
+
+
+def get_budget(hass_data: dict, access_key: str) -> QuotaBudget:
+    """Return the process-wide budget of ``access_key``, creating it once."""
+    budgets = hass_data.setdefault(DATA_BUDGETS, {})
+    budget = budgets.get(access_key)
+    if budget is None:
+        budget = budgets[access_key] = QuotaBudget()
+    return budget
+
+
+class QuotaBudget:
+    """Counts the calls of one access key per endpoint and day.
+
+    Entries register so their polls can be staggered over the poll interval.
+    With a daily limit set, each entry asks the budget which of its due
+    tiers it may fetch and how long to wait before the next poll:
+
+    - when calls run ahead of an even spread over the day, intervals are
+      stretched by the overspend, up to ``QUOTA_MAX_STRETCH`` times;
+    - when the remaining share of the budget falls below a tier's reserve
+      (``QUOTA_TIER_RESERVES``) that tier is skipped, lowest priority first;
+    - when the budget is spent nothing is fetched until the next day, and
+      entities keep their last values.
+
+    Optional work (history backfill, discovery revalidation) asks
+    ``allows`` first and waits while less than its reserve is left.
+    """
+
+    def __init__(
+        self, daily_limit: int = 0, clock: Callable[[], datetime] = datetime.now
+    ) -> None:
+        self.default_limit = daily_limit
+        self.clock = clock
+        self.day: date | None = None
+        self.calls: Counter[str] = Counter()
+        # Daily limit configured by each registered entry, in register order.
+        self.limits: dict[str, int] = {}
+
+    @property
+    def entries(self) -> list[str]:
+        return list(self.limits)
+
+    @property
+    def daily_limit(self) -> int:
+        # Entries sharing a key may disagree; honour the strictest limit.
+        limits = [limit for limit in self.limits.values() if limit]
+        return min(limits) if limits else self.default_limit
+
+    def register(self, entry_id: str, daily_limit: int = 0) -> None:
+        self.limits[entry_id] = daily_limit
+
+    def unregister(self, entry_id: str) -> None:
+        self.limits.pop(entry_id, None)
+
+    def _now(self) -> datetime:
+        now = self.clock()
+        if self.day != now.date():
+            self.day = now.date()
+            self.calls.clear()
+        return now
+
+    def record(self, endpoint: str) -> None:
+        self._now()
+        self.calls[endpoint] += 1
+
+    def used(self) -> int:
+        self._now()
+        return sum(self.calls.values())
+
+    def remaining_share(self) -> float:
+        if not self.daily_limit:
+            return 1.0
+        return max(0.0, 1 - self.used() / self.daily_limit)
+
+    def allows(self, reserve: float) -> bool:
+        """Whether at least ``reserve`` of the daily budget is left."""
+        return not self.daily_limit or self.remaining_share() >= reserve
+
+    def allowed_tiers(self, tiers: set[str]) -> set[str]:
+        """Return the due ``tiers`` the remaining budget still pays for."""
+        if not self.daily_limit:
+            return tiers
+        share = self.remaining_share()
+        if share <= 0:
+            return set()
+        return {
+            tier
+            for tier in tiers
+            if tier == TIER_FAST or share >= QUOTA_TIER_RESERVES.get(tier, 0.0)
+        }
+
+    def stretch(self) -> float:
+        """Factor to apply to poll intervals to spread the rest of the budget."""
+        if not self.daily_limit:
+            return 1.0
+        now = self._now()
+        midnight = datetime.combine(now.date(), datetime.min.time(), now.tzinfo)
+        elapsed = max((now - midnight).total_seconds() / 86400, 1 / 24)
+        pace = self.used() / (self.daily_limit * elapsed)
+        return min(max(pace, 1.0), QUOTA_MAX_STRETCH)
+
+    def next_interval(self, entry_id: str, interval: timedelta) -> timedelta:
+        """Stretch ``interval`` if needed and align it to the entry's slot.
+
+        Entry ``i`` of ``n`` polls ``i / n`` of an interval after the others,
+        so entries sharing the key never poll in the same instant.
+        """
+        seconds = interval.total_seconds() * self.stretch()
+        if len(self.entries) < 2 or entry_id not in self.entries or not seconds:
+            return timedelta(seconds=seconds)
+        phase = seconds * self.entries.index(entry_id) / len(self.entries)
+        delay = seconds - (self._now().timestamp() - phase) % seconds
+        if delay < seconds / 2:
+            delay += seconds
+        return timedelta(seconds=delay)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "daily_limit": self.daily_limit,
+            "used_today": self.used(),
+            "calls_today": dict(self.calls),
+            "stretch": round(self.stretch(), 2),
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,43 @@
+"""Adaptive poll interval for Suncloud Monitor."""
+
+from datetime import datetime, timedelta
+
+
+class AdaptivePollScheduler:
+    """Pick the next poll interval from the sun and how much the data moved.
+
+    While the sun is up and values change, poll every ``min_interval``. Each
+    cycle without changes doubles the interval up to ``max_interval``. At
+    night poll every ``night_interval``, but never sleep past sunrise.
+    """
+
+    def __init__(
+        self, min_interval: float, max_interval: float, night_interval: float
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.night_interval = max(night_interval, min_interval)
+        self._flat_cycles = 0
+
+    def next_interval(
+        self,
+        *,
+        changed: int,
+        sun_up: bool,
+        now: datetime,
+        next_sunrise: datetime | None = None,
+    ) -> timedelta:
+        if not sun_up:
+            self._flat_cycles = 0
+            seconds = self.night_interval
+            if next_sunrise is not None:
+                until_sunrise = (next_sunrise - now).total_seconds()
+                seconds = min(seconds, max(until_sunrise, self.min_interval))
+            return timedelta(seconds=seconds)
+
+        if changed:
+            self._flat_cycles = 0
+        else:
+            self._flat_cycles = min(self._flat_cycles + 1, 16)
+        seconds = min(self.min_interval * 2**self._flat_cycles, self.max_interval)
+        return timedelta(seconds=seconds)
@@ -1,9 +1,21 @@
 """Sensor platform for Suncloud Monitor."""
 
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.helpers.entity import EntityCategory
+from datetime import datetime
+from typing import Any
 
-from .const import DOMAIN, CONF_POINTS
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from .const import API_ENDPOINTS, CONF_POINTS, DOMAIN
 from .coordinator import SuncloudDataCoordinator
 
 
@@ -21,74 +33,250 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     else:
         points = coordinator.points
 
-    sensors = [
-        SuncloudSensor(
-            coordinator,
-            point_id,
-            config.get("point_name"),
-            config.get("unit"),
-        )
-        for point_id, config in points.items()
-    ]
+    if coordinator.fleet_mode:
+        sensors = []
+        for ps_key in coordinator.plants:
+            # One DeviceInfo per plant, shared by all of its sensors.
+            device_info = plant_device_info(coordinator, ps_key)
+            sensors.extend(
+                SuncloudSensor(
+                    coordinator,
+                    point_id,
+                    point_name(config),
+                    point_unit(config),
+                    ps_key=ps_key,
+                    device_info=device_info,
+                )
+                for point_id, config in points.items()
+            )
+    else:
+        device_info = plant_device_info(coordinator)
+        sensors = [
+            SuncloudSensor(
+                coordinator,
+                point_id,
+                point_name(config),
+                point_unit(config),
+                device_info=device_info,
+            )
+            for point_id, config in points.items()
+        ]
 
+    sensors.extend(
+        SuncloudEndpointSensor(coordinator, endpoint) for endpoint in API_ENDPOINTS
+    )
+    sensors.append(SuncloudCircuitSensor(coordinator))
+    sensors.append(SuncloudSyncedSensor(coordinator))
     async_add_entities(sensors)
 
 
-class SuncloudSensor(SensorEntity):
+def point_name(config: dict[str, Any]) -> str | None:
+    """Return the point name from API (point_name) or legacy YAML (name) data."""
+    return config.get("point_name") or config.get("name")
+
+
+def point_unit(config: dict[str, Any]) -> str | None:
+    return config.get("unit") or config.get("storage_unit")
+
+
+def plant_device_info(
+    coordinator: SuncloudDataCoordinator, ps_key: str | None = None
+) -> DeviceInfo:
+    if ps_key:
+        plant = coordinator.plants.get(ps_key, {})
+        ps_id = plant.get("ps_id") or ps_key
+        name = plant.get("ps_name") or f"Sungrow {ps_id}"
+    else:
+        ps_id = coordinator.ps_id or "unknown_plant"
+        name = f"Sungrow {ps_id}"
+    return DeviceInfo(
+        identifiers={("suncloud_monitor", ps_id)},
+        name=name,
+        manufacturer="Sungrow",
+        model="Monitor",
+    )
+
+
+def entry_device_info(coordinator: SuncloudDataCoordinator) -> DeviceInfo:
+    """Device of the entry's gateway connection, for its diagnostic sensors.
+
+    Keyed by entry id: in fleet mode there is no single plant to attach to.
+    """
+    entry = coordinator.config_entry
+    return DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name=f"SunCloud gateway {entry.title}",
+        manufacturer="Sungrow",
+        model="iSolarCloud OpenAPI",
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
+
+class SuncloudSensor(CoordinatorEntity[SuncloudDataCoordinator], SensorEntity):
+    """One telemetry point of a plant.
+
+    Name, unit, unique id and device info are fixed at construction; the
+    entity listens only for changes of its own data key. The last value is
+    kept through gateway outages up to the entry's max staleness. Points of
+    slower tiers expose when their tier was last fetched; the others are as
+    fresh as the entry's last synced sensor.
+    """
+
+    _unrecorded_attributes = frozenset({"fetched_at"})
+
     def __init__(
         self,
         coordinator: SuncloudDataCoordinator,
         point_id: str,
-        name: str = None,
-        unit: str = None,
+        name: str | None = None,
+        unit: str | None = None,
+        ps_key: str | None = None,
+        device_info: DeviceInfo | None = None,
     ) -> None:
-        self.coordinator = coordinator
-        self._point_id = str(point_id)
-        self._name = name
-        self._unit = unit
-        self._attr_unique_id = f"suncloud_{self._point_id}"
-        self._attr_name = name
+        point_id = str(point_id)
+        data_key = (ps_key, point_id) if ps_key else point_id
+        super().__init__(coordinator, context=data_key)
+        self._point_id = point_id
+        self._ps_key = ps_key
+        self._data_key = data_key
+
+        if name is None or unit is None:
+            config = coordinator.get_point_config(point_id)
+            name = name or point_name(config)
+            unit = unit or point_unit(config)
+        display_name = f"{point_id} - {name}" if name else point_id
+        id_suffix = point_id
+        if ps_key:
+            plant = coordinator.plants.get(ps_key, {})
+            display_name = f"{plant.get('ps_name') or ps_key} {display_name}"
+            id_suffix = f"{ps_key}_{point_id}"
+
+        self._attr_name = display_name
+        self._attr_unique_id = f"suncloud_sensor_{id_suffix}"
         self._attr_native_unit_of_measurement = unit
+        self._attr_device_info = device_info or plant_device_info(coordinator, ps_key)
 
     @property
-    def name(self) -> str:
-        if self._name:
-            return f"{self._point_id} - {self._name}"
-        config = self.coordinator.get_point_config(self._point_id)
-        name = config.get("point_name") if config else None
-        return f"{self._point_id} - {name}" if name else self._point_id
+    def native_value(self):
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.get(self._data_key)
 
     @property
-    def unique_id(self) -> str:
-        return f"suncloud_sensor_{self._point_id}"
+    def available(self) -> bool:
+        return self.coordinator.value_available(self._data_key)
 
     @property
-    def native_value(self):
-        if self.coordinator.data is None:
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        fetched_at = self.coordinator.fetched_at(self._point_id)
+        if fetched_at is None:
             return None
-        return self.coordinator.data.get(self._point_id)
+        return {"fetched_at": dt_util.utc_from_timestamp(fetched_at).isoformat()}
+
+
+class SuncloudEndpointSensor(CoordinatorEntity[SuncloudDataCoordinator], SensorEntity):
+    """Diagnostic sensor with the request metrics of one gateway endpoint.
+
+    The state is the mean latency; counts, the latency histogram, crypto
+    time, bytes and result codes are attributes, kept out of the recorder.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+    _unrecorded_attributes = frozenset({"latency_histogram", "result_codes"})
+
+    def __init__(self, coordinator: SuncloudDataCoordinator, endpoint: str) -> None:
+        super().__init__(coordinator)
+        self._endpoint = endpoint
+        self._attr_name = f"SunCloud {endpoint} latency"
+        self._attr_unique_id = (
+            f"suncloud_endpoint_{coordinator.config_entry.entry_id}_{endpoint}"
+        )
+        self._attr_device_info = entry_device_info(coordinator)
+
+    @property
+    def native_value(self) -> float | None:
+        metrics = self.coordinator.api.metrics.endpoints.get(self._endpoint)
+        mean = metrics.latency_mean if metrics else None
+        return None if mean is None else round(mean * 1000, 1)
 
     @property
-    def native_unit_of_measurement(self) -> str | None:
-        if self._unit:
-            return self._unit
-        config = self.coordinator.get_point_config(self._point_id)
-        return config.get("unit") if config else None
+    def available(self) -> bool:
+        # Metrics stay meaningful while the gateway is failing.
+        return True
 
     @property
-    def should_poll(self) -> bool:
-        return False
+    def extra_state_attributes(self) -> dict[str, Any]:
+        metrics = self.coordinator.api.metrics.endpoints.get(self._endpoint)
+        if metrics is None:
+            return {}
+        attributes = metrics.as_dict()
+        del attributes["latency_mean_ms"]
+        return attributes
+
+
+class SuncloudCircuitSensor(CoordinatorEntity[SuncloudDataCoordinator], SensorEntity):
+    """Diagnostic sensor with the circuit breaker state of the gateway.
+
+    The state is the worst state over all endpoints; each endpoint's state,
+    consecutive failures and seconds until the next trial are attributes.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_icon = "mdi:electric-switch"
+
+    def __init__(self, coordinator: SuncloudDataCoordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_options = [STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN]
+        self._attr_name = "SunCloud gateway circuit"
+        self._attr_unique_id = f"suncloud_circuit_{coordinator.config_entry.entry_id}"
+        self._attr_device_info = entry_device_info(coordinator)
 
     @property
-    def entity_category(self) -> EntityCategory | None:
-        return None
+    def native_value(self) -> str:
+        states = {breaker.state for breaker in self.coordinator.api.breakers.values()}
+        for state in (STATE_OPEN, STATE_HALF_OPEN):
+            if state in states:
+                return state
+        return STATE_CLOSED
 
     @property
-    def device_info(self):
-        ps_id = self.coordinator.ps_id or "unknown_plant"
+    def available(self) -> bool:
+        return True
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
         return {
-            "identifiers": {("suncloud_monitor", ps_id)},
-            "name": f"Sungrow {ps_id}",
-            "manufacturer": "Sungrow",
-            "model": "Monitor",
+            endpoint: breaker.as_dict()
+            for endpoint, breaker in self.coordinator.api.breakers.items()
         }
+
+
+class SuncloudSyncedSensor(CoordinatorEntity[SuncloudDataCoordinator], SensorEntity):
+    """Time the entry last fetched values from the gateway.
+
+    Every point value is at least this fresh, except points of slower tiers,
+    which carry their own fetched_at. Restored on startup and kept while the
+    gateway fails, so automations can tell how old the values shown are.
+    """
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_icon = "mdi:cloud-check-outline"
+
+    def __init__(self, coordinator: SuncloudDataCoordinator) -> None:
+        super().__init__(coordinator)
+        self._attr_name = "SunCloud last synced"
+        self._attr_unique_id = f"suncloud_synced_{coordinator.config_entry.entry_id}"
+        self._attr_device_info = entry_device_info(coordinator)
+
+    @property
+    def native_value(self) -> datetime | None:
+        synced_at = self.coordinator.synced_at
+        return dt_util.utc_from_timestamp(synced_at) if synced_at else None
+
+    @property
+    def available(self) -> bool:
+        return True
@@ -0,0 +1,36 @@
+"""Coalescing of concurrent identical gateway requests."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time.
+
+    Callers asking for a key whose call is still in flight await that call
+    instead of starting their own, and all of them get its result or its
+    exception. A caller being cancelled does not cancel the shared call.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._done(key, done))
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        self._calls.pop(key, None)
+        # Mark the exception retrieved when every caller was cancelled.
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,105 @@
+"""Persistent per-entry storage for Suncloud Monitor."""
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import yaml  # type: ignore
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import CONFIG_STORAGE_FILE, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+# Keys copied over from the legacy, shared config_storage.yaml.
+_LEGACY_KEYS = ("points", "ps_id", "ps_key", "sn", "plants", "discovered_at")
+
+
+class SuncloudStore:
+    """Token, discovery cache and point catalog of one config entry.
+
+    Data lives in ``.storage/suncloud_monitor.<entry_id>`` as JSON. Writes go
+    through HA's atomic temp-file-and-rename path, and ``async_schedule_save``
+    coalesces bursts of changes into a single delayed write.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            STORAGE_VERSION,
+            f"{DOMAIN}.{entry_id}",
+            private=True,
+            atomic_writes=True,
+        )
+        self.data: dict[str, Any] = {}
+        self._dirty = False
+
+    async def async_load(self) -> dict[str, Any]:
+        data = await self._store.async_load()
+        if data is None:
+            data = await self._async_migrate_yaml()
+            if data:
+                await self._store.async_save(data)
+                await self._async_retire_yaml()
+        self.data = data or {}
+        return self.data
+
+    async def _async_migrate_yaml(self) -> dict[str, Any]:
+        """Import the legacy config_storage.yaml, if it exists."""
+        path = Path(self.hass.config.path(CONFIG_STORAGE_FILE))
+
+        def read_legacy() -> dict[str, Any]:
+            if not path.exists():
+                return {}
+            return yaml.safe_load(path.read_text()) or {}
+
+        try:
+            legacy = await self.hass.async_add_executor_job(read_legacy)
+        except (OSError, yaml.YAMLError) as e:
+            _LOGGER.error("[STORAGE] ❌ Failed to read %s: %s", path, e)
+            return {}
+        if not isinstance(legacy, dict):
+            return {}
+        _LOGGER.info("[STORAGE] Migrating %s", path)
+        data = {key: legacy[key] for key in _LEGACY_KEYS if key in legacy}
+        if not data.get("ps_id"):
+            # sn/ps_key without the plant they belong to may be another
+            # account's (the file used to ship with example values).
+            data.pop("sn", None)
+            data.pop("ps_key", None)
+        return data
+
+    async def _async_retire_yaml(self) -> None:
+        """Rename the imported legacy file so no other entry imports it."""
+        path = Path(self.hass.config.path(CONFIG_STORAGE_FILE))
+        target = path.with_name(f"{path.name}.migrated")
+        try:
+            await self.hass.async_add_executor_job(path.replace, target)
+        except OSError as e:
+            _LOGGER.error("[STORAGE] ❌ Failed to rename %s: %s", path, e)
+
+    @callback
+    def async_schedule_save(self) -> None:
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        self._dirty = False
+        return self.data
+
+    async def async_save(self) -> None:
+        """Write immediately, replacing any pending delayed save."""
+        self._dirty = False
+        await self._store.async_save(self.data)
+
+    async def async_flush(self) -> None:
+        if self._dirty:
+            await self.async_save()
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
@@ -0,0 +1,82 @@
+"""Refresh tiers for telemetry points."""
+
+from typing import Any
+
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_SLOW = "slow"
+TIER_STATIC = "static"
+
+# Instantaneous electrical values change every few seconds, cumulative
+# energy and hours move slowly, and installed capacity is effectively fixed.
+# Anything else (temperatures, ratios, PR, ...) lands in the normal tier.
+FAST_UNITS = {
+    "W",
+    "kW",
+    "MW",
+    "var",
+    "kvar",
+    "VA",
+    "kVA",
+    "A",
+    "V",
+    "Hz",
+    "W/Wp",
+    "W/㎡",
+}
+SLOW_UNITS = {"Wh", "kWh", "MWh", "h", "Wh/㎡", "kWh/㎡"}
+STATIC_UNITS = {"Wp", "kWp", "MWp"}
+
+
+def point_tier(config: dict[str, Any]) -> str:
+    """Return the refresh tier of a point from its catalog entry."""
+    unit = config.get("unit") or config.get("storage_unit") or ""
+    if unit in FAST_UNITS:
+        return TIER_FAST
+    if unit in SLOW_UNITS:
+        return TIER_SLOW
+    if unit in STATIC_UNITS:
+        return TIER_STATIC
+    return TIER_NORMAL
+
+
+class TierSchedule:
+    """Track when each tier was last fetched and which tiers are due.
+
+    Times are wall-clock seconds, so they can be persisted and restored.
+    """
+
+    def __init__(self, intervals: dict[str, float]) -> None:
+        self.intervals = intervals
+        self._last_fetch: dict[str, float] = {}
+
+    def due(self, now: float, slack: float = 0.0) -> set[str]:
+        """Return the tiers due at ``now``.
+
+        ``slack`` absorbs poll jitter so a tier whose interval is a multiple
+        of the poll interval is not pushed back by a whole extra cycle.
+        """
+        return {
+            tier
+            for tier, interval in self.intervals.items()
+            if tier not in self._last_fetch
+            or now - self._last_fetch[tier] + slack >= interval
+        }
+
+    def mark_fetched(self, tiers: set[str], now: float) -> None:
+        for tier in tiers:
+            self._last_fetch[tier] = now
+
+    def fetched_at(self, tier: str) -> float | None:
+        return self._last_fetch.get(tier)
+
+    def as_dict(self) -> dict[str, float]:
+        return dict(self._last_fetch)
+
+    def restore(self, last_fetch: dict[str, float]) -> None:
+        self._last_fetch = {
+            tier: when for tier, when in last_fetch.items() if tier in self.intervals
+        }
+
+    def reset(self) -> None:
+        self._last_fetch.clear()
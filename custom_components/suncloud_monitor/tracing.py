@@ -0,0 +1,82 @@
+"""Debug tracing of gateway payloads that costs nothing when disabled."""
+
+from __future__ import annotations
+
+import json
+import logging
+from itertools import count
+from typing import Any
+
+from .const import TRACE_MAX_CHARS, TRACE_SAMPLE_EVERY
+
+# Payload fields never written to the log.
+REDACTED_FIELDS = frozenset({"user_password", "token", "appkey"})
+
+
+def redact(value: Any) -> Any:
+    """Return ``value`` with REDACTED_FIELDS masked at any nesting depth."""
+    if isinstance(value, dict):
+        return {
+            key: "**REDACTED**" if key in REDACTED_FIELDS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class LazyPayload:
+    """Renders a payload as JSON only when a log handler formats it.
+
+    Long renderings are cut to ``max_chars`` with the number of characters
+    left out, so one 999-point reply cannot flood the log.
+    """
+
+    __slots__ = ("max_chars", "payload")
+
+    def __init__(self, payload: Any, max_chars: int = TRACE_MAX_CHARS) -> None:
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        payload = redact(self.payload)
+        if isinstance(payload, (bytes, bytearray)):
+            # Raw replies are hex text; decode only the part that is shown.
+            text = payload[: self.max_chars + 1].decode(errors="replace")
+            size = len(payload)
+        else:
+            text = payload if isinstance(payload, str) else json.dumps(payload)
+            size = len(text)
+        if size <= self.max_chars:
+            return text
+        return f"{text[: self.max_chars]}... ({size - self.max_chars} more)"
+
+
+class PayloadTracer:
+    """Logs request and reply payloads of every ``sample_every``-th request.
+
+    ``start()`` is called once per request and decides whether it is traced:
+    only when the logger is enabled for DEBUG and the request is a sampled
+    one. Untraced requests pay one level check and no rendering.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        sample_every: int = TRACE_SAMPLE_EVERY,
+        max_chars: int = TRACE_MAX_CHARS,
+    ) -> None:
+        self.logger = logger
+        self.sample_every = max(1, sample_every)
+        self.max_chars = max_chars
+        self._requests = count()
+
+    def start(self) -> bool:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+        return next(self._requests) % self.sample_every == 0
+
+    def trace(self, tag: str, marker: str, payload: Any) -> None:
+        self.logger.debug(
+            "[%s] %s %s", tag, marker, LazyPayload(payload, self.max_chars)
+        )
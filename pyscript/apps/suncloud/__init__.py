@@ -1,32 +1,67 @@
-import base64
-import json
-import random
-import string
-import time
-import aiohttp
 import builtins
+import os
 import yaml
-from pathlib import Path
 
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import padding as rsa_padding
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives.padding import PKCS7
-from cryptography.hazmat.backends import default_backend
+# The gateway protocol lives in the integration; this app only wires it to
+# pyscript services, states and config_storage.yaml.
+from custom_components.suncloud_monitor.api import (
+    SuncloudApiError,
+    SuncloudClient,
+    SuncloudCrypto,
+)
+from custom_components.suncloud_monitor.const import API_BASE_URL
 
 CONFIG_PATH = "/config/custom_components/suncloud_monitor/config_storage.yaml"
+# Seconds to wait before writing, so a burst of saves becomes one write.
+CONFIG_SAVE_DELAY = 5
+# Default seconds between realtime polls of suncloud_start.
+POLL_INTERVAL = 60
 
 # ============================================
 # 🧠 CONFIG LOADER & SAVER FOR PERSISTENT DATA
 # ============================================
 
+# In-memory copy of config_storage.yaml. It is re-read only when the file's
+# mtime changes (e.g. edited by hand), and never while a save is pending.
+config_cache = {"data": None, "mtime": None, "dirty": False, "save_task": None}
+
+@pyscript_compile
+def config_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+@pyscript_compile
+def read_config_file(path):
+    mtime = config_mtime(path)
+    if mtime is None:
+        return None, {}
+    with builtins.open(path, "r") as f:
+        return mtime, yaml.safe_load(f) or {}
+
+@pyscript_compile
+def write_config_file(path, data):
+    tmp_path = f"{path}.tmp"
+    with builtins.open(tmp_path, "w") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    os.replace(tmp_path, path)
+    return config_mtime(path)
+
 def load_suncloud_config():
+    """Return the cached config; treat it as read-only outside this section."""
     try:
-        with builtins.open(CONFIG_PATH, "r") as f:
-            return yaml.safe_load(f) or {}
+        if config_cache["data"] is not None and (
+            config_cache["dirty"]
+            or task.executor(config_mtime, CONFIG_PATH) == config_cache["mtime"]
+        ):
+            return config_cache["data"]
+        mtime, data = task.executor(read_config_file, CONFIG_PATH)
+        config_cache["data"], config_cache["mtime"] = data, mtime
+        return data
     except Exception as e:
         log.error(f"[CONFIG] ❌ Failed to load config: {e}")
-        return {}
+        return config_cache["data"] or {}
 
 def save_suncloud_config(ps_key=None, sn=None, new_points: dict = None):
     config = load_suncloud_config()
@@ -36,91 +71,100 @@ def save_suncloud_config(ps_key=None, sn=None, new_points: dict = None):
         config["sn"] = sn
     if new_points:
         config.setdefault("points", {}).update(new_points)
+    config_cache["data"] = config
+    config_cache["dirty"] = True
+    if config_cache["save_task"] is None:
+        config_cache["save_task"] = task.create(flush_suncloud_config_later)
+
+def flush_suncloud_config_later():
+    task.sleep(CONFIG_SAVE_DELAY)
+    config_cache["save_task"] = None
+    flush_suncloud_config()
+
+def flush_suncloud_config():
+    if not config_cache["dirty"]:
+        return
+    config_cache["dirty"] = False
     try:
-        with builtins.open(CONFIG_PATH, "w") as f:
-            yaml.dump(config, f)
+        config_cache["mtime"] = task.executor(
+            write_config_file, CONFIG_PATH, config_cache["data"]
+        )
         log.info("[CONFIG] ✅ Config saved")
     except Exception as e:
+        config_cache["dirty"] = True
         log.error(f"[CONFIG] ❌ Write failed: {e}")
 
+@time_trigger("shutdown")
+async def suncloud_shutdown():
+    # Pending config writes must not be lost on reload or HA shutdown.
+    flush_suncloud_config()
+    client = gateway["client"]
+    gateway["client"] = None
+    if client:
+        await client.close()
+
 # ========================
-# 🔐 ENCRYPTION UTILITIES
+# 🔌 GATEWAY CLIENT
 # ========================
 
-def rsa_encrypt_secret_key(secret: str, public_key_base64: str) -> str:
-    log.info(f"[RSA] Encripting {secret} with {public_key_base64}")
-    try:
-        pubkey_bytes = base64.urlsafe_b64decode(public_key_base64.strip())
-        public_key = serialization.load_der_public_key(pubkey_bytes, backend=default_backend())
-        encrypted = public_key.encrypt(secret.encode("utf-8"), rsa_padding.PKCS1v15())
-        return base64.urlsafe_b64encode(encrypted).decode("utf-8")
-    except Exception as e:
-        log.error(f"[RSA] ❌ Error: {e}")
-        return "ENC_ERR"
-
-def aes_encrypt(content: str, password: str) -> str:
-    log.info(f"[AES] Encripting {content} with {password}")
-    try:
-        key = password.encode("utf-8").ljust(16)[:16]
-        cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
-        padder = PKCS7(128).padder()
-        padded = padder.update(content.encode("utf-8")) + padder.finalize()
-        encryptor = cipher.encryptor()
-        encrypted = encryptor.update(padded) + encryptor.finalize()
-        return encrypted.hex().upper()
-    except Exception as e:
-        log.error(f"[AES] ❌ Encrypt error: {e}")
-        return ""
-
-def aes_decrypt(content: str, password: str):
-    log.info(f"[AES] Decrypting {content} with {password}")
-    try:
-        key = password.encode("utf-8").ljust(16)[:16]
-        cipher = Cipher(algorithms.AES(key), modes.ECB(), backend=default_backend())
-        decryptor = cipher.decryptor()
-        decrypted = decryptor.update(bytes.fromhex(content)) + decryptor.finalize()
-        unpadder = PKCS7(128).unpadder()
-        unpadded = unpadder.update(decrypted) + unpadder.finalize()
-        return json.loads(unpadded.decode("utf-8"))
-    except Exception as e:
-        log.error(f"[AES] ❌ Decrypt error: {e}")
-        return {}
-
-# ====================
-# 🧠 Misc Utils
-# ====================
-
-def generate_nonce(length=32):
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
-
-def generate_random_key(length=16):
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
-
-def build_headers(secret_key_encrypted, access_key, token=None):
-    headers = {
-        "Content-Type": "application/json;charset=UTF-8",
-        "sys_code": "901",
-        "x-access-key": access_key,  # ✅ static API key
-        "x-random-secret-key": secret_key_encrypted,  # ✅ RSA-encrypted AES key
-    }
-    if token:
-        headers["token"] = token
-    log.info(f"[HEA] Headers: {headers}")
-    return headers
-
-def build_encrypted_payload(original_payload, appkey, token, unenc_key):
-    payload = {
-        "appkey": appkey,
-        "token": token,
-        "lang": "_en_US",
-        "api_key_param": {
-            "nonce": generate_nonce(),
-            "timestamp": str(int(time.time() * 1000))
+# One client for the lifetime of the app: its pooled session keeps the
+# gateway connections and DNS lookups warm between service calls. It is
+# created on first use and closed by suncloud_shutdown on unload.
+gateway = {"client": None}
+
+def get_client(token=None):
+    client = gateway["client"]
+    if client is None:
+        config = pyscript.app_config
+        client = SuncloudClient(
+            appkey=config["appkey"],
+            access_key=config["access_key"],
+            username=config["username"],
+            password=config["password"],
+            crypto=SuncloudCrypto(config["rsa_key"]),
+            base_url=config.get("gateway_url", API_BASE_URL),
+        )
+        gateway["client"] = client
+    if token and token != client.token:
+        # input_text.token was set elsewhere (e.g. by hand); prefer it.
+        client.token = token
+    return client
+
+def sync_token(client, token=None):
+    # The client logs in again by itself when the token expires; keep the
+    # helper in sync with the token it ended up using.
+    if client.token and client.token != token:
+        state.set("input_text.token", client.token)
+
+@pyscript_compile
+def parse_points(telemetry_points):
+    points = {}
+    for point in telemetry_points:
+        pid = str(point.get("point_id"))
+        points[pid] = {
+            "name": point.get("point_name"),
+            "unit": point.get("storage_unit", "")
         }
-    }
-    payload.update(original_payload)
-    log.info(f"[PAY] Payload: {payload}")
-    return aes_encrypt(json.dumps(payload), unenc_key)
+    return points
+
+@pyscript_compile
+def publish_states(hass, device_data, points):
+    # Runs natively in the event loop: one pass of hass.states.async_set
+    # instead of an interpreted state.set call per point.
+    count = 0
+    for key, val in device_data.items():
+        pid = key[1:]
+        if not (key.startswith("p") and pid.isdigit()):
+            continue
+        meta = points.get(pid, {})
+        hass.states.async_set(f"sensor.suncloud_{pid}", val, {
+            "friendly_name": f"{pid}_{meta.get('name')}",
+            "unit_of_measurement": meta.get("unit"),
+            "icon": "mdi:chart-line",
+            "state_class": "measurement"
+        })
+        count += 1
+    return count
 
 # ====================
 # 🔐 LOGIN SERVICE
@@ -128,50 +172,14 @@ def build_encrypted_payload(original_payload, appkey, token, unenc_key):
 
 @service
 async def suncloud_login_api():
-    username = pyscript.app_config["username"]
-    password = pyscript.app_config["password"]
-    appkey = pyscript.app_config["appkey"]
-    access_key = pyscript.app_config["access_key"]
-    public_key = pyscript.app_config["rsa_key"]
-
-    url = "https://gateway.isolarcloud.eu/openapi/login"
-    unenc_key = generate_random_key()
-    encrypted_key = rsa_encrypt_secret_key(unenc_key, public_key)
-
-    payload = {
-        "api_key_param": {
-            "nonce": generate_nonce(),
-            "timestamp": str(int(time.time() * 1000))
-        },
-        "appkey": appkey,
-        "login_type": "1",
-        "user_account": username,
-        "user_password": password
-    }
-
-    headers = {
-        "User-Agent": "Home Assistant",
-        "x-access-key": access_key,
-        "x-random-secret-key": encrypted_key,
-        "Content-Type": "application/json",
-        "sys_code": "901"
-    }
-
-    encrypted_body = aes_encrypt(json.dumps(payload), unenc_key)
-
+    client = get_client()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=encrypted_body) as response:
-                raw = await response.text()
-                decrypted = aes_decrypt(raw, unenc_key)
-                if decrypted.get("result_code") == "1" and decrypted.get("result_data", {}).get("login_state") == "1":
-                    token = decrypted["result_data"].get("token")
-                    state.set("input_text.token", token)
-                    log.info(f"[LOGIN] ✅ Token stored: {token[:6]}...")
-                else:
-                    log.error("[LOGIN] ❌ Invalid login response")
+        token = await client.login()
+        log.info(f"[LOGIN] ✅ Token stored: {token[:6]}...")
     except Exception as e:
         log.error(f"[LOGIN] ❌ Exception: {e}")
+    finally:
+        sync_token(client)
 
 # ================================
 # 🌱 GET PLANT LIST
@@ -184,34 +192,23 @@ async def suncloud_get_plant_list():
         log.error("[PLANT LIST] ❌ Missing token")
         return
 
-    appkey = pyscript.app_config["appkey"]
-    access_key = pyscript.app_config["access_key"]
-    rsa_key = pyscript.app_config["rsa_key"]
-
-    url = "https://gateway.isolarcloud.eu/openapi/getPowerStationList"
-    unenc_key = generate_random_key()
-    encrypted_key = rsa_encrypt_secret_key(unenc_key, rsa_key)
-    headers = build_headers(encrypted_key, access_key, token)
-    body = build_encrypted_payload({"curPage": 1, "size": 10}, appkey, token, unenc_key)
-
+    client = get_client(token)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=body) as response:
-                raw = await response.text()
-                decrypted = aes_decrypt(raw, unenc_key)
-                result_data = decrypted.get("result_data")
-                if not result_data:
-                    log.error(f"[PLANT LIST] ❌ No result_data in response: {raw}")
-                    return
-                plants = result_data.get("pageList", [])
-                if plants:
-                    ps_id = plants[0].get("ps_id")
-                    state.set("sensor.plant_id", ps_id)
-                    log.info(f"[PLANT LIST] 🌱 Stored ps_id: {ps_id}")
-                else:
-                    log.warning("[PLANT LIST] ⚠️ No plants found")
+        result_data = await client.power_stations(1, 10)
+        if not result_data:
+            log.error("[PLANT LIST] ❌ No result_data in response")
+            return
+        plants = result_data.get("pageList", [])
+        if plants:
+            ps_id = plants[0].get("ps_id")
+            state.set("sensor.plant_id", ps_id)
+            log.info(f"[PLANT LIST] 🌱 Stored ps_id: {ps_id}")
+        else:
+            log.warning("[PLANT LIST] ⚠️ No plants found")
     except Exception as e:
         log.error(f"[PLANT LIST] ❌ Exception: {e}")
+    finally:
+        sync_token(client, token)
 
 # ================================
 # 🔌 GET DEVICE LIST
@@ -225,32 +222,21 @@ async def suncloud_get_device_list():
         log.error("[DEVICE LIST] ❌ Missing token or ps_id")
         return
 
-    appkey = pyscript.app_config["appkey"]
-    access_key = pyscript.app_config["access_key"]
-    rsa_key = pyscript.app_config["rsa_key"]
-
-    url = "https://gateway.isolarcloud.eu/openapi/getDeviceList"
-    unenc_key = generate_random_key()
-    encrypted_key = rsa_encrypt_secret_key(unenc_key, rsa_key)
-    headers = build_headers(encrypted_key, access_key, token)
-    body = build_encrypted_payload({"curPage": 1, "size": 50, "ps_id": ps_id}, appkey, token, unenc_key)
-
+    client = get_client(token)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=body) as response:
-                raw = await response.text()
-                decrypted = aes_decrypt(raw, unenc_key)
-                devices = decrypted.get("result_data", {}).get("pageList", [])
-                for device in devices:
-                    if device.get("device_type") == 22:
-                        sn = device.get("device_sn") or device.get("communication_dev_sn")
-                        if sn:
-                            save_suncloud_config(sn=sn)
-                            log.info(f"[DEVICE LIST] ✅ Stored SN: {sn}")
-                            return
-                log.warning("[DEVICE LIST] ⚠️ No type 22 module found")
+        for device in await client.device_list(ps_id):
+            if device.get("device_type") == 22:
+                sn = device.get("device_sn") or device.get("communication_dev_sn")
+                if sn:
+                    save_suncloud_config(sn=sn)
+                    state.set("sensor.module_sn", sn)
+                    log.info(f"[DEVICE LIST] ✅ Stored SN: {sn}")
+                    return
+        log.warning("[DEVICE LIST] ⚠️ No type 22 module found")
     except Exception as e:
         log.error(f"[DEVICE LIST] ❌ Exception: {e}")
+    finally:
+        sync_token(client, token)
 
 # ================================
 # 🔍 GET PLANT INFO
@@ -259,45 +245,28 @@ async def suncloud_get_device_list():
 @service
 async def suncloud_get_plant_info():
     token = state.get("input_text.token")
-    sn = state.get("sensor.module_sn")  # <-- Set by get_device_list()
+    sn = load_suncloud_config().get("sn")  # <-- Set by get_device_list()
     if not token or not sn:
         log.error("[PLANT INFO] ❌ Missing token or SN")
         return
 
-    appkey = pyscript.app_config["appkey"]
-    access_key = pyscript.app_config["access_key"]
-    rsa_key = pyscript.app_config["rsa_key"]
-
-    url = "https://gateway.isolarcloud.eu/openapi/getPowerStationDetail"
-    unenc_key = generate_random_key()
-    encrypted_key = rsa_encrypt_secret_key(unenc_key, rsa_key)
-    headers = build_headers(encrypted_key, access_key, token)
-
-    payload = {
-        "sn": sn,
-        "is_get_ps_remarks": "1"
-    }
-
-    encrypted_body = build_encrypted_payload(payload, appkey, token, unenc_key)
-
+    client = get_client(token)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=encrypted_body) as response:
-                raw = await response.text()
-                decrypted = aes_decrypt(raw, unenc_key)
-                result_data = decrypted.get("result_data")
-                if not result_data:
-                    log.error(f"[PLANT INFO] ❌ No result_data in response: {raw}")
-                    return
-                ps_key = result_data.get("ps_key", "")
-                if ps_key:
-                    save_suncloud_config(ps_key=ps_key)
-                    state.set("input_text.ps_key", ps_key)
-                    log.info(f"[PLANT INFO] 🔑 ps_key: {ps_key}")
-                else:
-                    log.warning("[PLANT INFO] ⚠️ No ps_key in response")
+        result_data = await client.power_station_detail(sn)
+        if not result_data:
+            log.error("[PLANT INFO] ❌ No result_data in response")
+            return
+        ps_key = result_data.get("ps_key", "")
+        if ps_key:
+            save_suncloud_config(ps_key=ps_key)
+            state.set("input_text.ps_key", ps_key)
+            log.info(f"[PLANT INFO] 🔑 ps_key: {ps_key}")
+        else:
+            log.warning("[PLANT INFO] ⚠️ No ps_key in response")
     except Exception as e:
         log.error(f"[PLANT INFO] ❌ Exception: {e}")
+    finally:
+        sync_token(client, token)
 
 # ================================
 # 📊 GET TELEMETRY POINTS
@@ -310,71 +279,20 @@ async def suncloud_get_suncloud_points():
         log.error("[POINTS] ❌ No token")
         return
 
-    appkey = pyscript.app_config["appkey"]
-    access_key = pyscript.app_config["access_key"]
-    rsa_key = pyscript.app_config["rsa_key"]
-
-    url = "https://gateway.isolarcloud.eu/openapi/getOpenPointInfo"
-    unenc_key = generate_random_key()
-    encrypted_key = rsa_encrypt_secret_key(unenc_key, rsa_key)
-
-    headers = {
-        "Content-Type": "application/json;charset=UTF-8",
-        "sys_code": "901",
-        "x-access-key": access_key,                  # ✅ Must be plaintext
-        "x-random-secret-key": encrypted_key,        # ✅ Encrypted AES key
-        "token": token
-    }
-    log.info(f"[RSA] Encripting {unenc_key} with {rsa_key}")
-    log.info(f"[HEA] Headers: {headers}")
-
-    payload = {
-        "appkey": appkey,
-        "token": token,
-        "lang": "_en_US",
-        "api_key_param": {
-            "nonce": generate_nonce(),
-            "timestamp": str(int(time.time() * 1000))
-        },
-        "device_type": 11,
-        "type": 2,
-        "curPage": 1,
-        "size": 999
-    }
-    log.info(f"[PAY] Payload: {payload}")
-
-    encrypted_body = aes_encrypt(json.dumps(payload), unenc_key)
-    log.info(f"[AES] Encrypted Body: {encrypted_body[:200]}...")
-
+    client = get_client(token)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=encrypted_body) as response:
-                log.info(f"[HTTP] Status: {response.status}")
-                raw = await response.text()
-                log.info(f"[POINTS] 🔐 Raw Encrypted Response: {raw[:200]}...")
-
-                decrypted = aes_decrypt(raw, unenc_key)
-                log.info(f"[POINTS] 🧬 Decrypted: {decrypted if decrypted else '{}'}")
-                log.info(f"[POINTS] ✅ result_code: {decrypted.get('result_code')}")
-
-                telemetry_points = decrypted.get("result_data", {}).get("pageList", [])
-                if not telemetry_points:
-                    log.warning("[POINTS] ⚠️ No telemetry points returned")
-                    return
-
-                points = {}
-                for point in telemetry_points:
-                    pid = str(point.get("point_id"))
-                    points[pid] = {
-                        "name": point.get("point_name"),
-                        "unit": point.get("storage_unit", "")
-                    }
-
-                save_suncloud_config(new_points=points)
-                log.info(f"[POINTS] ✅ Saved {len(points)} telemetry points")
-
+        telemetry_points = await client.point_info(device_type=11, size=999)
+        if not telemetry_points:
+            log.warning("[POINTS] ⚠️ No telemetry points returned")
+            return
+
+        points = parse_points(telemetry_points)
+        save_suncloud_config(new_points=points)
+        log.info(f"[POINTS] ✅ Saved {len(points)} telemetry points")
     except Exception as e:
         log.error(f"[POINTS] ❌ Exception: {e}")
+    finally:
+        sync_token(client, token)
 
 # ================================
 # 📶 GET REALTIME VALUES
@@ -387,9 +305,6 @@ async def suncloud_get_realtime_data():
         log.error("[REALTIME] ❌ Missing token")
         return
 
-    appkey = pyscript.app_config["appkey"]
-    access_key = pyscript.app_config["access_key"]
-    rsa_key = pyscript.app_config["rsa_key"]
     config = load_suncloud_config()
     ps_key = config.get("ps_key")
     points = config.get("points", {})
@@ -401,48 +316,107 @@ async def suncloud_get_realtime_data():
     point_ids = list(points.keys())
     log.info(f"[REALTIME] 📡 Reading points: {point_ids}")
 
-    url = "https://gateway.isolarcloud.eu/openapi/getDeviceRealTimeData"
-    nonce = generate_nonce()
-    timestamp = str(int(time.time() * 1000))
-    random_secret = generate_random_key()
-    encrypted_key = rsa_encrypt_secret_key(random_secret, rsa_key)
+    client = get_client(token)
+    try:
+        device_list = await client.realtime([ps_key], point_ids)
+        device_data = (device_list or [{}])[0].get("device_point", {})
+        if not device_data:
+            log.warning("[REALTIME] ⚠️ No device_point returned")
+            return
+        count = publish_states(hass, device_data, points)
+        log.info(f"[REALTIME] ✅ Updated {count} sensors")
+    except Exception as e:
+        log.error(f"[REALTIME] ❌ Exception: {e}")
+    finally:
+        sync_token(client, token)
 
-    headers = build_headers(encrypted_key, access_key, token=token)
+# ================================
+# 🔁 BOOTSTRAP & POLL
+# ================================
 
-    payload = {
-        "appkey": appkey,
-        "token": token,
-        "lang": "_en_US",
-        "api_key_param": {"nonce": nonce, "timestamp": timestamp},
-        "device_type": 11,
-        "point_id_list": point_ids,
-        "ps_key_list": [ps_key]
-    }
+# Discovery results, kept in memory so polls never touch the config file.
+discovery = {"ps_key": None, "points": {}, "point_ids": []}
 
-    encrypted_body = aes_encrypt(json.dumps(payload), random_secret)
+async def discover(client):
+    """Find ps_key and the point catalog, reusing config_storage.yaml."""
+    config = load_suncloud_config()
+    ps_key = config.get("ps_key")
+    points = config.get("points") or {}
+
+    if not ps_key:
+        plants = (await client.power_stations(1, 10) or {}).get("pageList", [])
+        if not plants:
+            raise SuncloudApiError("[DISCOVERY] ❌ No plants found")
+        sn = config.get("sn")
+        if not sn:
+            for device in await client.device_list(plants[0].get("ps_id")):
+                if device.get("device_type") == 22:
+                    sn = device.get("device_sn") or device.get("communication_dev_sn")
+                    break
+        if not sn:
+            raise SuncloudApiError("[DISCOVERY] ❌ No type 22 module found")
+        ps_key = (await client.power_station_detail(sn) or {}).get("ps_key")
+        if not ps_key:
+            raise SuncloudApiError("[DISCOVERY] ❌ No ps_key in response")
+        save_suncloud_config(ps_key=ps_key, sn=sn)
+        state.set("sensor.module_sn", sn)
+        state.set("input_text.ps_key", ps_key)
+
+    if not points:
+        points = parse_points(await client.point_info(device_type=11, size=999))
+        if not points:
+            raise SuncloudApiError("[DISCOVERY] ❌ No telemetry points returned")
+        save_suncloud_config(new_points=points)
+
+    discovery["ps_key"] = ps_key
+    discovery["points"] = points
+    discovery["point_ids"] = list(points)
+    log.info(f"[DISCOVERY] ✅ ps_key {ps_key}, {len(points)} points")
+
+async def poll_realtime(client):
+    token = client.token
+    try:
+        device_list = await client.realtime(
+            [discovery["ps_key"]], discovery["point_ids"]
+        )
+        device_data = (device_list or [{}])[0].get("device_point", {})
+        if not device_data:
+            log.warning("[POLL] ⚠️ No device_point returned")
+            return
+        count = publish_states(hass, device_data, discovery["points"])
+        log.debug(f"[POLL] ✅ Updated {count} sensors")
+    except Exception as e:
+        log.error(f"[POLL] ❌ Exception: {e}")
+    finally:
+        # An expired token is replaced by the client's automatic re-login.
+        sync_token(client, token)
 
+@service
+async def suncloud_start(interval=POLL_INTERVAL):
+    # Log in, discover once and poll realtime data every `interval` seconds.
+    # Calling it again replaces the running poll loop.
+    task.unique("suncloud_poll")
+    token = state.get("input_text.token") if state.exist("input_text.token") else None
+    client = get_client(token)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, data=encrypted_body) as response:
-                raw = await response.text()
-                decrypted = aes_decrypt(raw, random_secret)
-                device_data = decrypted.get("result_data", {}).get("device_point_list", [{}])[0].get("device_point", {})
-                if not device_data:
-                    log.warning("[REALTIME] ⚠️ No device_point returned")
-                    return
-                for key, val in device_data.items():
-                    if not key.startswith("p"):
-                        continue
-                    pid = key[1:]
-                    meta = points.get(pid, {})
-                    sensor_id = f"sensor.suncloud_{pid}"
-                    state.set(sensor_id, val, {
-                        "friendly_name": f"{pid}_{meta.get('name')}",
-                        "unit_of_measurement": meta.get("unit"),
-                        "icon": "mdi:chart-line",
-                        "state_class": "measurement"
-                    })
-                log.info(f"[REALTIME] ✅ Updated {len(device_data)} sensors")
+        if not client.token:
+            await client.login()
+        await discover(client)
     except Exception as e:
-        log.error(f"[REALTIME] ❌ Exception: {e}")
+        log.error(f"[POLL] ❌ Bootstrap failed: {e}")
+        return
+    finally:
+        sync_token(client, token)
+
+    log.info(f"[POLL] 🔁 Polling every {interval}s")
+    while True:
+        await poll_realtime(client)
+        task.sleep(float(interval))
+
+@service
+async def suncloud_stop():
+    # Taking over the poll loop's unique name stops it.
+    task.unique("suncloud_poll")
+    log.info("[POLL] ⏹️ Polling stopped")
 
+# Incremental file, in case it already exists.
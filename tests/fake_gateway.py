@@ -0,0 +1,323 @@
+"""Local stand-in for the iSolarCloud OpenAPI gateway.
+
+Speaks the same protocol as the real gateway: the AES key arrives
+RSA-encrypted in ``x-random-secret-key``, and request and reply bodies are
+AES-ECB/PKCS7 encrypted JSON, hex encoded. Fleet size, catalog size,
+latency, error injection and token lifetime are configurable, so the
+coordinator can be tested, benchmarked and load-tested without the cloud.
+
+Run it standalone for offline development:
+
+    PYTHONPATH=$PWD python tests/fake_gateway.py --plants 20 --points 200
+
+and point a config entry's gateway URL, access key and RSA key at the values
+it prints.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import secrets
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Self
+
+from aiohttp import web
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import padding as rsa_padding
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+TIME_FORMAT = "%Y%m%d%H%M%S"
+FIRST_POINT_ID = 83001
+# Units cycled over the generated catalog, one of each refresh tier.
+POINT_UNITS = ("W", "kWh", "℃", "V", "A", "Wh", "kWp", "%")
+
+
+def aes_encrypt(content: str, password: str) -> str:
+    key = password.encode().ljust(16)[:16]
+    padder = PKCS7(128).padder()
+    padded = padder.update(content.encode()) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+    return (encryptor.update(padded) + encryptor.finalize()).hex().upper()
+
+
+def aes_decrypt(content: str, password: str) -> str:
+    key = password.encode().ljust(16)[:16]
+    decryptor = Cipher(algorithms.AES(key), modes.ECB()).decryptor()
+    decrypted = decryptor.update(bytes.fromhex(content)) + decryptor.finalize()
+    unpadder = PKCS7(128).unpadder()
+    return (unpadder.update(decrypted) + unpadder.finalize()).decode()
+
+
+class FakeGateway:
+    """aiohttp server answering the OpenAPI endpoints the integration uses.
+
+    ``plants`` power stations each expose one communication module; the
+    point catalog holds ``points`` points. Every request sleeps ``latency``
+    seconds and fails with HTTP 500 with probability ``error_rate``. Tokens
+    expire after ``token_ttl`` seconds (never when None) or on
+    ``expire_tokens()``; ``fail()`` queues failures for one endpoint.
+    """
+
+    def __init__(
+        self,
+        *,
+        plants: int = 1,
+        points: int = 20,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        token_ttl: float | None = None,
+        appkey: str = "APPKEY",
+        access_key: str = "ACCESS_KEY",
+        username: str = "user",
+        password: str = "secret",
+        key_size: int = 1024,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.appkey = appkey
+        self.access_key = access_key
+        self.username = username
+        self.password = password
+        self.rng = random.Random(seed)
+
+        self._private_key = rsa.generate_private_key(
+            public_exponent=65537, key_size=key_size
+        )
+        der = self._private_key.public_key().public_bytes(
+            serialization.Encoding.DER,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        self.public_key_b64 = base64.urlsafe_b64encode(der).decode()
+        self._secrets: dict[str, str] = {}
+
+        self.stations = [
+            {"ps_id": 1000 + index, "ps_name": f"Plant {index + 1}"}
+            for index in range(plants)
+        ]
+        self.catalog = [
+            {
+                "point_id": FIRST_POINT_ID + index,
+                "point_name": f"Point {FIRST_POINT_ID + index}",
+                "storage_unit": POINT_UNITS[index % len(POINT_UNITS)],
+            }
+            for index in range(points)
+        ]
+        self._point_ids = {point["point_id"] for point in self.catalog}
+
+        self.tokens: dict[str, float] = {}
+        self.requests: Counter[str] = Counter()
+        self._failures: dict[str, list[str]] = defaultdict(list)
+        self._runner: web.AppRunner | None = None
+        self.url = ""
+
+    @staticmethod
+    def ps_key(ps_id: int) -> str:
+        return f"{ps_id}_11_0_0"
+
+    def entry_data(self) -> dict[str, str]:
+        """Config entry data that logs in to this gateway."""
+        return {
+            "username": self.username,
+            "password": self.password,
+            "appkey": self.appkey,
+            "access_key": self.access_key,
+            "rsa_key": self.public_key_b64,
+            "gateway_url": self.url,
+        }
+
+    def fail(self, endpoint: str, times: int = 1, kind: str = "http") -> None:
+        """Fail the next ``times`` calls of ``endpoint``.
+
+        ``kind`` is ``"http"`` for an HTTP 500 or ``"garbage"`` for a reply
+        that cannot be decrypted.
+        """
+        self._failures[endpoint].extend([kind] * times)
+
+    def expire_tokens(self) -> None:
+        self.tokens.clear()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/openapi/{endpoint}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}/openapi"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def _secret(self, header: str) -> str:
+        secret = self._secrets.get(header)
+        if secret is None:
+            encrypted = base64.urlsafe_b64decode(header)
+            secret = self._private_key.decrypt(
+                encrypted, rsa_padding.PKCS1v15()
+            ).decode()
+            self._secrets[header] = secret
+        return secret
+
+    def _token_valid(self, token: str | None) -> bool:
+        issued = self.tokens.get(token or "")
+        if issued is None:
+            return False
+        return self.token_ttl is None or time.time() - issued < self.token_ttl
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info["endpoint"]
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        failure = None
+        if self._failures[endpoint]:
+            failure = self._failures[endpoint].pop(0)
+        elif self.error_rate and self.rng.random() < self.error_rate:
+            failure = "http"
+        if failure == "http":
+            return web.Response(status=500, text="Internal Server Error")
+        if request.headers.get("x-access-key") != self.access_key:
+            return web.Response(status=403, text="Forbidden")
+
+        secret = self._secret(request.headers["x-random-secret-key"])
+        payload = json.loads(aes_decrypt(await request.text(), secret))
+        if failure == "garbage":
+            return web.Response(text="NOT ENCRYPTED")
+
+        if payload.get("appkey") != self.appkey:
+            reply = {"result_code": "E00001", "result_msg": "er_invalid_appkey"}
+        elif endpoint == "login":
+            reply = self._login(payload)
+        elif not self._token_valid(payload.get("token")):
+            reply = {"result_code": "E00003", "result_msg": "er_token_login_invalid"}
+        elif handler := getattr(self, f"_{endpoint}", None):
+            reply = {"result_code": "1", "result_msg": "success"}
+            reply["result_data"] = handler(payload)
+        else:
+            return web.Response(status=404, text="Not Found")
+        return web.Response(text=aes_encrypt(json.dumps(reply), secret))
+
+    def _login(self, payload: dict) -> dict:
+        if (
+            payload.get("user_account") != self.username
+            or payload.get("user_password") != self.password
+        ):
+            return {"result_code": "E00002", "result_msg": "er_login_failed"}
+        token = secrets.token_hex(16)
+        self.tokens[token] = time.time()
+        return {"result_code": "1", "result_data": {"token": token}}
+
+    def _getPowerStationList(self, payload: dict) -> dict:
+        page, size = int(payload["curPage"]), int(payload["size"])
+        first = (page - 1) * size
+        return {
+            "pageList": self.stations[first:][:size],
+            "rowCount": len(self.stations),
+        }
+
+    def _getDeviceList(self, payload: dict) -> dict:
+        return {
+            "pageList": [
+                {
+                    "communication_dev_sn": f"SN{payload['ps_id']}",
+                    "type_name": "Communication Module",
+                }
+            ]
+        }
+
+    def _getPowerStationDetail(self, payload: dict) -> dict:
+        return {"ps_key": self.ps_key(int(payload["sn"][2:]))}
+
+    def _getOpenPointInfo(self, payload: dict) -> dict:
+        return {"pageList": self.catalog[: int(payload.get("size", 999))]}
+
+    def _value(self) -> str:
+        return f"{self.rng.uniform(0, 5000):.1f}"
+
+    def _getDeviceRealTimeData(self, payload: dict) -> dict:
+        point_ids = [
+            point_id
+            for point_id in map(int, payload["point_id_list"])
+            if point_id in self._point_ids
+        ]
+        return {
+            "device_point_list": [
+                {
+                    "device_point": {
+                        "ps_key": ps_key,
+                        "device_time": datetime.now().strftime(TIME_FORMAT),
+                        **{f"p{point_id}": self._value() for point_id in point_ids},
+                    }
+                }
+                for ps_key in payload["ps_key_list"]
+            ]
+        }
+
+    def _getDevicePointMinuteDataList(self, payload: dict) -> dict:
+        start = datetime.strptime(payload["start_time_stamp"], TIME_FORMAT)
+        end = datetime.strptime(payload["end_time_stamp"], TIME_FORMAT)
+        step = timedelta(minutes=int(payload.get("minute_interval", 5)))
+        points = [point for point in payload["points"].split(",") if point]
+        rows = []
+        when = start
+        while when <= end:
+            row = {point: self._value() for point in points}
+            row["time_stamp"] = when.strftime(TIME_FORMAT)
+            rows.append(row)
+            when += step
+        return {ps_key: rows for ps_key in payload["ps_key_list"]}
+
+
+async def serve(args: argparse.Namespace) -> None:
+    gateway = FakeGateway(
+        plants=args.plants,
+        points=args.points,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        token_ttl=args.token_ttl,
+    )
+    await gateway.start(args.host, args.port)
+    print(json.dumps(gateway.entry_data(), indent=2), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await gateway.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--plants", type=int, default=1)
+    parser.add_argument("--points", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=None)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
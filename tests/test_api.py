@@ -0,0 +1,337 @@
+import base64
+import json
+import threading
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from custom_components.suncloud_monitor.api import (
+    SuncloudApiError,
+    SuncloudAuthError,
+    SuncloudCircuitOpenError,
+    SuncloudClient,
+    SuncloudCrypto,
+)
+from custom_components.suncloud_monitor.const import (
+    BREAKER_THRESHOLD,
+    CONNECTOR_KEEPALIVE,
+    CONNECTOR_LIMIT,
+    REQUEST_RETRY_MAX_DELAY,
+)
+
+
+def make_rsa_key_b64():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=1024)
+    der = private_key.public_key().public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return base64.urlsafe_b64encode(der).decode()
+
+
+def make_client(crypto=None, **kwargs):
+    return SuncloudClient(
+        appkey="APP",
+        access_key="AK",
+        username="user",
+        password="secret",
+        crypto=crypto or SuncloudCrypto(""),
+        retry_delay=0,
+        **kwargs,
+    )
+
+
+def test_rsa_encrypt_returns_string():
+    result = SuncloudCrypto("").rsa_encrypt("test", "invalidkey===")
+    assert isinstance(result, str)
+
+
+def test_public_key_parsed_once():
+    rsa_key = make_rsa_key_b64()
+    crypto = SuncloudCrypto(rsa_key)
+    first = crypto.load_public_key(rsa_key)
+    assert crypto.load_public_key(rsa_key) is first
+    assert crypto.rsa_encrypt("secret")
+
+
+def test_session_key_reused_within_rotation_window():
+    crypto = SuncloudCrypto(make_rsa_key_b64())
+    key, header = crypto.session_key()
+    assert header
+    assert crypto.session_key() == (key, header)
+
+    crypto.invalidate()
+    assert crypto.session_key() != (key, header)
+
+
+def test_session_key_rotates_when_window_is_zero():
+    crypto = SuncloudCrypto(make_rsa_key_b64(), key_rotation=0)
+    assert crypto.session_key() != crypto.session_key()
+
+
+def test_aes_encrypt_and_decrypt_roundtrip():
+    secret_json = json.dumps({"msg": "secret-message"})
+    encrypted_json = SuncloudCrypto.aes_encrypt(secret_json, "password")
+    decrypted = SuncloudCrypto.aes_decrypt(encrypted_json, "password")
+    assert isinstance(decrypted, dict)
+    assert decrypted["msg"] == "secret-message"
+
+
+def test_aes_decrypt_garbage_returns_none():
+    assert SuncloudCrypto.aes_decrypt("nothex", "password") is None
+
+
+def test_build_headers_without_token():
+    headers = make_client().build_headers("encryptedkey")
+    assert "Content-Type" in headers
+    assert headers["x-access-key"] == "AK"
+    assert "token" not in headers
+
+
+def test_build_headers_with_token():
+    headers = make_client().build_headers("encryptedkey", token="TOKEN")
+    assert headers["token"] == "TOKEN"
+
+
+def test_build_encrypted_payload_leaves_payload_untouched():
+    client = make_client()
+    payload = {"sn": "SN"}
+    encrypted = client.build_encrypted_payload(payload, "TOKEN", "k" * 16)
+    decrypted = SuncloudCrypto.aes_decrypt(encrypted, "k" * 16)
+    assert decrypted["appkey"] == "APP"
+    assert decrypted["token"] == "TOKEN"
+    assert payload == {"sn": "SN"}
+
+
+class FakeResponse:
+    def __init__(self, body, status=200):
+        self._body = body
+        self.status = status
+
+    async def read(self):
+        return self._body.encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        self.calls.append((url, headers))
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def make_session_client(replies):
+    key = "k" * 16
+    crypto = SuncloudCrypto("")
+    crypto.session_key = lambda: (key, "HEADER")
+    session = FakeSession(
+        [
+            (
+                reply
+                if isinstance(reply, (Exception, FakeResponse))
+                else FakeResponse(crypto.aes_encrypt(json.dumps(reply), key))
+            )
+            for reply in replies
+        ]
+    )
+    return make_client(crypto, session=session), session
+
+
+@pytest.mark.asyncio
+async def test_expired_token_triggers_single_relogin_and_replay():
+    client, session = make_session_client(
+        [
+            {"result_code": "E00003", "result_msg": "er_token_login_invalid"},
+            {"result_code": "1", "result_data": {"ps_key": "1_11_0_0"}},
+        ]
+    )
+    client.token = "OLD"
+
+    async def fake_login():
+        client.token = "NEW"
+
+    client.login = AsyncMock(side_effect=fake_login)
+
+    detail = await client.power_station_detail("SN")
+
+    assert detail["ps_key"] == "1_11_0_0"
+    client.login.assert_awaited_once()
+    assert [headers["token"] for _, headers in session.calls] == ["OLD", "NEW"]
+
+
+@pytest.mark.asyncio
+async def test_token_rejected_twice_fails_request():
+    expired = {"result_code": "E00003"}
+    client, _ = make_session_client([expired, expired])
+    client.token = "OLD"
+    client.login = AsyncMock()
+
+    with pytest.raises(SuncloudAuthError):
+        await client.power_station_detail("SN")
+    client.login.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_login_reports_new_token():
+    tokens = []
+    client, _ = make_session_client([{"result_data": {"token": "TOKEN"}}])
+    client.on_token = lambda token, issued_at: tokens.append(token)
+
+    await client.ensure_token()
+    await client.ensure_token()
+
+    assert client.token == "TOKEN"
+    assert tokens == ["TOKEN"]
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried():
+    client, session = make_session_client(
+        [
+            aiohttp.ClientConnectionError("reset"),
+            FakeResponse("Bad Gateway", status=502),
+            {"result_code": "1", "result_data": {"pageList": [{"ps_id": 1}]}},
+        ]
+    )
+
+    assert (await client.power_stations())["pageList"] == [{"ps_id": 1}]
+    assert len(session.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_request_fails_after_retries_or_on_garbage():
+    client, _ = make_session_client(
+        [FakeResponse("Unavailable", status=503)] * 3 + [FakeResponse("garbage")]
+    )
+
+    with pytest.raises(SuncloudApiError, match="HTTP 503"):
+        await client.power_stations()
+    with pytest.raises(SuncloudApiError, match="Decryption failed"):
+        await client.power_stations()
+
+
+@pytest.mark.asyncio
+async def test_owned_session_is_pooled_and_reused():
+    client = make_client()
+    session = client.session
+    assert client.session is session
+    connector = session.connector
+    assert connector.limit == CONNECTOR_LIMIT
+    assert connector._keepalive_timeout == CONNECTOR_KEEPALIVE
+    assert connector._use_dns_cache
+    await client.close()
+    assert session.closed
+
+
+@pytest.mark.asyncio
+async def test_requests_are_recorded_per_endpoint():
+    client, _ = make_session_client(
+        [
+            {"result_code": "1", "result_data": {"pageList": []}},
+            FakeResponse("Unavailable", status=503),
+            FakeResponse("Unavailable", status=503),
+            FakeResponse("Unavailable", status=503),
+        ]
+    )
+
+    await client.power_stations()
+    with pytest.raises(SuncloudApiError):
+        await client.power_stations()
+
+    metrics = client.metrics.endpoints["getPowerStationList"]
+    assert metrics.requests == 2
+    assert metrics.errors == 1
+    assert metrics.result_codes == {"1": 1, "error": 1}
+    assert metrics.bytes_sent > 0 and metrics.bytes_received > 0
+    assert metrics.decrypted_bytes == len(
+        json.dumps({"result_code": "1", "result_data": {"pageList": []}})
+    )
+    assert metrics.crypto_time > 0
+
+
+@pytest.mark.asyncio
+async def test_large_replies_are_decrypted_in_executor():
+    reply = {"result_code": "1", "result_data": {"pageList": [{"ps_id": 1}]}}
+    client, _ = make_session_client([reply, reply])
+    threads = []
+    decrypt = client.crypto.aes_decrypt_sized
+
+    def tracking_decrypt(content, password):
+        threads.append(threading.get_ident())
+        return decrypt(content, password)
+
+    client.crypto.aes_decrypt_sized = tracking_decrypt
+
+    await client.power_stations()
+    client.offload_threshold = 0
+    assert (await client.power_stations())["pageList"] == [{"ps_id": 1}]
+
+    assert threads[0] == threading.get_ident()
+    assert threads[1] != threading.get_ident()
+
+
+def test_aes_decrypt_accepts_bytes_and_rejects_bad_padding():
+    key = "k" * 16
+    encrypted = SuncloudCrypto.aes_encrypt(json.dumps({"a": 1}), key)
+    assert SuncloudCrypto.aes_decrypt(encrypted.encode(), key) == {"a": 1}
+    assert SuncloudCrypto.aes_decrypt(encrypted, "x" * 16) is None
+    assert SuncloudCrypto.aes_decrypt(b"", key) is None
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_is_paused_by_circuit_breaker():
+    client, session = make_session_client([FakeResponse("Unavailable", status=503)] * 9)
+    client.retries = 0
+
+    for _ in range(BREAKER_THRESHOLD):
+        with pytest.raises(SuncloudApiError, match="HTTP 503"):
+            await client.power_stations()
+    with pytest.raises(SuncloudCircuitOpenError):
+        await client.power_stations()
+
+    assert len(session.calls) == BREAKER_THRESHOLD
+    assert client.breakers["getPowerStationList"].state == "open"
+    # Other endpoints keep their own circuit.
+    with pytest.raises(SuncloudApiError, match="HTTP 503"):
+        await client.device_list(1)
+
+
+def test_backoff_is_jittered_and_capped():
+    client = make_client()
+    client.retry_delay = 1.0
+    delays = [client.backoff(3) for _ in range(50)]
+    assert all(2.0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
+    assert client.backoff(20) <= REQUEST_RETRY_MAX_DELAY
+
+
+@pytest.mark.asyncio
+async def test_endpoint_timeout_overrides_default():
+    client, session = make_session_client([{"result_code": "1"}])
+    client.timeouts = {"getPowerStationList": 7}
+    timeouts = []
+    post = session.post
+
+    def recording_post(url, headers=None, data=None, timeout=None):
+        timeouts.append(timeout.total)
+        return post(url, headers=headers, data=data, timeout=timeout)
+
+    session.post = recording_post
+    await client.power_stations()
+    assert timeouts == [7]
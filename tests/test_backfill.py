@@ -0,0 +1,247 @@
+import logging
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.suncloud_monitor import backfill as backfill_module
+from custom_components.suncloud_monitor.backfill import (
+    PointStatistics,
+    SuncloudBackfill,
+    parse_history_row,
+    statistic_id,
+)
+from custom_components.suncloud_monitor.const import HISTORY_TIME_FORMAT
+from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+
+NOW = datetime(2024, 1, 2, 12, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+START = datetime(2024, 1, 2, 6, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+class DummyBus:
+    def async_listen_once(self, event, callback):
+        return None
+
+
+class DummyConfig:
+    components: frozenset[str] = frozenset()
+
+    @staticmethod
+    def path(name):
+        return name
+
+
+class DummyHass:
+    def __init__(self):
+        self.bus = DummyBus()
+        self.config = DummyConfig()
+        self.data = {}
+
+
+def sample_time(index: int) -> datetime:
+    return START + timedelta(minutes=5 * index)
+
+
+def test_parse_history_row_keeps_numeric_points():
+    when, values = parse_history_row(
+        {"time_stamp": "20240102061500", "p83022": "1.5", "p83033": "--", "ps_key": 1}
+    )
+    assert when == datetime(2024, 1, 2, 6, 15, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    assert values == {"83022": 1.5}
+
+
+def test_point_statistics_hourly_mean_and_sum():
+    power = PointStatistics({"has_sum": False})
+    rows = [power.add(sample_time(i), float(i % 12)) for i in range(13)]
+    assert rows[:12] == [None] * 12
+    assert rows[12] == {"start": START, "mean": 5.5, "min": 0.0, "max": 11.0}
+
+    energy = PointStatistics({"has_sum": True})
+    # A daily counter that resets to zero at the end of the second hour.
+    rows = [
+        energy.add(START + timedelta(minutes=20 * i), float(value))
+        for i, value in enumerate([0, 5, 10, 15, 20, 2])
+    ]
+    assert [row for row in rows if row] == [
+        {"start": START, "state": 10.0, "sum": 10.0}
+    ]
+    assert energy.finish() == {
+        "start": START + timedelta(hours=1),
+        "state": 2.0,
+        "sum": 22.0,
+    }
+    assert energy.finish() is None
+
+
+def test_point_statistics_resume_after_lost_hours_starts_new_baseline():
+    energy = PointStatistics({"has_sum": True})
+    lost = START - timedelta(hours=3)
+    energy.resume({"start": lost.timestamp(), "state": 5.0, "sum": 100.0}, START)
+    assert energy.after == START
+    # The counter moved from 5 to 50 in hours that can no longer be read;
+    # that change is not booked on the first imported hour.
+    energy.add(START, 50.0)
+    energy.add(START + timedelta(minutes=30), 52.0)
+    assert energy.finish() == {"start": START, "state": 52.0, "sum": 102.0}
+
+
+def make_backfill_coordinator(monkeypatch):
+    entry = MagicMock()
+    entry.data = {}
+    entry.options = {}
+    coordinator = SuncloudDataCoordinator(DummyHass(), entry)
+    coordinator.ps_key = "PSK"
+    coordinator._points = {
+        "83022": {"point_name": "Power", "unit": "W"},
+        "83004": {"point_name": "Yield", "unit": "Wh"},
+        "83012": {"point_name": "Capacity", "unit": "kWp"},
+    }
+    requests = []
+
+    async def fake_post(endpoint, payload, tag):
+        assert endpoint == "getDevicePointMinuteDataList"
+        start = datetime.strptime(payload["start_time_stamp"], HISTORY_TIME_FORMAT)
+        end = datetime.strptime(payload["end_time_stamp"], HISTORY_TIME_FORMAT)
+        requests.append((start.hour, end.hour, payload["points"]))
+        rows = []
+        when = start
+        while when <= end:
+            index = int((when - START.replace(tzinfo=None)).total_seconds()) // 300
+            rows.append(
+                {
+                    "time_stamp": when.strftime(HISTORY_TIME_FORMAT),
+                    "p83022": "100",
+                    "p83004": str(index),
+                }
+            )
+            when += timedelta(minutes=5)
+        return {"result_data": {ps_key: rows for ps_key in payload["ps_key_list"]}}
+
+    coordinator.api.request = AsyncMock(side_effect=fake_post)
+    monkeypatch.setattr(dt_util, "now", lambda: NOW)
+    monkeypatch.setattr(backfill_module, "BACKFILL_MAX_AGE", 6 * 3600)
+    monkeypatch.setattr(backfill_module, "BACKFILL_BATCH_SIZE", 4)
+    return coordinator, requests
+
+
+@pytest.mark.asyncio
+async def test_backfill_streams_windows_and_imports_in_batches(monkeypatch):
+    coordinator, requests = make_backfill_coordinator(monkeypatch)
+    backfill = SuncloudBackfill(coordinator)
+    backfill._async_last_statistics = AsyncMock(return_value={})
+    imports = []
+
+    def record_import(stats, rows):
+        imports.append((stats.metadata["statistic_id"], list(rows)))
+        return len(rows)
+
+    backfill._import = record_import
+
+    assert await backfill.async_run() == 12
+
+    # Two 3-hour windows, static points never requested.
+    assert requests == [(6, 9, "p83004,p83022"), (9, 12, "p83004,p83022")]
+    assert all(len(rows) <= 4 for _, rows in imports)
+    energy = [
+        row for sid, rows in imports if sid == statistic_id("83004") for row in rows
+    ]
+    assert [row["start"].hour for row in energy] == [6, 7, 8, 9, 10, 11]
+    assert energy[0]["sum"] == 11
+    assert energy[-1] == {"start": START + timedelta(hours=5), "state": 71, "sum": 71}
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_after_last_imported_hour(monkeypatch):
+    coordinator, requests = make_backfill_coordinator(monkeypatch)
+    backfill = SuncloudBackfill(coordinator)
+    last_hour = START + timedelta(hours=4)
+    backfill._async_last_statistics = AsyncMock(
+        return_value={
+            statistic_id("83004"): {
+                "start": last_hour.timestamp(),
+                "state": 59.0,
+                "sum": 1000.0,
+            },
+            statistic_id("83022"): {"start": last_hour.timestamp()},
+        }
+    )
+    imports = []
+
+    def record_import(stats, rows):
+        imports.extend(rows)
+        return len(rows)
+
+    backfill._import = record_import
+
+    assert await backfill.async_run() == 2
+
+    assert requests == [(11, 12, "p83004,p83022")]
+    assert {"start": START + timedelta(hours=5), "state": 71, "sum": 1012} in imports
+
+
+@pytest.mark.asyncio
+async def test_first_backfill_limited_to_last_day_and_logs_request_count(
+    monkeypatch, caplog
+):
+    coordinator, requests = make_backfill_coordinator(monkeypatch)
+    monkeypatch.setattr(backfill_module, "BACKFILL_MAX_AGE", 7 * 24 * 3600)
+    backfill = SuncloudBackfill(coordinator)
+    backfill._async_last_statistics = AsyncMock(return_value={})
+    backfill._import = lambda stats, rows: len(rows)
+
+    with caplog.at_level(logging.INFO):
+        await backfill.async_run()
+
+    assert len(requests) == 8
+    assert "in 8 requests" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_backfill_deferred_when_call_budget_runs_low(monkeypatch):
+    coordinator, requests = make_backfill_coordinator(monkeypatch)
+    coordinator.budget.register(coordinator.config_entry.entry_id, 10)
+    for _ in range(5):
+        coordinator.budget.record("getDeviceRealTimeData")
+    request = coordinator.api.request.side_effect
+
+    async def counted_request(endpoint, payload, tag):
+        coordinator.budget.record(endpoint)
+        return await request(endpoint, payload, tag)
+
+    coordinator.api.request.side_effect = counted_request
+    backfill = SuncloudBackfill(coordinator)
+    backfill._async_last_statistics = AsyncMock(return_value={})
+    imports = []
+
+    def record_import(stats, rows):
+        imports.extend(row["start"].hour for row in rows)
+        return len(rows)
+
+    backfill._import = record_import
+
+    await backfill.async_run()
+
+    # 5 of 10 calls were left for the first window, 4 for the second.
+    assert requests == [(6, 9, "p83004,p83022")]
+    assert backfill.deferred
+    assert sorted(set(imports)) == [6, 7, 8]
+
+
+def test_closed_hours_imported_only_while_updates_succeed(monkeypatch):
+    entry = MagicMock()
+    entry.data = {}
+    entry.options = {"backfill": True}
+    hass = DummyHass()
+    hass.config.components = {"recorder"}
+    hass.async_create_background_task = MagicMock()
+    coordinator = SuncloudDataCoordinator(hass, entry)
+    coordinator._async_backfill = MagicMock()
+
+    coordinator.last_update_success = False
+    coordinator.async_import_closed_hours()
+    hass.async_create_background_task.assert_not_called()
+
+    coordinator.last_update_success = True
+    coordinator.async_import_closed_hours()
+    hass.async_create_background_task.assert_called_once()
@@ -0,0 +1,52 @@
+from custom_components.suncloud_monitor import breaker as breaker_module
+from custom_components.suncloud_monitor.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+class Clock:
+    now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_opens_after_threshold_and_lets_one_trial_through(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, "monotonic", clock.monotonic)
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 60
+
+    clock.now += 60
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.as_dict() == {"state": "closed", "failures": 0, "retry_in": 0.0}
+
+
+def test_abandoned_trial_allows_another(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, "monotonic", clock.monotonic)
+    breaker = CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
@@ -0,0 +1,99 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+import voluptuous as vol
+from homeassistant.core import CoreState
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.suncloud_monitor.config_flow import SuncloudOptionsFlow
+from custom_components.suncloud_monitor.storage import SuncloudStore
+
+
+class DummyConfig:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, *parts):
+        return str(Path(self.root, *parts))
+
+
+class DummyHass:
+    def __init__(self, root):
+        self.config = DummyConfig(root)
+        self.state = CoreState.running
+        self.data = {}
+
+    def async_create_task(self, coro, name=None):
+        return asyncio.ensure_future(coro)
+
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+POINTS = {
+    "83002": {"point_name": "Inverter AC power", "unit": "W"},
+    "83022": {"point_name": "Daily yield", "unit": "Wh"},
+}
+
+
+def make_flow(hass, options=None):
+    entry = MagicMock()
+    entry.entry_id = "entry1"
+    entry.options = options or {}
+    flow = SuncloudOptionsFlow(entry)
+    flow.hass = hass
+    return flow
+
+
+@pytest.mark.asyncio
+async def test_options_of_unloaded_entry_edit_the_stored_points(tmp_path):
+    hass = DummyHass(tmp_path)
+    store = SuncloudStore(hass, "entry1")
+    store.data = {"points": POINTS, "ps_key": "1_11_0_0"}
+    await store.async_save()
+    flow = make_flow(hass)
+
+    form = await flow.async_step_init()
+    assert form["type"] == FlowResultType.FORM
+    selector = form["data_schema"].schema
+    assert [key.default() for key in selector if key == "points"] == [
+        ["83002", "83022"]
+    ]
+
+    result = await flow.async_step_init({"points": ["83022"]})
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["data"]["points"] == ["83022"]
+    stored = await SuncloudStore(hass, "entry1").async_load()
+    assert stored == {"points": {"83022": POINTS["83022"]}, "ps_key": "1_11_0_0"}
+
+
+@pytest.mark.asyncio
+async def test_repopulate_aborts_when_entry_not_loaded(tmp_path):
+    flow = make_flow(DummyHass(tmp_path))
+
+    result = await flow.async_step_init({"repopulate": True})
+
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "not_loaded"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "option, value",
+    [
+        ("max_concurrency", 0),
+        ("point_chunk_size", 0),
+        ("poll_interval", -5),
+        ("tier_static_interval", 0),
+        ("daily_call_limit", -1),
+    ],
+)
+async def test_options_reject_values_that_break_polling(tmp_path, option, value):
+    form = await make_flow(DummyHass(tmp_path)).async_step_init()
+    schema = form["data_schema"]
+
+    assert schema({option: 1})[option] == 1
+    with pytest.raises(vol.Invalid):
+        schema({option: value})
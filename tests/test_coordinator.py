@@ -1,17 +1,28 @@
+import asyncio
 import json
+import time
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
-from unittest.mock import MagicMock
 
-from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+from custom_components.suncloud_monitor import coordinator as coordinator_module
+from custom_components.suncloud_monitor.const import TOKEN_MAX_AGE
+from custom_components.suncloud_monitor.coordinator import (
+    SuncloudDataCoordinator,
+    chunked,
+)
 
 
 class DummyBus:
-    async def async_listen_once(self, event, callback):
+    def async_listen_once(self, event, callback):
         """Simulate Home Assistant's bus.listen_once method."""
-        return None
+        return lambda: None
 
 
 class DummyConfig:
+    components: frozenset[str] = frozenset()
+
     @staticmethod
     def path(name):
         return name
@@ -21,6 +32,7 @@ class DummyHass:
     def __init__(self):
         self.bus = DummyBus()
         self.config = DummyConfig()
+        self.data = {}
 
 
 def make_mock_entry(data=None, options=None):
@@ -40,56 +52,514 @@ def test_coordinator_initializes():
     assert coordinator.points == {}
 
 
-def test_rsa_encrypt_returns_string():
+@pytest.mark.asyncio
+async def test_shutdown_flushes_store_and_closes_session():
     coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
-    result = coordinator._rsa_encrypt("test", "invalidkey===")
-    assert isinstance(result, str)
+    coordinator.store.async_flush = AsyncMock()
+    coordinator.api.close = AsyncMock()
+
+    await coordinator._on_shutdown(None)
 
+    coordinator.store.async_flush.assert_awaited_once()
+    coordinator.api.close.assert_awaited_once()
+    assert coordinator.budget.entries == []
 
-def test_aes_encrypt_and_decrypt_roundtrip():
-    coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
-    secret = "secret-message"
-    password = "password"
-    secret_json = json.dumps({"msg": secret})
-    encrypted_json = coordinator._aes_encrypt(secret_json, password)
-    decrypted = coordinator._aes_decrypt(encrypted_json, password)
-    assert isinstance(decrypted, dict)
-    assert decrypted["msg"] == secret
 
+def test_chunked_splits_evenly_and_keeps_remainder():
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+    assert chunked([], 3) == []
 
-def test_aes_decrypt_garbage_returns_none():
-    coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
-    assert coordinator._aes_decrypt("nothex", "password") is None
 
+def make_fleet_coordinator(station_count):
+    stations = [
+        {"ps_id": 1000 + i, "ps_name": f"Plant {i}"} for i in range(station_count)
+    ]
+    calls = []
+
+    async def fake_post(endpoint, payload, tag):
+        calls.append((endpoint, payload))
+        if endpoint == "getPowerStationList":
+            page = chunked(stations, payload["size"])[payload["curPage"] - 1]
+            return {"result_data": {"rowCount": station_count, "pageList": page}}
+        if endpoint == "getDeviceList":
+            sn = f"SN{payload['ps_id']}"
+            return {
+                "result_data": {
+                    "pageList": [
+                        {
+                            "communication_dev_sn": sn,
+                            "type_name": "Communication Module",
+                        }
+                    ]
+                }
+            }
+        if endpoint == "getPowerStationDetail":
+            return {"result_data": {"ps_key": f"{payload['sn'][2:]}_11_0_0"}}
+        if endpoint == "getDeviceRealTimeData":
+            return {
+                "result_data": {
+                    "device_point_list": [
+                        {"device_point": {"ps_key": ps_key, "p83002": ps_key[:4]}}
+                        for ps_key in payload["ps_key_list"]
+                    ]
+                }
+            }
+        raise AssertionError(endpoint)
 
-def test_build_headers_without_token():
-    entry = make_mock_entry(data={"access_key": "foo"})
+    entry = make_mock_entry(options={"fleet_mode": True})
     coordinator = SuncloudDataCoordinator(DummyHass(), entry)
-    coordinator.config = entry.data
-    headers = coordinator._build_headers("encryptedkey")
-    assert "Content-Type" in headers
-    assert headers["x-access-key"] == "foo"
-    assert "token" not in headers
+    coordinator.api.request = fake_post
+    coordinator._save_config_storage = AsyncMock()
+    return coordinator, calls
+
+
+@pytest.mark.asyncio
+async def test_fetch_fleet_pages_and_resolves_every_plant(monkeypatch):
+    monkeypatch.setattr(coordinator_module, "FLEET_PAGE_SIZE", 2)
+    coordinator, calls = make_fleet_coordinator(5)
+
+    await coordinator._fetch_fleet()
+
+    pages = [p["curPage"] for e, p in calls if e == "getPowerStationList"]
+    assert sorted(pages) == [1, 2, 3]
+    assert len(coordinator.plants) == 5
+    assert coordinator.plants["1003_11_0_0"] == {
+        "ps_id": 1003,
+        "ps_name": "Plant 3",
+        "sn": "SN1003",
+    }
+
+
+@pytest.mark.asyncio
+async def test_fleet_realtime_batches_ps_keys(monkeypatch):
+    monkeypatch.setattr(coordinator_module, "REALTIME_MAX_PS_KEYS", 2)
+    coordinator, calls = make_fleet_coordinator(0)
+    coordinator.plants = {f"{1000 + i}_11_0_0": {} for i in range(5)}
+
+    data = await coordinator._async_update_fleet(["83002"])
 
+    batches = [p["ps_key_list"] for e, p in calls if e == "getDeviceRealTimeData"]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert data[("1004_11_0_0", "83002")] == "1004"
+    assert len(data) == 5
 
-def test_build_headers_with_token():
-    entry = make_mock_entry(data={"access_key": "foo"})
+
+def make_chunked_coordinator(failing_point=None):
+    entry = make_mock_entry(options={"point_chunk_size": 2, "max_concurrency": 2})
     coordinator = SuncloudDataCoordinator(DummyHass(), entry)
-    coordinator.config = entry.data
-    headers = coordinator._build_headers("encryptedkey", token="TOKEN")
-    assert headers["token"] == "TOKEN"
+    coordinator.store.async_schedule_save = MagicMock()
+    coordinator.token, coordinator.token_issued_at = "TOKEN", time.time()
+    coordinator.ps_id, coordinator.sn, coordinator.ps_key = 1, "SN", "1_11_0_0"
+    coordinator.discovered_at = time.time()
+    coordinator._points = {str(pid): {} for pid in range(83001, 83006)}
+    state = {"in_flight": 0, "peak": 0, "requests": []}
+
+    async def fake_fetch_realtime(ps_keys, point_ids):
+        state["requests"].append(point_ids)
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0)
+        state["in_flight"] -= 1
+        if failing_point in point_ids:
+            raise coordinator_module.UpdateFailed("chunk timed out")
+        return [{"device_point": {f"p{pid}": int(pid) for pid in point_ids}}]
+
+    coordinator._fetch_realtime = fake_fetch_realtime
+    return coordinator, state
+
+
+@pytest.mark.asyncio
+async def test_realtime_points_fetched_in_bounded_concurrent_chunks():
+    coordinator, state = make_chunked_coordinator()
+
+    data = await coordinator._async_update_data()
+
+    assert [len(ids) for ids in state["requests"]] == [2, 2, 1]
+    assert state["peak"] == 2
+    assert data == {str(pid): pid for pid in range(83001, 83006)}
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_only_drops_its_own_points():
+    coordinator, _ = make_chunked_coordinator(failing_point="83003")
+
+    data = await coordinator._async_update_data()
+
+    assert set(data) == {"83001", "83002", "83005"}
 
 
 @pytest.mark.asyncio
-async def test_async_start_and_shutdown():
-    """Test async_start registers a shutdown listener, and _on_shutdown removes it."""
+async def test_update_fails_when_every_chunk_fails():
+    coordinator, _ = make_chunked_coordinator(failing_point="83003")
+    coordinator._points = {"83003": {}}
+
+    with pytest.raises(coordinator_module.UpdateFailed):
+        await coordinator._async_update_data()
+
+
+@pytest.mark.asyncio
+async def test_persisted_token_reused_until_too_old():
+    coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
+    coordinator.store.async_load = AsyncMock(
+        return_value={"token": "SAVED", "token_issued_at": time.time()}
+    )
+
+    await coordinator._load_config_storage()
+
+    assert coordinator.token == "SAVED"
+    assert not coordinator.api.token_too_old()
+    coordinator.token_issued_at -= TOKEN_MAX_AGE + 1
+    assert coordinator.api.token_too_old()
+
+
+class BackgroundHass(DummyHass):
+    def __init__(self):
+        super().__init__()
+        self.background = []
+
+    def async_create_background_task(self, coro, name):
+        task = asyncio.ensure_future(coro)
+        self.background.append(task)
+        return task
+
+
+@pytest.mark.asyncio
+async def test_stale_discovery_cache_served_and_revalidated_in_background():
+    hass = BackgroundHass()
+    coordinator = SuncloudDataCoordinator(hass, make_mock_entry())
+    coordinator.token, coordinator.token_issued_at = "TOKEN", time.time()
+    coordinator.ps_id, coordinator.sn, coordinator.ps_key = 1, "SN", "OLD_KEY"
+    coordinator._points = {"83002": {"point_name": "old"}}
+    coordinator._save_config_storage = AsyncMock()
+
+    async def fake_post(endpoint, payload, tag):
+        return {
+            "getPowerStationList": {"result_data": {"pageList": [{"ps_id": 1}]}},
+            "getDeviceList": {
+                "result_data": {
+                    "pageList": [
+                        {
+                            "communication_dev_sn": "SN",
+                            "type_name": "Communication Module",
+                        }
+                    ]
+                }
+            },
+            "getPowerStationDetail": {"result_data": {"ps_key": "NEW_KEY"}},
+            "getOpenPointInfo": {
+                "result_data": {
+                    "pageList": [
+                        {"point_id": 83002, "point_name": "new"},
+                        {"point_id": 83004, "point_name": "unselected"},
+                    ]
+                }
+            },
+        }[endpoint]
+
+    coordinator.api.request = AsyncMock(side_effect=fake_post)
+
+    await coordinator._ensure_ready()
+
+    assert coordinator.ps_key == "OLD_KEY"
+    assert len(hass.background) == 1
+    await asyncio.gather(*hass.background)
+    assert coordinator.ps_key == "NEW_KEY"
+    assert coordinator.points == {"83002": {"point_id": 83002, "point_name": "new"}}
+    assert not coordinator._discovery_stale()
+    coordinator._save_config_storage.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_discovery_cache_with_other_version_is_ignored():
+    coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
+    coordinator.store.async_load = AsyncMock(
+        return_value={
+            "discovery_version": 999,
+            "ps_key": "STALE",
+            "points": {"1": {}},
+        }
+    )
+
+    await coordinator._load_config_storage()
+
+    assert coordinator.ps_key is None
+    assert coordinator.points == {}
+
+
+def test_diff_reports_changed_added_and_removed_keys():
+    diff = SuncloudDataCoordinator._diff
+    assert diff(None, {"1": 1}) is None
+    assert diff({"1": 1, "2": 2, "3": 3}, {"1": 1, "2": 5, "4": 4}) == {"2", "3", "4"}
+
+
+def test_only_listeners_of_changed_points_are_notified():
+    coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
+    coordinator.update_interval = None
+    notified = []
+    for key in ("83001", "83002", "83003"):
+        coordinator.async_add_listener(lambda key=key: notified.append(key), key)
+    coordinator.async_add_listener(lambda: notified.append("any"))
+
+    coordinator._changed = {"83002"}
+    coordinator.async_update_listeners()
+
+    assert notified == ["83002", "any"]
+    assert coordinator.update_stats == {"written": 2, "skipped": 2}
+
+    notified.clear()
+    coordinator.last_update_success = False
+    coordinator._changed = set()
+    coordinator.async_update_listeners()
+    assert len(notified) == 4
+
+
+@pytest.mark.asyncio
+async def test_only_due_tiers_are_requested_and_others_carried_forward():
+    coordinator, state = make_chunked_coordinator()
+    coordinator._points = {
+        "83002": {"unit": "W"},
+        "83004": {"unit": "Wh"},
+    }
+
+    first = await coordinator._async_update_data()
+    coordinator.data = first
+    second = await coordinator._async_update_data()
+
+    assert state["requests"] == [["83002", "83004"], ["83002"]]
+    assert second == {"83002": 83002, "83004": 83004}
+
+
+@pytest.mark.asyncio
+async def test_slower_tier_points_rewritten_when_their_tier_is_fetched():
+    coordinator, _ = make_chunked_coordinator()
+    coordinator._points = {"83002": {"unit": "W"}, "83004": {"unit": "Wh"}}
+    coordinator.data = {"83002": 83002, "83004": 83004}
+
+    await coordinator._async_update_data()
+
+    # Neither value changed, but the slow point has a new fetched_at.
+    assert coordinator._changed == {"83004"}
+    assert coordinator.fetched_at("83002") is None
+    assert time.time() - coordinator.fetched_at("83004") < 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_discovery_and_catalog_refresh_share_requests():
+    coordinator = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
+    coordinator.token, coordinator.token_issued_at = "TOKEN", time.time()
+    coordinator._save_config_storage = AsyncMock()
+    calls = []
+
+    async def fake_post(endpoint, payload, tag):
+        calls.append(endpoint)
+        await asyncio.sleep(0)
+        return {
+            "getPowerStationList": {"result_data": {"pageList": [{"ps_id": 1}]}},
+            "getDeviceList": {
+                "result_data": {
+                    "pageList": [
+                        {
+                            "communication_dev_sn": "SN",
+                            "type_name": "Communication Module",
+                        }
+                    ]
+                }
+            },
+            "getPowerStationDetail": {"result_data": {"ps_key": "1_11_0_0"}},
+            "getOpenPointInfo": {"result_data": {"pageList": [{"point_id": 83002}]}},
+            "getDeviceRealTimeData": {
+                "result_data": {"device_point_list": [{"device_point": {}}]}
+            },
+        }[endpoint]
+
+    coordinator.api.request = fake_post
+
+    await asyncio.gather(coordinator._ensure_ready(), coordinator._ensure_ready())
+    await asyncio.gather(
+        coordinator.async_refresh_points(), coordinator.async_refresh_points()
+    )
+    await asyncio.gather(
+        coordinator._fetch_realtime(["1_11_0_0"], ["83002"]),
+        coordinator._fetch_realtime(["1_11_0_0"], ["83002"]),
+    )
+
+    assert sorted(calls) == [
+        "getDeviceList",
+        "getDeviceRealTimeData",
+        "getOpenPointInfo",
+        "getOpenPointInfo",
+        "getPowerStationDetail",
+        "getPowerStationList",
+    ]
+    assert coordinator.ps_key == "1_11_0_0"
+    assert list(coordinator.points) == ["83002"]
+
+
+def test_entries_with_same_access_key_share_budget():
     hass = DummyHass()
-    entry = make_mock_entry()
-    coordinator = SuncloudDataCoordinator(hass, entry)
+    first = SuncloudDataCoordinator(
+        hass, make_mock_entry({"access_key": "AK"}, {"daily_call_limit": 500})
+    )
+    second = SuncloudDataCoordinator(hass, make_mock_entry({"access_key": "AK"}))
+    other = SuncloudDataCoordinator(hass, make_mock_entry({"access_key": "OTHER"}))
 
-    await coordinator.async_start()
-    assert coordinator._unsub_stop is not None
+    assert first.budget is second.budget
+    assert first.budget is not other.budget
+    assert second.budget.daily_limit == 500
+    assert len(first.budget.entries) == 2
 
-    # Trigger shutdown
-    await coordinator._on_shutdown(None)
-    assert coordinator._unsub_stop is None
+    first.api.on_request("getDeviceRealTimeData")
+    assert second.budget.used() == 1
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_keeps_last_values_without_requests():
+    coordinator = SuncloudDataCoordinator(
+        DummyHass(), make_mock_entry(options={"daily_call_limit": 1})
+    )
+    coordinator.store.async_schedule_save = MagicMock()
+    coordinator.token, coordinator.token_issued_at = "TOKEN", time.time()
+    coordinator.ps_id, coordinator.sn, coordinator.ps_key = 1, "SN", "1_11_0_0"
+    coordinator._points = {"83002": {"unit": "W"}}
+    coordinator.discovered_at = time.time()
+    coordinator.data = {"83002": 5}
+    coordinator.synced_at = time.time() - 7200
+    synced_at = coordinator.synced_at
+    coordinator.api.request = AsyncMock(side_effect=AssertionError)
+    coordinator.budget.record("getDeviceRealTimeData")
+
+    assert await coordinator._async_update_data() == {"83002": 5}
+    coordinator.api.request.assert_not_called()
+    # The values are not any fresher, here or in the store.
+    assert coordinator.synced_at == synced_at
+    assert coordinator.store.data["last_values"]["synced_at"] == synced_at
+
+
+@pytest.mark.asyncio
+async def test_last_values_persisted_and_restored_with_tier_fetch_times():
+    coordinator, _ = make_chunked_coordinator()
+    coordinator._points = {"83002": {}}
+    coordinator.data = {("1_11_0_0", "83001"): 7}
+
+    await coordinator._async_update_data()
+    last_values = coordinator.store.data["last_values"]
+    coordinator.store.async_schedule_save.assert_called()
+
+    restored = SuncloudDataCoordinator(DummyHass(), make_mock_entry())
+    # Stored as JSON: tuple keys come back as lists.
+    restored.store.async_load = AsyncMock(
+        return_value={"last_values": json.loads(json.dumps(last_values))}
+    )
+    await restored._load_config_storage()
+
+    assert restored.data == {("1_11_0_0", "83001"): 7, "83002": 83002}
+    assert restored.synced_at == coordinator.synced_at
+    assert restored.fetched_at("83002") == coordinator.fetched_at("83002")
+    assert restored.fetched_at("83002") is not None
+    assert restored.value_available("83002")
+    # Restored tiers are not due again until their interval has passed.
+    assert restored._tiers.due(time.time()) == {"fast"}
+
+
+@pytest.mark.asyncio
+async def test_last_values_older_than_max_staleness_not_restored():
+    coordinator = SuncloudDataCoordinator(
+        DummyHass(), make_mock_entry(options={"max_staleness": 600})
+    )
+    coordinator.store.async_load = AsyncMock(
+        return_value={
+            "last_values": {
+                "synced_at": time.time() - 601,
+                "values": [["83002", 5]],
+            }
+        }
+    )
+    await coordinator._load_config_storage()
+
+    assert coordinator.data is None
+    assert coordinator.synced_at == 0.0
+
+
+@pytest.mark.asyncio
+async def test_repeated_failures_refresh_entities_serving_last_values():
+    coordinator, _ = make_chunked_coordinator(failing_point="83003")
+    coordinator._points = {"83003": {}}
+    coordinator.data = {"83003": 1}
+    notified = []
+    coordinator.async_update_listeners = lambda: notified.append(True)
+
+    with pytest.raises(coordinator_module.UpdateFailed):
+        await coordinator._async_update_data()
+    assert notified == []
+
+    coordinator.last_update_success = False
+    with pytest.raises(coordinator_module.UpdateFailed):
+        await coordinator._async_update_data()
+    assert notified == [True]
+
+
+@pytest.mark.asyncio
+async def test_stale_discovery_not_revalidated_on_a_low_budget():
+    hass = BackgroundHass()
+    coordinator = SuncloudDataCoordinator(
+        hass, make_mock_entry(options={"daily_call_limit": 10})
+    )
+    coordinator.token, coordinator.token_issued_at = "TOKEN", time.time()
+    coordinator.ps_id, coordinator.sn, coordinator.ps_key = 1, "SN", "KEY"
+    coordinator._points = {"83002": {}}
+    for _ in range(8):
+        coordinator.budget.record("getDeviceRealTimeData")
+
+    await coordinator._ensure_ready()
+
+    assert hass.background == []
+
+
+@pytest.mark.asyncio
+async def test_adaptive_interval_follows_sun_and_flat_values(monkeypatch):
+    now = datetime(2024, 6, 1, 4, 40, tzinfo=UTC)
+    sun = {"up": False}
+    monkeypatch.setattr(coordinator_module.dt_util, "utcnow", lambda: now)
+    monkeypatch.setattr(coordinator_module, "is_up", lambda hass, when: sun["up"])
+    monkeypatch.setattr(
+        coordinator_module,
+        "get_astral_event_next",
+        lambda hass, event, when: when + timedelta(minutes=20),
+    )
+    coordinator = SuncloudDataCoordinator(
+        DummyHass(),
+        make_mock_entry(
+            options={
+                "adaptive_polling": True,
+                "poll_interval": 300,
+                "max_poll_interval": 1200,
+                "night_poll_interval": 3600,
+            }
+        ),
+    )
+    coordinator.store.async_schedule_save = MagicMock()
+    coordinator.token, coordinator.token_issued_at = "TOKEN", time.time()
+    coordinator.ps_id, coordinator.sn, coordinator.ps_key = 1, "SN", "1_11_0_0"
+    coordinator.discovered_at = time.time()
+    coordinator._points = {"83002": {"unit": "W"}}
+    coordinator._fetch_realtime = AsyncMock(
+        return_value=[{"device_point": {"p83002": 0}}]
+    )
+
+    async def poll():
+        coordinator.data = await coordinator._async_update_data()
+        return coordinator.update_interval.total_seconds()
+
+    # At night: the night interval, but not past sunrise.
+    assert await poll() == 20 * 60
+
+    # By day, each poll without changes doubles the interval up to the max.
+    sun["up"] = True
+    assert [await poll() for _ in range(3)] == [600, 1200, 1200]
+
+    # The call budget stretches the scheduler's interval when running ahead.
+    coordinator.budget.register(coordinator.config_entry.entry_id, 100)
+    coordinator.budget.clock = lambda: datetime(2024, 6, 1, 6)
+    for _ in range(50):
+        coordinator.budget.record("getDeviceRealTimeData")
+    assert await poll() == 2400
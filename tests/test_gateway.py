@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+from fake_gateway import FakeGateway
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+
+
+class DummyBus:
+    def async_listen_once(self, event, callback):
+        return None
+
+
+class DummyConfig:
+    components: frozenset[str] = frozenset()
+
+    @staticmethod
+    def path(name):
+        return name
+
+
+class DummyHass:
+    def __init__(self):
+        self.bus = DummyBus()
+        self.config = DummyConfig()
+        self.data = {}
+
+
+@pytest_asyncio.fixture
+async def gateway():
+    async with FakeGateway(plants=3, points=12, seed=1) as gateway:
+        yield gateway
+
+
+def make_coordinator(gateway, **options):
+    entry = MagicMock()
+    entry.data = gateway.entry_data()
+    entry.options = options
+    coordinator = SuncloudDataCoordinator(DummyHass(), entry)
+    coordinator.store.async_schedule_save = MagicMock()
+    coordinator.api.retry_delay = 0
+    return coordinator
+
+
+@pytest.mark.asyncio
+async def test_discovery_and_poll_against_gateway(gateway):
+    coordinator = make_coordinator(gateway)
+    try:
+        data = await coordinator._async_update_data()
+    finally:
+        await coordinator.async_close()
+
+    assert coordinator.ps_key == "1000_11_0_0"
+    assert len(coordinator.points) == 12
+    # Every tier is due on the first poll.
+    assert len(data) == 12
+    assert gateway.requests["login"] == 1
+    assert gateway.requests["getDeviceRealTimeData"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fleet_poll_in_chunks_against_gateway(gateway):
+    coordinator = make_coordinator(gateway, fleet_mode=True, point_chunk_size=5)
+    try:
+        data = await coordinator._async_update_data()
+    finally:
+        await coordinator.async_close()
+
+    assert set(coordinator.plants) == {f"{1000 + i}_11_0_0" for i in range(3)}
+    assert len(data) == 3 * 12
+    assert gateway.requests["getDeviceRealTimeData"] == 3
+
+
+@pytest.mark.asyncio
+async def test_expired_token_and_injected_errors(gateway):
+    coordinator = make_coordinator(gateway)
+    try:
+        await coordinator._async_update_data()
+
+        gateway.expire_tokens()
+        await coordinator._async_update_data()
+        assert gateway.requests["login"] == 2
+
+        gateway.fail("getDeviceRealTimeData", kind="garbage")
+        with pytest.raises(UpdateFailed):
+            await coordinator._async_update_data()
+        # A single HTTP 500 is retried; one per attempt fails the update.
+        gateway.fail("getDeviceRealTimeData")
+        assert await coordinator._async_update_data()
+        gateway.fail("getDeviceRealTimeData", times=coordinator.api.retries + 1)
+        with pytest.raises(UpdateFailed):
+            await coordinator._async_update_data()
+        assert await coordinator._async_update_data()
+    finally:
+        await coordinator.async_close()
@@ -1,10 +1,12 @@
-import pytest
 from unittest.mock import AsyncMock, MagicMock
 
-from custom_components.suncloud_monitor import async_setup_entry
-from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+import pytest
 from homeassistant.helpers import entity_registry as er
 
+from custom_components import suncloud_monitor
+from custom_components.suncloud_monitor import async_reload_entry, async_setup_entry
+from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+
 
 class DummyEntry:
     def __init__(self, entry_id, data):
@@ -17,14 +19,27 @@ class DummyEntry:
         self.pref_disable_polling = False
         self.unique_id = "dummy_unique_id"
         self.version = 1
+        self.update_listeners = []
+        self.on_unload = []
+
+    def add_update_listener(self, listener):
+        self.update_listeners.append(listener)
+        return lambda: self.update_listeners.remove(listener)
+
+    def async_on_unload(self, func):
+        self.on_unload.append(func)
 
 
 class DummyBus:
     def async_listen(self, event_type, listener):
         return None
 
-    async def async_listen_once(self, event_type, listener):
-        return None
+    def __init__(self):
+        self.once = []
+
+    def async_listen_once(self, event_type, listener):
+        self.once.append((event_type, listener))
+        return lambda: self.once.remove((event_type, listener))
 
 
 class DummyHass:
@@ -75,6 +90,7 @@ async def test_async_setup_entry_adds_coordinator(monkeypatch):
         "async_config_entry_first_refresh",
         dummy_refresh,
     )
+    monkeypatch.setattr(SuncloudDataCoordinator, "_load_config_storage", dummy_refresh)
 
     fake_registry = MagicMock()
     fake_registry.entities = {
@@ -90,3 +106,48 @@ async def test_async_setup_entry_adds_coordinator(monkeypatch):
     result = await async_setup_entry(hass, entry)
 
     assert result is True
+    # The stop and options listeners go away when the entry is unloaded.
+    coordinator = hass.data["suncloud_monitor"]["id123"]
+    assert hass.bus.once == [("homeassistant_stop", coordinator._on_shutdown)]
+    assert entry.update_listeners == [async_reload_entry]
+    for unsub in entry.on_unload:
+        unsub()
+    assert hass.bus.once == []
+    assert entry.update_listeners == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_imports_each_closed_hour(monkeypatch):
+    """With backfill enabled, closed hours are imported on a schedule."""
+
+    async def dummy_refresh(self):
+        pass
+
+    monkeypatch.setattr(
+        SuncloudDataCoordinator,
+        "async_config_entry_first_refresh",
+        dummy_refresh,
+    )
+    monkeypatch.setattr(SuncloudDataCoordinator, "_load_config_storage", dummy_refresh)
+    monkeypatch.setattr(er, "async_get", lambda hass: MagicMock(entities={}))
+    tracked = []
+
+    def fake_track(hass, action, **when):
+        tracked.append((action, when))
+        return lambda: tracked.remove((action, when))
+
+    monkeypatch.setattr(suncloud_monitor, "async_track_time_change", fake_track)
+
+    hass = DummyHass()
+    entry = DummyEntry("id123", {})
+    entry.options = {"backfill": True}
+
+    assert await async_setup_entry(hass, entry) is True
+
+    coordinator = hass.data["suncloud_monitor"]["id123"]
+    assert tracked == [
+        (coordinator.async_import_closed_hours, {"minute": 10, "second": 0})
+    ]
+    for unsub in entry.on_unload:
+        unsub()
+    assert tracked == []
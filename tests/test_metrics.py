@@ -0,0 +1,37 @@
+from custom_components.suncloud_monitor.metrics import ApiMetrics, EndpointMetrics
+
+
+def test_latency_histogram_buckets():
+    metrics = EndpointMetrics()
+    for latency in (0.05, 0.1, 0.3, 20.0):
+        metrics.record(latency, 0.001, 64, 128, "1")
+
+    histogram = metrics.as_dict()["latency_histogram"]
+    assert histogram["le_0.1s"] == 2
+    assert histogram["le_0.5s"] == 1
+    assert histogram["slower"] == 1
+    assert sum(histogram.values()) == 4
+
+
+def test_totals_and_errors():
+    metrics = EndpointMetrics()
+    metrics.record(0.2, 0.01, 64, 128, "1", decrypted=50)
+    metrics.record_error(0.4, 0.01, "error")
+
+    result = metrics.as_dict()
+    assert result["requests"] == 2
+    assert result["errors"] == 1
+    assert result["latency_mean_ms"] == 300.0
+    assert result["latency_max_ms"] == 400.0
+    assert result["latency_last_ms"] == 400.0
+    assert result["crypto_ms"] == 20.0
+    assert result["encrypted_bytes_sent"] == 64
+    assert result["decrypted_bytes"] == 50
+    assert result["result_codes"] == {"1": 1, "error": 1}
+
+
+def test_api_metrics_groups_by_endpoint():
+    metrics = ApiMetrics()
+    assert metrics.endpoint("login") is metrics.endpoint("login")
+    assert EndpointMetrics().as_dict()["latency_mean_ms"] is None
+    assert list(metrics.as_dict()) == ["login"]
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+from custom_components.suncloud_monitor.quota import QuotaBudget, get_budget
+from custom_components.suncloud_monitor.tiers import (
+    TIER_FAST,
+    TIER_NORMAL,
+    TIER_SLOW,
+    TIER_STATIC,
+)
+
+ALL_TIERS = {TIER_FAST, TIER_NORMAL, TIER_SLOW, TIER_STATIC}
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_budget_shared_per_access_key():
+    data = {}
+    assert get_budget(data, "AK") is get_budget(data, "AK")
+    assert get_budget(data, "AK") is not get_budget(data, "OTHER")
+
+
+def test_calls_counted_per_endpoint_and_reset_daily():
+    clock = Clock(datetime(2024, 6, 1, 12))
+    budget = QuotaBudget(clock=clock)
+    budget.record("login")
+    budget.record("getDeviceRealTimeData")
+    budget.record("getDeviceRealTimeData")
+    assert budget.used() == 3
+    assert budget.as_dict()["calls_today"] == {
+        "login": 1,
+        "getDeviceRealTimeData": 2,
+    }
+
+    clock.now += timedelta(days=1)
+    assert budget.used() == 0
+
+
+def test_low_priority_tiers_dropped_as_budget_runs_out():
+    budget = QuotaBudget(daily_limit=100, clock=Clock(datetime(2024, 6, 1, 23)))
+    assert budget.allowed_tiers(ALL_TIERS) == ALL_TIERS
+
+    for _ in range(75):
+        budget.record("getDeviceRealTimeData")
+    assert budget.allowed_tiers(ALL_TIERS) == {TIER_FAST, TIER_NORMAL, TIER_SLOW}
+    for _ in range(10):
+        budget.record("getDeviceRealTimeData")
+    assert budget.allowed_tiers(ALL_TIERS) == {TIER_FAST, TIER_SLOW}
+    for _ in range(10):
+        budget.record("getDeviceRealTimeData")
+    assert budget.allowed_tiers(ALL_TIERS) == {TIER_FAST}
+    for _ in range(5):
+        budget.record("getDeviceRealTimeData")
+    assert budget.allowed_tiers(ALL_TIERS) == set()
+
+
+def test_intervals_stretched_when_ahead_of_pace():
+    budget = QuotaBudget(daily_limit=100, clock=Clock(datetime(2024, 6, 1, 6)))
+    interval = timedelta(minutes=5)
+    assert budget.next_interval("a", interval) == interval
+
+    # A quarter of the day gone, half of the budget used: poll half as often.
+    for _ in range(50):
+        budget.record("getDeviceRealTimeData")
+    assert budget.stretch() == 2
+    assert budget.next_interval("a", interval) == interval * 2
+
+
+def test_no_limit_only_counts():
+    budget = QuotaBudget(clock=Clock(datetime(2024, 6, 1, 1)))
+    for _ in range(1000):
+        budget.record("getDeviceRealTimeData")
+    assert budget.allowed_tiers(ALL_TIERS) == ALL_TIERS
+    assert budget.stretch() == 1
+
+
+def test_entries_sharing_a_key_are_staggered():
+    clock = Clock(datetime(2024, 6, 1, 12))
+    budget = QuotaBudget(clock=clock)
+    budget.register("a")
+    budget.register("b", daily_limit=500)
+    budget.register("c", daily_limit=1000)
+    assert budget.daily_limit == 500
+
+    interval = timedelta(seconds=300)
+    polls = {}
+    for entry_id in ("a", "b", "c"):
+        delay = budget.next_interval(entry_id, interval)
+        assert interval / 2 <= delay < interval * 3 / 2
+        polls[entry_id] = (clock.now + delay).timestamp() % 300
+    assert sorted(polls.values()) == [0, 100, 200]
+
+    budget.unregister("b")
+    assert budget.entries == ["a", "c"]
+    assert budget.daily_limit == 1000
+    budget.unregister("c")
+    assert budget.daily_limit == 0
+
+
+def test_optional_work_waits_for_its_reserve():
+    budget = QuotaBudget(daily_limit=10, clock=Clock(datetime(2024, 6, 1, 12)))
+    for _ in range(5):
+        budget.record("getDeviceRealTimeData")
+    assert budget.allows(0.5)
+    budget.record("getDeviceRealTimeData")
+    assert not budget.allows(0.5)
+    assert QuotaBudget().allows(1.0)
@@ -0,0 +1,51 @@
+from datetime import UTC, datetime, timedelta
+
+from custom_components.suncloud_monitor.scheduler import AdaptivePollScheduler
+
+NOON = datetime(2024, 6, 21, 12, 0, tzinfo=UTC)
+
+
+def make_scheduler():
+    return AdaptivePollScheduler(60, 900, 3600)
+
+
+def test_changing_values_keep_fast_interval():
+    scheduler = make_scheduler()
+    for _ in range(3):
+        interval = scheduler.next_interval(changed=5, sun_up=True, now=NOON)
+        assert interval == timedelta(seconds=60)
+
+
+def test_flat_values_back_off_up_to_max():
+    scheduler = make_scheduler()
+    intervals = [
+        scheduler.next_interval(changed=0, sun_up=True, now=NOON).total_seconds()
+        for _ in range(6)
+    ]
+    assert intervals == [120, 240, 480, 900, 900, 900]
+
+    interval = scheduler.next_interval(changed=1, sun_up=True, now=NOON)
+    assert interval == timedelta(seconds=60)
+
+
+def test_night_interval_never_sleeps_past_sunrise():
+    scheduler = make_scheduler()
+    midnight = NOON.replace(hour=0)
+
+    far = scheduler.next_interval(
+        changed=0, sun_up=False, now=midnight, next_sunrise=midnight.replace(hour=5)
+    )
+    assert far == timedelta(seconds=3600)
+
+    near = scheduler.next_interval(
+        changed=0,
+        sun_up=False,
+        now=midnight,
+        next_sunrise=midnight + timedelta(minutes=20),
+    )
+    assert near == timedelta(minutes=20)
+
+    past = scheduler.next_interval(
+        changed=0, sun_up=False, now=midnight, next_sunrise=midnight
+    )
+    assert past == timedelta(seconds=60)
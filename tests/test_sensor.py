@@ -1,10 +1,37 @@
-from custom_components.suncloud_monitor.sensor import SuncloudSensor
+import time
+from datetime import UTC, datetime
+from unittest.mock import MagicMock
+
+from homeassistant.const import EntityCategory
+
+from custom_components.suncloud_monitor.breaker import CircuitBreaker
+from custom_components.suncloud_monitor.coordinator import SuncloudDataCoordinator
+from custom_components.suncloud_monitor.metrics import ApiMetrics
+from custom_components.suncloud_monitor.sensor import (
+    SuncloudCircuitSensor,
+    SuncloudEndpointSensor,
+    SuncloudSensor,
+    SuncloudSyncedSensor,
+)
 
 
 class DummyCoordinator:
-    def __init__(self, data=None, ps_id=None):
+    def __init__(self, data=None, ps_id=None, plants=None):
         self.data = data
         self.ps_id = ps_id
+        self.plants = plants or {}
+        self.last_update_success = True
+        self.synced_at = 0.0
+        self._max_staleness = 3600
+        self.tier_fetched_at = None
+
+    value_available = SuncloudDataCoordinator.value_available
+
+    def fetched_at(self, point_id):
+        return self.tier_fetched_at
+
+    def get_point_config(self, point_id):
+        return {}
 
 
 def test_sensor_entity_creation():
@@ -12,8 +39,8 @@ def test_sensor_entity_creation():
     sensor = SuncloudSensor(
         coordinator=coordinator, point_id="123", name="Test Point", unit="Wh"
     )
-    assert sensor._attr_unique_id == "suncloud_123"
-    assert sensor._attr_name == "Test Point"
+    assert sensor._attr_unique_id == "suncloud_sensor_123"
+    assert sensor._attr_name == "123 - Test Point"
     assert sensor._attr_native_unit_of_measurement == "Wh"
     assert sensor._point_id == "123"
 
@@ -34,6 +61,14 @@ def test_native_value_returns_none_if_no_data():
     assert sensor.native_value is None
 
 
+def test_sensor_unavailable_when_point_missing_from_data():
+    coordinator = DummyCoordinator(data={"123": 42})
+    present = SuncloudSensor(coordinator=coordinator, point_id="123")
+    missing = SuncloudSensor(coordinator=coordinator, point_id="456")
+    assert present.available is True
+    assert missing.available is False
+
+
 def test_device_info_with_ps_id():
     coordinator = DummyCoordinator(ps_id="plant123")
     sensor = SuncloudSensor(
@@ -52,3 +87,133 @@ def test_device_info_without_ps_id():
     info = sensor.device_info
     assert info["identifiers"] == {("suncloud_monitor", "unknown_plant")}
     assert info["name"] == "Sungrow unknown_plant"
+
+
+def test_fleet_sensor_reads_ps_key_scoped_value():
+    coordinator = DummyCoordinator(
+        data={("1_11_0_0", "123"): 7, "123": 42},
+        plants={"1_11_0_0": {"ps_id": 1, "ps_name": "Roof"}},
+    )
+    sensor = SuncloudSensor(
+        coordinator=coordinator,
+        point_id="123",
+        name="Test Point",
+        unit="Wh",
+        ps_key="1_11_0_0",
+    )
+    assert sensor.native_value == 7
+    assert sensor.unique_id == "suncloud_sensor_1_11_0_0_123"
+    assert sensor.name == "Roof 123 - Test Point"
+    assert sensor.device_info["identifiers"] == {("suncloud_monitor", 1)}
+
+
+def test_sensor_listens_on_its_data_key():
+    sensor = SuncloudSensor(
+        coordinator=DummyCoordinator(), point_id=123, ps_key="1_11_0_0"
+    )
+    assert sensor.coordinator_context == ("1_11_0_0", "123")
+    assert sensor.should_poll is False
+
+
+def test_sensor_unavailable_when_last_update_failed():
+    coordinator = DummyCoordinator(data={"123": 42})
+    coordinator.last_update_success = False
+    sensor = SuncloudSensor(coordinator=coordinator, point_id="123")
+    assert sensor.available is False
+
+
+def test_last_value_served_until_too_stale():
+    coordinator = DummyCoordinator(data={"123": 42})
+    coordinator.last_update_success = False
+    coordinator.synced_at = time.time() - 600
+    sensor = SuncloudSensor(coordinator=coordinator, point_id="123")
+
+    assert sensor.available is True
+    assert sensor.native_value == 42
+    assert sensor.extra_state_attributes is None
+
+    coordinator.synced_at -= 3600
+    assert sensor.available is False
+
+
+def test_sensor_exposes_fetch_time_of_its_tier():
+    coordinator = DummyCoordinator(data={"123": 42})
+    sensor = SuncloudSensor(coordinator=coordinator, point_id="123")
+    assert sensor.extra_state_attributes is None
+
+    coordinator.tier_fetched_at = 1717243200.0
+    assert sensor.extra_state_attributes == {"fetched_at": "2024-06-01T12:00:00+00:00"}
+    assert "fetched_at" in sensor._unrecorded_attributes
+
+
+def test_synced_sensor_reports_last_successful_update():
+    coordinator = DummyCoordinator()
+    coordinator.config_entry = MagicMock(entry_id="entry", title="Home")
+    sensor = SuncloudSyncedSensor(coordinator)
+    assert sensor.native_value is None
+
+    coordinator.synced_at = 1717243200.0
+    coordinator.last_update_success = False
+    assert sensor.native_value == datetime(2024, 6, 1, 12, tzinfo=UTC)
+    assert sensor.available is True
+    assert sensor.device_info["identifiers"] == {("suncloud_monitor", "entry")}
+
+
+def test_sensor_reads_legacy_yaml_point_names():
+    class CatalogCoordinator(DummyCoordinator):
+        def get_point_config(self, point_id):
+            return {"name": "Inverter AC power", "unit": "W"}
+
+    sensor = SuncloudSensor(coordinator=CatalogCoordinator(), point_id="83002")
+    assert sensor.name == "83002 - Inverter AC power"
+    assert sensor.native_unit_of_measurement == "W"
+
+
+def test_endpoint_sensor_reports_metrics():
+    coordinator = DummyCoordinator()
+    coordinator.config_entry = MagicMock(entry_id="entry")
+    coordinator.api = MagicMock(metrics=ApiMetrics())
+    sensor = SuncloudEndpointSensor(coordinator, "getDeviceRealTimeData")
+    assert sensor.native_value is None
+    assert sensor.extra_state_attributes == {}
+    assert sensor.entity_category == EntityCategory.DIAGNOSTIC
+
+    coordinator.api.metrics.endpoint("getDeviceRealTimeData").record(
+        0.25, 0.01, 100, 200, "1"
+    )
+    assert sensor.native_value == 250.0
+    assert sensor.extra_state_attributes["requests"] == 1
+    assert sensor.unique_id == "suncloud_endpoint_entry_getDeviceRealTimeData"
+
+
+def test_diagnostic_sensors_attach_to_a_device_per_entry():
+    sensors = []
+    for entry_id in ("a", "b"):
+        coordinator = DummyCoordinator(plants={"1_11_0_0": {}})
+        coordinator.config_entry = MagicMock(entry_id=entry_id, title=entry_id)
+        coordinator.api = MagicMock(metrics=ApiMetrics(), breakers={})
+        sensors += [
+            SuncloudEndpointSensor(coordinator, "login"),
+            SuncloudCircuitSensor(coordinator),
+        ]
+    identifiers = [sensor.device_info["identifiers"] for sensor in sensors]
+    assert identifiers == [
+        {("suncloud_monitor", "a")},
+        {("suncloud_monitor", "a")},
+        {("suncloud_monitor", "b")},
+        {("suncloud_monitor", "b")},
+    ]
+
+
+def test_circuit_sensor_reports_worst_state():
+    coordinator = DummyCoordinator()
+    coordinator.config_entry = MagicMock(entry_id="entry")
+    coordinator.api = MagicMock(breakers={"login": CircuitBreaker()})
+    sensor = SuncloudCircuitSensor(coordinator)
+    assert sensor.native_value == "closed"
+
+    breaker = CircuitBreaker(threshold=1)
+    breaker.record_failure()
+    coordinator.api.breakers["getDeviceRealTimeData"] = breaker
+    assert sensor.native_value == "open"
+    assert sensor.extra_state_attributes["getDeviceRealTimeData"]["failures"] == 1
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from custom_components.suncloud_monitor.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return calls
+
+    results = await asyncio.gather(*(flights.run("key", fetch) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert not flights.in_flight("key")
+    assert await flights.run("key", fetch) == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("gateway down")
+
+    results = await asyncio.gather(
+        flights.run("key", fail), flights.run("key", fail), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["gateway down"] * 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flights.run("key", fetch))
+    second = asyncio.ensure_future(flights.run("key", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
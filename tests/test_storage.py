@@ -0,0 +1,118 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from homeassistant.core import CoreState
+
+from custom_components.suncloud_monitor.storage import SuncloudStore
+
+
+class DummyBus:
+    def async_listen_once(self, event, callback):
+        return lambda: None
+
+
+class DummyConfig:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, *parts):
+        return str(Path(self.root, *parts))
+
+
+class DummyHass:
+    def __init__(self, root):
+        self.bus = DummyBus()
+        self.config = DummyConfig(root)
+        self.state = CoreState.running
+        self.data = {}
+
+    def async_create_task(self, coro, name=None):
+        return asyncio.ensure_future(coro)
+
+    async def async_add_executor_job(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+LEGACY_YAML = """\
+points:
+  '83002':
+    name: Inverter AC power
+    unit: W
+ps_id: 42
+ps_key: '1_11_0_0'
+sn: SN123
+token: not-migrated
+"""
+
+
+@pytest.mark.asyncio
+async def test_legacy_yaml_migrated_once_into_entry_store(tmp_path):
+    legacy = tmp_path / "custom_components/suncloud_monitor/config_storage.yaml"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(LEGACY_YAML)
+    hass = DummyHass(tmp_path)
+
+    data = await SuncloudStore(hass, "entry1").async_load()
+
+    assert data == {
+        "points": {"83002": {"name": "Inverter AC power", "unit": "W"}},
+        "ps_id": 42,
+        "ps_key": "1_11_0_0",
+        "sn": "SN123",
+    }
+    stored = json.loads((tmp_path / ".storage/suncloud_monitor.entry1").read_text())
+    assert stored["data"] == data
+    # Retired after the import: a second entry starts empty.
+    assert not legacy.exists()
+    assert legacy.with_name("config_storage.yaml.migrated").exists()
+    assert await SuncloudStore(hass, "entry2").async_load() == {}
+
+    legacy.write_text("ps_key: changed\n")
+    reloaded = await SuncloudStore(hass, "entry1").async_load()
+    assert reloaded["ps_key"] == "1_11_0_0"
+
+
+@pytest.mark.asyncio
+async def test_legacy_plant_ids_without_ps_id_not_migrated(tmp_path):
+    legacy = tmp_path / "custom_components/suncloud_monitor/config_storage.yaml"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(LEGACY_YAML.replace("ps_id: 42\n", ""))
+
+    data = await SuncloudStore(DummyHass(tmp_path), "entry1").async_load()
+
+    assert data == {"points": {"83002": {"name": "Inverter AC power", "unit": "W"}}}
+
+
+@pytest.mark.asyncio
+async def test_entries_are_stored_separately(tmp_path):
+    hass = DummyHass(tmp_path)
+    first = SuncloudStore(hass, "a")
+    second = SuncloudStore(hass, "b")
+    await first.async_load()
+    await second.async_load()
+
+    first.data["ps_key"] = "A"
+    await first.async_save()
+    second.data["ps_key"] = "B"
+    await second.async_save()
+
+    assert (await SuncloudStore(hass, "a").async_load())["ps_key"] == "A"
+    assert (await SuncloudStore(hass, "b").async_load())["ps_key"] == "B"
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_pending_changes_only_when_dirty(tmp_path):
+    hass = DummyHass(tmp_path)
+    store = SuncloudStore(hass, "entry1")
+    await store.async_load()
+    path = tmp_path / ".storage/suncloud_monitor.entry1"
+
+    await store.async_flush()
+    assert not path.exists()
+
+    store.data["sn"] = "SN1"
+    store._dirty = True
+    await store.async_flush()
+    assert json.loads(path.read_text())["data"] == {"sn": "SN1"}
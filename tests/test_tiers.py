@@ -0,0 +1,29 @@
+from custom_components.suncloud_monitor.tiers import (
+    TIER_FAST,
+    TIER_NORMAL,
+    TIER_SLOW,
+    TIER_STATIC,
+    TierSchedule,
+    point_tier,
+)
+
+
+def test_point_tier_derived_from_unit():
+    assert point_tier({"unit": "W"}) == TIER_FAST
+    assert point_tier({"storage_unit": "kWh"}) == TIER_SLOW
+    assert point_tier({"unit": "kWp"}) == TIER_STATIC
+    assert point_tier({"unit": "℃"}) == TIER_NORMAL
+    assert point_tier({}) == TIER_NORMAL
+
+
+def test_tier_schedule_due_and_slack():
+    schedule = TierSchedule({TIER_FAST: 0, TIER_SLOW: 900})
+    assert schedule.due(0) == {TIER_FAST, TIER_SLOW}
+
+    schedule.mark_fetched({TIER_FAST, TIER_SLOW}, 0)
+    assert schedule.due(300) == {TIER_FAST}
+    # A poll arriving slightly early still picks up the slow tier.
+    assert schedule.due(890, slack=150) == {TIER_FAST, TIER_SLOW}
+
+    schedule.reset()
+    assert schedule.due(1) == {TIER_FAST, TIER_SLOW}
@@ -0,0 +1,62 @@
+import logging
+
+from custom_components.suncloud_monitor.tracing import LazyPayload, PayloadTracer
+
+
+class CountingPayload(dict):
+    """Dict that counts how often it is rendered."""
+
+    renders = 0
+
+    def items(self):
+        CountingPayload.renders += 1
+        return super().items()
+
+
+def test_payload_not_rendered_when_debug_disabled(caplog):
+    logger = logging.getLogger("suncloud_test_tracing_off")
+    logger.setLevel(logging.INFO)
+    tracer = PayloadTracer(logger)
+    CountingPayload.renders = 0
+
+    if tracer.start():
+        tracer.trace("REALTIME", "🔓", CountingPayload(a=1))
+
+    assert CountingPayload.renders == 0
+    assert not caplog.records
+
+
+def test_sampling_traces_every_nth_request(caplog):
+    logger = logging.getLogger("suncloud_test_tracing_sampled")
+    tracer = PayloadTracer(logger, sample_every=3)
+    with caplog.at_level(logging.DEBUG, logger=logger.name):
+        traced = [tracer.start() for _ in range(6)]
+    assert traced == [True, False, False, True, False, False]
+
+
+def test_large_payloads_truncated_and_secrets_redacted():
+    payload = {"user_password": "secret", "points": "x" * 100}
+    text = str(LazyPayload(payload, max_chars=40))
+    assert "secret" not in text
+    assert text.startswith('{"user_password": "**REDACTED**"')
+    assert text.endswith("more)")
+    assert str(LazyPayload("short", max_chars=40)) == "short"
+
+
+def test_raw_reply_bytes_rendered_as_text():
+    assert str(LazyPayload(b"ABCDEF", max_chars=4)) == "ABCD... (2 more)"
+
+
+def test_nested_secrets_redacted_in_login_reply():
+    reply = {
+        "result_code": "1",
+        "result_data": {
+            "token": "TOKEN-123",
+            "user_id": "42",
+            "plants": [{"ps_id": 1, "token": "NESTED-456"}],
+        },
+    }
+    text = str(LazyPayload(reply))
+    assert "TOKEN-123" not in text and "NESTED-456" not in text
+    assert '"user_id": "42"' in text
+    assert reply["result_data"]["token"] == "TOKEN-123"
@@ -0,0 +1,19 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from custom_components.suncloud_monitor.config_flow import OPTION_DEFAULTS
+from custom_components.suncloud_monitor.const import CONF_POINTS
+
+COMPONENT = Path(__file__).parent.parent / "custom_components/suncloud_monitor"
+
+
+@pytest.mark.parametrize(
+    "path", ["strings.json", "translations/en.json", "translations/es.json"]
+)
+def test_every_option_has_a_label(path):
+    strings = json.loads((COMPONENT / path).read_text())
+    labels = strings["options"]["step"]["init"]["data"]
+    assert {CONF_POINTS, "repopulate", *OPTION_DEFAULTS} <= labels.keys()
+    assert "not_loaded" in strings["options"]["abort"]